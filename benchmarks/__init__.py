@@ -0,0 +1,17 @@
+"""
+Performance benchmarks, separate from the functional tests under tests/.
+
+    python -m benchmarks run -o benchmarks/baselines/main.json     # record a baseline
+    python -m benchmarks check benchmarks/baselines/main.json      # run and compare; exit 1 on regression
+    python -m benchmarks compare old.json new.json --threshold 0.05
+
+micro.* time single hot-path functions; macro.* time POST /api/v1/analyze end
+to end against stand-ins for YouTube, Redis and the model. Timings depend on
+the machine, so only compare results recorded on the same hardware.
+
+    python -m benchmarks.loadtest --start-mock --start-api --duration 60 --concurrency 32
+
+loadtest drives a running API over HTTP with a traffic mix (hit ratio, video
+sizes, concurrency or arrival rate) and reports throughput and latency
+percentiles; mock_youtube stands in for the YouTube API so it spends no quota.
+"""
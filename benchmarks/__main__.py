@@ -0,0 +1,122 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+from rich.console import Console
+from rich.table import Table
+from benchmarks import harness
+
+console = Console()
+
+DEFAULT_OUTPUT = Path("benchmarks/results/latest.json")
+
+
+def _load_suite(real_model: bool):
+    # YouTubeService needs a key to build its client; the benchmarks replace it anyway
+    os.environ.setdefault("YOUTUBE_API_KEY", "unused-by-benchmarks")
+    if not real_model:
+        # before anything builds a SentimentAnalyzer
+        from benchmarks.fixtures import install_stand_in_model
+        install_stand_in_model()
+    import benchmarks.micro   # noqa: F401  (registers benchmarks)
+    import benchmarks.macro   # noqa: F401
+
+
+def _run(args) -> dict:
+    _load_suite(args.real_model)
+    selected = harness.select(args.k)
+    if not selected:
+        console.print(f"[red]No benchmarks match {args.k}[/red]")
+        sys.exit(2)
+
+    def progress(name, result):
+        console.print(
+            f"{name:<45} {harness.format_seconds(result['median']):>12}/op"
+            f"  ±{result['stdev'] / result['median']:.1%}  ({result['loops']} loops x {result['repeat']})",
+            soft_wrap=True
+        )
+
+    results = harness.run(
+        selected,
+        repeat=args.repeat,
+        min_time=args.min_time,
+        progress=progress,
+        model="real" if args.real_model else "stand-in",
+    )
+    harness.save(results, args.output)
+    console.print(f"Results written to {args.output}")
+    return results
+
+
+def _report(baseline: dict, current: dict, threshold: Optional[float]) -> int:
+    for mismatch in harness.environment_mismatch(baseline, current):
+        console.print(f"[yellow]Baseline recorded with a different {mismatch}[/yellow]")
+
+    table = Table(title=f"baseline {baseline.get('commit') or '?'} -> current {current.get('commit') or '?'}")
+    for column in ("benchmark", "baseline", "current", "change", "limit", ""):
+        table.add_column(column, justify="left" if column == "benchmark" else "right")
+    comparisons = harness.compare(baseline, current, threshold)
+    for c in comparisons:
+        verdict = "[red]REGRESSED[/red]" if c.regressed else ("[green]faster[/green]" if c.improved else "ok")
+        table.add_row(
+            c.name,
+            harness.format_seconds(c.baseline),
+            harness.format_seconds(c.current),
+            f"{c.change:+.1%}",
+            f"{c.threshold:.0%}",
+            verdict,
+        )
+    console.print(table)
+
+    regressed = [c.name for c in comparisons if c.regressed]
+    if regressed:
+        console.print(f"[red]{len(regressed)} regression(s): {', '.join(regressed)}[/red]")
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run and compare performance benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_run_options(command):
+        command.add_argument("-k", action="append", metavar="PATTERN",
+                             help="only benchmarks matching this glob, e.g. 'micro.*' (repeatable)")
+        command.add_argument("-o", "--output", type=Path, default=DEFAULT_OUTPUT,
+                             help=f"where to write the results (default: {DEFAULT_OUTPUT})")
+        command.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (default: 5)")
+        command.add_argument("--min-time", type=float, default=0.2,
+                             help="seconds each timed run lasts at least (default: 0.2)")
+        command.add_argument("--real-model", action="store_true",
+                             help="load the real sentiment model instead of the stand-in")
+
+    run = commands.add_parser("run", help="run benchmarks and save the results")
+    add_run_options(run)
+
+    compare = commands.add_parser("compare", help="compare two result files")
+    compare.add_argument("baseline", type=Path)
+    compare.add_argument("current", type=Path)
+    compare.add_argument("--threshold", type=float, help="allowed slowdown, e.g. 0.1 (default: per benchmark)")
+
+    check = commands.add_parser("check", help="run benchmarks, then compare them with a baseline")
+    check.add_argument("baseline", type=Path)
+    check.add_argument("--threshold", type=float, help="allowed slowdown, e.g. 0.1 (default: per benchmark)")
+    add_run_options(check)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        _run(args)
+        return 0
+    if args.command == "compare":
+        return _report(harness.load(args.baseline), harness.load(args.current), args.threshold)
+
+    baseline = harness.load(args.baseline)
+    if not args.k:
+        # only what the baseline has, so a new benchmark does not slow the check down
+        args.k = list(baseline["benchmarks"])
+    return _report(baseline, _run(args), args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Deterministic inputs and stand-ins for the benchmarks: synthetic comments,
+a fake YouTube service, an in-memory Redis and a tiny sentiment model.
+"""
+import random
+import zlib
+from typing import Dict, List
+from src.services.rate_limit import WINDOW_SHA
+from src.services.singleflight import RELEASE_SCRIPT
+from tests.fakes import FakeRedis
+
+WORDS = [
+    "great", "video", "love", "this", "terrible", "mid", "song", "again", "first",
+    "honestly", "the", "best", "part", "was", "when", "he", "said", "that", "lol",
+    "worst", "edit", "ever", "amazing", "thanks", "for", "sharing", "who", "is", "here", "2024",
+]
+DECORATIONS = [
+    "", "", "", " 😂😂", " 😍", " https://youtu.be/dQw4w9WgXcQ", "<br>", " !!!!", " sooooo good",
+    " &quot;quoted&quot;", " <a href=\"https://www.youtube.com/watch?v=x\">12:34</a>",
+]
+LABELS = ("negative", "neutral", "positive")
+
+
+def comment_texts(n: int, seed: int = 0) -> List[str]:
+    """YouTube-like textDisplay strings: short, emoji, links, HTML, repeated letters."""
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choices(WORDS, k=rng.randint(2, 60))) + rng.choice(DECORATIONS)
+        for _ in range(n)
+    ]
+
+
+def comments(n: int, seed: int = 0) -> List[Dict]:
+    """Comments as YouTubeService.get_comments returns them."""
+    rng = random.Random(seed)
+    return [
+        {
+            "author": f"User{i}",
+            "published_at": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z",
+            "updated_at": "2024-12-31T00:00:00Z",
+            "like_count": int(rng.paretovariate(1.2)) - 1,
+            "text": text,
+        }
+        for i, text in enumerate(comment_texts(n, seed))
+    ]
+
+
+def enriched_comments(n: int, seed: int = 0) -> List[Dict]:
+    """Comments as AnalyzerService has scored them, ready for aggregation."""
+    rng = random.Random(seed)
+    return [
+        {**c, "cleaned_text": c["text"].lower(), "sentiment": rng.choice(LABELS), "confidence": round(rng.random(), 4)}
+        for c in comments(n, seed)
+    ]
+
+
+def stand_in_pipeline(*args, **kwargs):
+    """
+    Replaces transformers.pipeline: a "model" that costs a little per token,
+    so batching and bookkeeping around it show up, not a transformer's cost.
+    """
+    def model(texts):
+        if isinstance(texts, str):
+            texts = [texts]
+        results = []
+        for text in texts:
+            h = 0
+            for token in text.split():
+                h = zlib.crc32(token.encode(), h)
+            results.append({"label": LABELS[h % 3], "score": 0.5 + (h % 500) / 1000})
+        return results
+    return model
+
+
+def install_stand_in_model():
+    """Make every SentimentAnalyzer built from now on use the stand-in model."""
+    import src.models.sentiment as sentiment
+    sentiment.pipeline = stand_in_pipeline
+
+
+class FakeYouTube:
+    """get_comments() without the network: `n` synthetic comments per video."""
+    def __init__(self, n: int):
+        self.n = n
+
+    async def get_comments(self, video_id: str, max_results: int, include_replies: bool = False) -> dict:
+        found = comments(min(self.n, max_results), seed=zlib.crc32(video_id.encode()))
+        return {"video_id": video_id, "comments": found, "total": len(found)}
+
+
+class BenchRedis(FakeRedis):
+    """FakeRedis that also runs the two scripts the API calls."""
+
+    async def evalsha(self, sha: str, numkeys: int, *keys_and_args):
+        if sha == WINDOW_SHA:
+            return [1, 1_000_000, 0]     # never rate limited
+        raise NotImplementedError(sha)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args):
+        key, token = keys_and_args[0], keys_and_args[1]
+        if self._live(key) != str(token):
+            return 0
+        if script == RELEASE_SCRIPT:
+            return await self.delete(key)
+        return 1    # lease renewal
@@ -0,0 +1,194 @@
+"""
+Benchmark registry, timing loop, result files and the regression check.
+
+A benchmark is a setup function registered with @benchmark. It returns the
+callable to time (plain or async) and how many operations one call performs;
+setup itself is not timed. Each benchmark is calibrated like timeit: the
+loop count grows until one repeat takes at least `min_time`, then the
+repeats are timed and reported per operation.
+"""
+import asyncio
+import fnmatch
+import inspect
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_THRESHOLD = 0.10      # fail when 10% slower than the baseline
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[], Tuple[Callable, int]]
+    threshold: float = DEFAULT_THRESHOLD
+
+
+REGISTRY: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, threshold: float = DEFAULT_THRESHOLD):
+    """Register a setup function returning (fn, ops per call) under `name`."""
+    def register(setup):
+        if name in REGISTRY:
+            raise ValueError(f"Benchmark {name} is already registered")
+        REGISTRY[name] = Benchmark(name, setup, threshold)
+        return setup
+    return register
+
+
+def select(patterns: Optional[List[str]]) -> List[Benchmark]:
+    """Registered benchmarks matching any of the glob patterns (all of them if none)."""
+    return [
+        bench for name, bench in REGISTRY.items()
+        if not patterns or any(fnmatch.fnmatch(name, p) for p in patterns)
+    ]
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """
+    The one loop every async benchmark (and its setup) runs on. The app keeps
+    asyncio objects in module-level singletons, which must not see two loops.
+    """
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop
+
+
+def _timer(fn: Callable) -> Callable[[int], float]:
+    """A function timing `loops` calls of fn, in seconds."""
+    if inspect.iscoroutinefunction(fn):
+        async def run(loops: int) -> float:
+            start = time.perf_counter()
+            for _ in range(loops):
+                await fn()
+            return time.perf_counter() - start
+        return lambda loops: event_loop().run_until_complete(run(loops))
+
+    def run_sync(loops: int) -> float:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        return time.perf_counter() - start
+    return run_sync
+
+
+def measure(fn: Callable, ops: int = 1, repeat: int = 5, min_time: float = 0.2) -> Dict:
+    """Seconds per operation of fn: median, min, mean and stdev over `repeat` timed runs."""
+    timer = _timer(fn)
+    timer(1)    # warm-up: imports, caches, first-call compilation
+    loops = 1
+    while (elapsed := timer(loops)) < min_time:
+        loops *= 10 if elapsed < min_time / 10 else 2
+    runs = [timer(loops) / (loops * ops) for _ in range(repeat)]
+    return {
+        "median": statistics.median(runs),
+        "min": min(runs),
+        "mean": statistics.fmean(runs),
+        "stdev": statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat,
+        "ops": ops,
+    }
+
+
+def run(benchmarks: List[Benchmark], repeat: int = 5, min_time: float = 0.2,
+        progress: Callable[[str, Dict], None] = None, **context) -> Dict:
+    """Run benchmarks and return a results document (see save())."""
+    results = {}
+    for bench in benchmarks:
+        fn, ops = bench.setup()
+        results[bench.name] = {**measure(fn, ops, repeat, min_time), "threshold": bench.threshold}
+        if progress:
+            progress(bench.name, results[bench.name])
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        **context,
+        "unit": "seconds per op",
+        "benchmarks": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save(results: Dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2) + "\n")
+
+
+def load(path: Path) -> Dict:
+    return json.loads(path.read_text())
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline: float        # median seconds per op
+    current: float
+    threshold: float
+    regressed: bool
+    improved: bool
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1
+
+
+def compare(baseline: Dict, current: Dict, threshold: Optional[float] = None) -> List[Comparison]:
+    """
+    Compare the benchmarks present in both result documents.
+
+    A benchmark regresses when its median AND its best run are both more than
+    `threshold` slower than the baseline's. Requiring both keeps one noisy
+    repeat from failing the check. `threshold` overrides the per-benchmark
+    thresholds recorded in the baseline.
+    """
+    comparisons = []
+    for name, base in baseline["benchmarks"].items():
+        cur = current["benchmarks"].get(name)
+        if cur is None:
+            continue
+        limit = threshold if threshold is not None else base.get("threshold", DEFAULT_THRESHOLD)
+        regressed = (
+            cur["median"] > base["median"] * (1 + limit)
+            and cur["min"] > base["min"] * (1 + limit)
+        )
+        improved = cur["median"] < base["median"] * (1 - limit)
+        comparisons.append(Comparison(name, base["median"], cur["median"], limit, regressed, improved))
+    return comparisons
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def environment_mismatch(baseline: Dict, current: Dict) -> List[str]:
+    """Differences that make a comparison unreliable (other Python, machine, model)."""
+    return [
+        f"{key}: {baseline.get(key)} -> {current.get(key)}"
+        for key in ("python", "machine", "model")
+        if baseline.get(key) != current.get(key)
+    ]
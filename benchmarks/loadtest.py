@@ -0,0 +1,324 @@
+"""
+Load test: drive a running API with a configurable traffic mix and report
+throughput, latency percentiles and error rates.
+
+    python -m benchmarks.loadtest --start-mock --start-api --duration 60 --concurrency 32
+    python -m benchmarks.loadtest --target http://staging:8000 --rate 20 --hit-ratio 0.8
+
+--start-mock serves the YouTube mock (benchmarks.mock_youtube) and --start-api
+runs uvicorn pointed at it, so no quota is spent; the API still needs Redis.
+Without --rate, `concurrency` clients send back-to-back requests (closed
+loop). With --rate, requests arrive on a fixed schedule whatever the server
+does (open loop), and latency is measured from the scheduled arrival, so a
+stalled server shows up in the percentiles instead of slowing the load down.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import httpx
+from rich.console import Console
+from rich.table import Table
+from benchmarks.mock_youtube import MISSING_PREFIX
+
+console = Console()
+
+ID_CHARS = string.ascii_letters + string.digits
+
+
+@dataclass
+class Planned:
+    kind: str           # hit, miss or not_found
+    video_id: str
+    max_comments: int
+    include_comments: bool
+
+
+@dataclass
+class Outcome:
+    kind: str
+    status: int         # 0 when the request never got a response
+    latency: float
+    cache: str = ""
+
+
+def parse_sizes(spec: str) -> List[Tuple[int, int]]:
+    """'100:5,1000:4,5000:1' -> [(100, 5), (1000, 4), (5000, 1)]: comment counts and their weights."""
+    sizes = []
+    for part in spec.split(","):
+        size, _, weight = part.partition(":")
+        sizes.append((int(size), int(weight or 1)))
+    if any(size < 1 or size > 50000 or weight < 0 for size, weight in sizes):
+        raise ValueError(f"Bad video size mix: {spec}")
+    return sizes
+
+
+def sized_video_id(size: int, rng: random.Random) -> str:
+    """An 11-character id the mock serves `size` comment threads for."""
+    return f"{size:05d}" + "".join(rng.choices(ID_CHARS, k=6))
+
+
+class TrafficMix:
+    """
+    Request stream: `hit_ratio` of requests go to a fixed set of hot videos
+    (cached after warm_up), `not_found` to unknown videos, the rest to videos
+    never requested before, with comment counts drawn from `sizes`.
+    """
+    def __init__(self, sizes: List[Tuple[int, int]], hit_ratio: float, hot_videos: int,
+                 summary_ratio: float = 0.0, not_found: float = 0.0, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self.sizes, self.weights = zip(*sizes)
+        self.hit_ratio = hit_ratio
+        self.summary_ratio = summary_ratio
+        self.not_found = not_found
+        self.hot = [self._video("hit") for _ in range(hot_videos)]
+
+    def _video(self, kind: str) -> Planned:
+        if kind == "not_found":
+            video_id = MISSING_PREFIX + "".join(self.rng.choices(ID_CHARS, k=11 - len(MISSING_PREFIX)))
+            return Planned(kind, video_id, 100, True)
+        size = self.rng.choices(self.sizes, self.weights)[0]
+        include_comments = self.rng.random() >= self.summary_ratio
+        return Planned(kind, sized_video_id(size, self.rng), size, include_comments)
+
+    def warm_up(self) -> List[Planned]:
+        return list(self.hot)
+
+    def next(self) -> Planned:
+        roll = self.rng.random()
+        if roll < self.not_found:
+            return self._video("not_found")
+        if self.hot and roll < self.not_found + self.hit_ratio:
+            return self.rng.choice(self.hot)
+        return self._video("miss")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(outcomes: List[Outcome], elapsed: float) -> Dict:
+    """Throughput, latency percentiles, status codes and X-Cache values of a set of outcomes."""
+    latencies = sorted(o.latency for o in outcomes)
+    statuses = Counter(str(o.status) for o in outcomes)
+    # 404 is the expected answer for unknown videos, not a failure
+    errors = sum(1 for o in outcomes if o.status == 0 or o.status >= 500 or (o.status >= 400 and o.kind != "not_found"))
+    return {
+        "requests": len(outcomes),
+        "throughput": len(outcomes) / elapsed if elapsed else 0.0,
+        "error_rate": errors / len(outcomes) if outcomes else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, p) * 1000, 2)
+            for name, p in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "status": dict(statuses),
+        "cache": dict(Counter(o.cache for o in outcomes if o.cache)),
+    }
+
+
+def report(outcomes: List[Outcome], elapsed: float) -> Dict:
+    """summarize() for all requests and for each kind of request."""
+    kinds = sorted({o.kind for o in outcomes})
+    return {
+        "overall": summarize(outcomes, elapsed),
+        **{kind: summarize([o for o in outcomes if o.kind == kind], elapsed) for kind in kinds},
+    }
+
+
+class LoadTest:
+    def __init__(self, target: str, mix: TrafficMix, clients: int, timeout: float):
+        self.mix = mix
+        self.clients = [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(clients)]
+        self.http = httpx.AsyncClient(base_url=target, timeout=timeout, limits=httpx.Limits(max_connections=None))
+        self.outcomes: List[Outcome] = []
+        self._sent = 0
+
+    async def send(self, planned: Planned, scheduled: Optional[float] = None) -> Outcome:
+        """One POST /api/v1/analyze; latency counts from `scheduled` when given."""
+        start = scheduled if scheduled is not None else time.perf_counter()
+        # each request from the next client address, so the per-IP rate limit is not what gets measured
+        client = self.clients[self._sent % len(self.clients)]
+        self._sent += 1
+        try:
+            response = await self.http.post(
+                "/api/v1/analyze",
+                json={
+                    "video_url": f"https://www.youtube.com/watch?v={planned.video_id}",
+                    "max_comments": planned.max_comments,
+                    "include_comments": planned.include_comments,
+                },
+                headers={"X-Forwarded-For": client},
+            )
+            status, cache = response.status_code, response.headers.get("x-cache", "")
+        except httpx.HTTPError:
+            status, cache = 0, ""
+        return Outcome(planned.kind, status, time.perf_counter() - start, cache)
+
+    async def warm_up(self):
+        outcomes = await asyncio.gather(*(self.send(p) for p in self.mix.warm_up()))
+        failed = [o for o in outcomes if o.status != 200]
+        if failed:
+            console.print(f"[yellow]{len(failed)} of {len(outcomes)} warm-up requests failed "
+                          f"(status {Counter(o.status for o in failed).most_common()})[/yellow]")
+
+    async def closed_loop(self, duration: float, concurrency: int):
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                self.outcomes.append(await self.send(self.mix.next()))
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def open_loop(self, duration: float, rate: float):
+        start = time.perf_counter()
+        tasks = []
+        for i in range(int(duration * rate)):
+            scheduled = start + i / rate
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            tasks.append(asyncio.create_task(self.send(self.mix.next(), scheduled)))
+        self.outcomes.extend(await asyncio.gather(*tasks))
+
+    async def close(self):
+        await self.http.aclose()
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+
+def _start(args: List[str], ready_url: str, env: Optional[Dict] = None) -> subprocess.Popen:
+    process = subprocess.Popen([sys.executable, *args], env={**os.environ, **(env or {})})
+    try:
+        _wait_ready(ready_url, process)
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process
+
+
+def _print(results: Dict, title: str):
+    table = Table(title=title)
+    table.add_column("", justify="left")
+    for column in ("requests", "req/s", "p50", "p95", "p99", "max", "errors", "status", "X-Cache"):
+        table.add_column(column, justify="right")
+    for kind, s in results.items():
+        lat = s["latency_ms"]
+        table.add_row(
+            kind,
+            str(s["requests"]),
+            f"{s['throughput']:.1f}",
+            *(f"{lat[p]:.0f} ms" for p in ("p50", "p95", "p99", "max")),
+            f"{s['error_rate']:.1%}",
+            " ".join(f"{code}:{n}" for code, n in sorted(s["status"].items())),
+            " ".join(f"{value}:{n}" for value, n in sorted(s["cache"].items())),
+        )
+    console.print(table)
+
+
+async def _run(args) -> Dict:
+    mix = TrafficMix(parse_sizes(args.video_sizes), args.hit_ratio, args.hot_videos,
+                     args.summary_ratio, args.not_found, args.seed)
+    test = LoadTest(args.target, mix, args.clients, args.timeout)
+    try:
+        await test.warm_up()
+        start = time.perf_counter()
+        if args.rate:
+            await test.open_loop(args.duration, args.rate)
+        else:
+            await test.closed_loop(args.duration, args.concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        await test.close()
+    return report(test.outcomes, elapsed)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="Load-test POST /api/v1/analyze.")
+    parser.add_argument("--target", default="http://127.0.0.1:8000", help="API base URL (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load (default: 30)")
+    parser.add_argument("--concurrency", type=int, default=16, help="closed-loop clients (default: 16)")
+    parser.add_argument("--rate", type=float, help="open loop: requests per second instead of --concurrency")
+    parser.add_argument("--hit-ratio", type=float, default=0.5, help="share of requests for cached videos (default: 0.5)")
+    parser.add_argument("--hot-videos", type=int, default=20, help="cached videos the hits go to (default: 20)")
+    parser.add_argument("--video-sizes", default="100:5,1000:4,5000:1",
+                        help="comment counts and weights of requested videos (default: %(default)s)")
+    parser.add_argument("--summary-ratio", type=float, default=0.0,
+                        help="share of requests with include_comments=false (default: 0)")
+    parser.add_argument("--not-found", type=float, default=0.0, help="share of requests for unknown videos (default: 0)")
+    parser.add_argument("--clients", type=int, default=1000,
+                        help="distinct X-Forwarded-For addresses to spread requests over (default: 1000)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds (default: 60)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("-o", "--output", type=Path, help="also write the results as JSON")
+    servers = parser.add_argument_group("local servers")
+    servers.add_argument("--start-mock", action="store_true", help="serve the YouTube mock for the run")
+    servers.add_argument("--mock-port", type=int, default=8081)
+    servers.add_argument("--mock-latency-ms", type=float, default=80.0, help="median YouTube page latency (default: 80)")
+    servers.add_argument("--mock-error-rate", type=float, default=0.0, help="share of YouTube pages failing with 503")
+    servers.add_argument("--start-api", action="store_true", help="run the API (uvicorn) against the mock for the run")
+    servers.add_argument("--workers", type=int, default=1, help="uvicorn workers with --start-api (default: 1)")
+    args = parser.parse_args(argv)
+
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    processes = []
+    try:
+        if args.start_mock:
+            processes.append(_start(
+                ["-m", "benchmarks.mock_youtube", "--port", str(args.mock_port),
+                 "--latency-ms", str(args.mock_latency_ms), "--error-rate", str(args.mock_error_rate)],
+                f"{mock_url}/healthz",
+            ))
+        if args.start_api:
+            port = httpx.URL(args.target).port or 8000
+            processes.append(_start(
+                ["-m", "uvicorn", "src.api.main:app", "--port", str(port), "--workers", str(args.workers),
+                 "--log-level", "warning"],
+                f"{args.target}/health",
+                env={"YOUTUBE_API_ENDPOINT": f"{mock_url}/"},
+            ))
+
+        results = asyncio.run(_run(args))
+        if args.start_mock:
+            results["youtube_pages"] = httpx.get(f"{mock_url}/stats").json()
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+
+    mode = f"{args.rate:g} req/s open loop" if args.rate else f"{args.concurrency} clients closed loop"
+    _print({k: v for k, v in results.items() if k != "youtube_pages"},
+           f"{args.target}, {mode}, {args.duration:g}s, hit ratio {args.hit_ratio:g}")
+    if "youtube_pages" in results:
+        console.print(f"YouTube mock served {results['youtube_pages']}")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"config": vars(args) | {"output": str(args.output)}, **results}, indent=2) + "\n")
+        console.print(f"Results written to {args.output}")
+    return 1 if results["overall"]["error_rate"] > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Macro-benchmarks: POST /api/v1/analyze end to end, in process.
+
+Requests go through the real app (middleware, rate limiter, single-flight,
+cache, pipeline, serialization and compression) over an ASGI transport, with
+YouTube, Redis and the model replaced by the stand-ins in fixtures.
+"""
+import asyncio
+import itertools
+from benchmarks import fixtures
+from benchmarks.harness import benchmark
+
+MACRO_THRESHOLD = 0.20    # whole requests are noisier than single functions
+COMMENTS = 200
+CONCURRENCY = 16
+
+_video_ids = (f"bench{i:06d}" for i in itertools.count())
+
+
+def _client(n_comments: int):
+    import httpx
+    from src.api import dependencies
+    from src.api.main import app
+    from src.api.routes import analyze
+
+    redis = fixtures.BenchRedis()
+    analyze.cache_service.redis_server = redis
+    analyze.cache_service.local.clear()
+    dependencies.limiter.redis_server = redis
+    analyze.youtube_service = fixtures.FakeYouTube(n_comments)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    return client, analyze.cache_service
+
+
+async def _analyze(client, video_id: str):
+    response = await client.post(
+        "/api/v1/analyze",
+        json={"video_url": f"https://www.youtube.com/watch?v={video_id}", "max_comments": COMMENTS}
+    )
+    response.raise_for_status()
+    return response
+
+
+@benchmark(f"macro.analyze_miss[{COMMENTS}]", threshold=MACRO_THRESHOLD)
+def analyze_miss():
+    client, _ = _client(COMMENTS)
+
+    async def run():
+        await _analyze(client, next(_video_ids))
+    return run, 1
+
+
+@benchmark(f"macro.analyze_hit_l1[{COMMENTS}]", threshold=MACRO_THRESHOLD)
+def analyze_hit_l1():
+    client, _ = _client(COMMENTS)
+    video_id = next(_video_ids)
+
+    async def run():
+        await _analyze(client, video_id)
+    return run, 1
+
+
+@benchmark(f"macro.analyze_hit_l2[{COMMENTS}]", threshold=MACRO_THRESHOLD)
+def analyze_hit_l2():
+    client, cache = _client(COMMENTS)
+    video_id = next(_video_ids)
+
+    async def run():
+        cache.local.clear()
+        await _analyze(client, video_id)
+    return run, 1
+
+
+@benchmark(f"macro.analyze_concurrent_miss[{CONCURRENCY}x{COMMENTS}]", threshold=MACRO_THRESHOLD)
+def analyze_concurrent_miss():
+    """Per-request time with CONCURRENCY different videos analyzed at once (1 / throughput)."""
+    client, _ = _client(COMMENTS)
+
+    async def run():
+        await asyncio.gather(*(_analyze(client, next(_video_ids)) for _ in range(CONCURRENCY)))
+    return run, CONCURRENCY
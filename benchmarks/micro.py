@@ -0,0 +1,126 @@
+"""Micro-benchmarks: single functions on the analysis hot path."""
+from benchmarks import fixtures
+from benchmarks.harness import benchmark
+
+BATCH_SIZES = (1, 8, 32, 128)
+
+
+@benchmark("micro.text_clean")
+def text_clean():
+    from src.models.preprocessing import TextProcessor
+    processor = TextProcessor()
+    texts = fixtures.comment_texts(1000)
+
+    def run():
+        for text in texts:
+            processor.clean(text)
+    return run, len(texts)
+
+
+@benchmark("micro.get_video_id")
+def get_video_id():
+    from src.utils.validators import get_videoId
+    urls = [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtu.be/dQw4w9WgXcQ",
+        "https://m.youtube.com/watch?v=dQw4w9WgXcQ&t=42s",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+        "https://example.com/watch?v=dQw4w9WgXcQ",
+    ]
+
+    def run():
+        for url in urls:
+            get_videoId(url)
+    return run, len(urls)
+
+
+def _analyze_batch(size: int):
+    def setup():
+        from src.models.sentiment import SentimentAnalyzer
+        analyzer = SentimentAnalyzer()
+        texts = fixtures.comment_texts(size)
+        return lambda: analyzer.analyze_batch(texts), size
+    return setup
+
+
+for _size in BATCH_SIZES:
+    benchmark(f"micro.analyze_batch[{_size}]")(_analyze_batch(_size))
+
+
+def _aggregate(n: int):
+    def setup():
+        from src.core.config import get_settings
+        from src.services.analytics import compute_analytics
+        from src.services.analyzer import AnalyzerService
+        settings = get_settings()
+        service = AnalyzerService()
+        enriched = fixtures.enriched_comments(n)
+
+        def run():
+            # everything analyze_comments does after inference
+            distribution = service._calculate_distribution(enriched)
+            service._get_overall_sentiment(distribution)
+            service._calculate_avg_confidence(enriched)
+            compute_analytics(enriched, settings.ANALYTICS_TOP_K, settings.ANALYTICS_TIME_BUCKET)
+        return run, 1
+    return setup
+
+
+for _n in (1000, 10000):
+    benchmark(f"micro.aggregate[{_n}]")(_aggregate(_n))
+
+
+def _cache_service():
+    from src.services.cache import CacheService
+    cache = CacheService()
+    cache.redis_server = fixtures.BenchRedis()
+    return cache
+
+
+def _analysis_body(n: int) -> bytes:
+    from src.api.serialization import encode_body
+    return encode_body({
+        "video_id": "dQw4w9WgXcQ",
+        "total_comments": n,
+        "valid_comments": n,
+        "sentiment_distribution": {"positive": 33.3, "negative": 33.3, "neutral": 33.4},
+        "overall_sentiment": "neutral",
+        "average_confidence": 0.5,
+        "comments": fixtures.enriched_comments(n),
+        "processing_time_ms": 1,
+    })
+
+
+@benchmark("micro.cache_set_many[1000]")
+def cache_set_many():
+    from src.api.serialization import encode_body
+    cache = _cache_service()
+    body = _analysis_body(1000)
+    summary = encode_body({"video_id": "dQw4w9WgXcQ"})
+
+    async def run():
+        await cache.set_many({"analysis:{dQw4w9WgXcQ}:1000": body, "analysis:{dQw4w9WgXcQ}:1000:summary": summary})
+    return run, 1
+
+
+@benchmark("micro.cache_get_l1[1000]")
+def cache_get_l1():
+    from benchmarks.harness import event_loop
+    cache = _cache_service()
+    event_loop().run_until_complete(cache.set("analysis:{dQw4w9WgXcQ}:1000", _analysis_body(1000)))
+
+    async def run():
+        await cache.get_entry("analysis:{dQw4w9WgXcQ}:1000")
+    return run, 1
+
+
+@benchmark("micro.cache_get_l2[1000]")
+def cache_get_l2():
+    from benchmarks.harness import event_loop
+    cache = _cache_service()
+    event_loop().run_until_complete(cache.set("analysis:{dQw4w9WgXcQ}:1000", _analysis_body(1000)))
+
+    async def run():
+        cache.local.clear()     # force the Redis read and decode
+        await cache.get_entry("analysis:{dQw4w9WgXcQ}:1000")
+    return run, 1
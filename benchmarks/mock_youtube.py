@@ -0,0 +1,217 @@
+"""
+Local stand-in for the two YouTube Data API endpoints YouTubeService calls,
+commentThreads.list and comments.list, for load tests that must not spend
+quota.
+
+    python -m benchmarks.mock_youtube --port 8081 --latency-ms 80
+    YOUTUBE_API_ENDPOINT=http://127.0.0.1:8081/ uvicorn src.api.main:app
+
+Videos are synthetic and deterministic. An id starting with five digits
+(`01000abcdef`) has that many comment threads; ids starting with NOTFOUND get
+a 404; any other id gets DEFAULT_THREADS. Pages come back the way the real API
+pages them (at most 100 items, nextPageToken), after an injected latency.
+"""
+import argparse
+import asyncio
+import math
+import random
+import re
+import zlib
+from typing import Dict, List
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+DEFAULT_THREADS = 500
+PAGE_MAX = 100
+SIZED_ID = re.compile(r"^(\d{5})")
+MISSING_PREFIX = "NOTFOUND"
+
+VOCAB = (
+    "the a this that is was it i you he they we so very really just too not never "
+    "video song part edit music voice camera channel content tutorial vlog movie ending "
+    "love great amazing awesome best beautiful perfect fun funny helpful thanks wow nice "
+    "hate bad terrible awful worst boring cringe annoying disappointed clickbait mid trash "
+    "first here watching again 2024 minute lol lmao honestly literally who else remember"
+).split()
+EMOJI = ["😂", "😍", "🔥", "❤️", "👍", "😭", "💀", "🙏", "😡", "🤔", "👏", "🥺"]
+# what turns up over and over in real comment sections
+DUPLICATES = [
+    "First!", "Who's here in 2024?", "❤️❤️❤️", "Great video!", "lol",
+    "Check out my channel!!! https://example.com/sub4sub", "Came here from TikTok 😂",
+]
+
+
+def _rng(*parts) -> random.Random:
+    return random.Random(zlib.crc32(":".join(map(str, parts)).encode()))
+
+
+def comment_text(rng: random.Random, duplicate_rate: float = 0.08) -> str:
+    """
+    One comment's textDisplay: log-normal length (median ~10 words, a long
+    tail into hundreds), emoji, the odd link and <br>, and copy-paste duplicates.
+    """
+    if rng.random() < duplicate_rate:
+        return rng.choice(DUPLICATES)
+    words = rng.choices(VOCAB, k=min(int(rng.lognormvariate(2.3, 1.0)) + 1, 600))
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(EMOJI) * rng.randint(1, 4))
+    if rng.random() < 0.2:
+        words[0] = words[0].upper() + "!!!"
+    text = " ".join(words)
+    if rng.random() < 0.1:
+        text = text.replace(" ", "<br>", 1)
+    if rng.random() < 0.03:
+        text += ' <a href="https://www.youtube.com/watch?v=dQw4w9WgXcQ">https://youtu.be/dQw4w9WgXcQ</a>'
+    return text
+
+
+def _snippet(rng: random.Random, video_id: str) -> Dict:
+    published = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00Z"
+    return {
+        "videoId": video_id,
+        "authorDisplayName": f"@user{rng.randrange(10 ** 6)}",
+        "textDisplay": comment_text(rng),
+        "likeCount": int(rng.paretovariate(1.1)) - 1,
+        "publishedAt": published,
+        "updatedAt": published,
+    }
+
+
+def reply_count(video_id: str, index: int) -> int:
+    """Replies of a thread: most have none, a few have hundreds."""
+    rng = _rng(video_id, index, "replies")
+    return 0 if rng.random() < 0.7 else min(int(rng.paretovariate(0.9)), 500)
+
+
+def _reply(video_id: str, thread: int, index: int) -> Dict:
+    rng = _rng(video_id, thread, "reply", index)
+    return {"kind": "youtube#comment", "id": f"{video_id}.t{thread}.r{index}", "snippet": _snippet(rng, video_id)}
+
+
+def thread(video_id: str, index: int, with_replies: bool) -> Dict:
+    total = reply_count(video_id, index)
+    item = {
+        "kind": "youtube#commentThread",
+        "id": f"{video_id}.t{index}",
+        "snippet": {
+            "videoId": video_id,
+            "topLevelComment": {
+                "kind": "youtube#comment",
+                "id": f"{video_id}.t{index}",
+                "snippet": _snippet(_rng(video_id, index), video_id),
+            },
+            "totalReplyCount": total,
+        },
+    }
+    if with_replies and total:
+        # like the real API: only the first few replies come inline
+        item["replies"] = {"comments": [_reply(video_id, index, i) for i in range(min(total, 5))]}
+    return item
+
+
+def thread_count(video_id: str) -> int:
+    sized = SIZED_ID.match(video_id)
+    return int(sized.group(1)) if sized else DEFAULT_THREADS
+
+
+def _page(total: int, page_token: str, max_results: int):
+    start = int(page_token) if page_token and page_token.isdigit() else 0
+    end = min(start + max(1, min(max_results, PAGE_MAX)), total)
+    return start, end, (str(end) if end < total else None)
+
+
+def _error(status: int, reason: str, message: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"code": status, "message": message, "errors": [{"reason": reason, "message": message}]}},
+    )
+
+
+def create_app(latency_ms: float = 80.0, jitter: float = 0.5, error_rate: float = 0.0, seed: int = 0) -> FastAPI:
+    """
+    The mock as an ASGI app. Each page waits a log-normal latency with
+    median `latency_ms` (`jitter` is its sigma), and fails with a 503
+    backendError at `error_rate`.
+    """
+    app = FastAPI(title="YouTube Data API mock")
+    rng = random.Random(seed)
+    app.state.stats = {"thread_pages": 0, "reply_pages": 0, "errors": 0}
+
+    async def delay() -> bool:
+        """Wait out the injected latency; False when this call should fail."""
+        if latency_ms > 0:
+            await asyncio.sleep(rng.lognormvariate(math.log(latency_ms), jitter) / 1000)
+        if rng.random() < error_rate:
+            app.state.stats["errors"] += 1
+            return False
+        return True
+
+    @app.get("/youtube/v3/commentThreads")
+    async def comment_threads(
+        videoId: str,
+        part: str = "snippet",
+        maxResults: int = 20,
+        pageToken: str = None
+    ):
+        if not await delay():
+            return _error(503, "backendError", "Backend Error")
+        if videoId.startswith(MISSING_PREFIX):
+            return _error(404, "videoNotFound", "The video identified by the videoId parameter could not be found.")
+        app.state.stats["thread_pages"] += 1
+        start, end, next_token = _page(thread_count(videoId), pageToken, maxResults)
+        page = {
+            "kind": "youtube#commentThreadListResponse",
+            "pageInfo": {"totalResults": end - start, "resultsPerPage": maxResults},
+            "items": [thread(videoId, i, "replies" in part) for i in range(start, end)],
+        }
+        if next_token:
+            page["nextPageToken"] = next_token
+        return page
+
+    @app.get("/youtube/v3/comments")
+    async def comments(parentId: str, part: str = "snippet", maxResults: int = 20, pageToken: str = None):
+        if not await delay():
+            return _error(503, "backendError", "Backend Error")
+        video_id, _, thread_part = parentId.rpartition(".t")
+        if not thread_part.isdigit():
+            return _error(404, "commentNotFound", "The comment could not be found.")
+        app.state.stats["reply_pages"] += 1
+        index = int(thread_part)
+        start, end, next_token = _page(reply_count(video_id, index), pageToken, maxResults)
+        page = {
+            "kind": "youtube#commentListResponse",
+            "items": [_reply(video_id, index, i) for i in range(start, end)],
+        }
+        if next_token:
+            page["nextPageToken"] = next_token
+        return page
+
+    @app.get("/healthz")
+    def health():
+        return {"status": "ok"}
+
+    @app.get("/stats")
+    def stats() -> Dict:
+        """Pages served so far: what the run would have cost in quota."""
+        return app.state.stats
+
+    return app
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Serve a mock of the YouTube comment endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="median latency per page (default: 80)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="sigma of the log-normal latency (default: 0.5)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of pages failing with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    app = create_app(args.latency_ms, args.jitter, args.error_rate, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,78 @@
-from src.services.cache import CacheService
+from src.services.rate_limit import RateLimiter
 from src.core.config import get_settings
-from fastapi import Request, status, HTTPException
-import time
+from src.core.timing import Stage
+from src.core import profiling
+from fastapi import Header, Request, status, HTTPException
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+import asyncio
+import hmac
+import math
+import random
 
 settings = get_settings()
-cache_service = CacheService()
+limiter = RateLimiter()
+rate_limit_timer = Stage("rate_limit")
+profile_store = profiling.ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_FILES)
 
 async def rate_limiter(request: Request):
     """
     Rate limit requests per IP address.
     
-    Limits: {RATE_LIMIT_PER_MINUTE} requests per minute per IP.
-    Uses Redis for distributed rate limiting.
+    Limits: {RATE_LIMIT_PER_MINUTE} requests per minute per IP, enforced
+    over any rolling minute (sliding-window log) with one Redis round-trip.
     """
     # get client IP
     client_ip = request.client.host
     if "x-forwarded-for" in request.headers:
         client_ip = request.headers["x-forwarded-for"].split(",")[0].strip()
 
-    # generate time-based key
-    current_minute = int(time.time() // 60) # in minutes
-    key = f"rate_limit:{client_ip}:{current_minute}"
-
-    # increment counter and set TTL
-    current_count = await cache_service.redis_server.incr(key)
-    if current_count == 1:
-        await cache_service.redis_server.expire(key, 60)
-
-    # check limit
-    limit = settings.RATE_LIMIT_PER_MINUTE
-    if current_count > limit:
-        retry_after = 60 - (int(time.time()) % 60)
+    with rate_limit_timer.time():
+        allowed, remaining, retry_after = await limiter.check(client_ip)
+    if not allowed:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Rate limit exceeded. Please try again later.",
-            headers={"Retry-After": str(retry_after)}
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
         )
     
     # store remaining count for response header
-    request.state.rate_limit_remaining = max(0, limit-current_count)
-    return True
\ No newline at end of file
+    request.state.rate_limit_remaining = remaining
+    return True
+
+
+def is_admin(token: Optional[str]) -> bool:
+    """Whether a token matches ADMIN_TOKEN; nobody is admin while it is unset."""
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Gate for /admin routes. They do not exist (404) unless ADMIN_TOKEN is set."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
+
+
+@asynccontextmanager
+async def profiled(request: Request, label: str):
+    """
+    Profile the enclosed work if an admin asked for it (`X-Profile: <ADMIN_TOKEN>`)
+    or the request was drawn at PROFILE_SAMPLE_RATE.
+
+    Yields a dict that holds the saved profile's name (under "name") once the
+    block exits. At most one request is profiled at a time; others run as usual.
+    """
+    saved: Dict[str, str] = {}
+    wanted = is_admin(request.headers.get("x-profile")) or random.random() < settings.PROFILE_SAMPLE_RATE
+    profiler = profiling.try_start(settings.PROFILE_INTERVAL_MS / 1000) if wanted else None
+    if profiler is None:
+        yield saved
+        return
+    try:
+        yield saved
+    finally:
+        profiling.finish(profiler)
+        saved["name"] = await asyncio.to_thread(profile_store.save, label, profiler)
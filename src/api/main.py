@@ -1,15 +1,31 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Response, status
+from contextlib import asynccontextmanager
 from typing import Dict
-from src.api.routes import analyze
+from src.api.routes import analyze, classify, comments, jobs, profiles
 from src.core.config import get_settings
+from src.core import executors
+from src.core.redis import close_redis
+from src.core.metrics import REGISTRY, CONTENT_TYPE
+from src.api.middleware import MetricsMiddleware
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    analyze.cache_service.start_invalidation_listener()
+    yield
+    await analyze.cache_service.stop_invalidation_listener()
+    await close_redis()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 def root():
@@ -26,8 +42,53 @@ def health_check():
         "version": settings.VERSION
     }
 
+@app.get("/cache/stats")
+def cache_stats():
+    return analyze.cache_service.stats()
+
+@app.get("/classify/stats")
+def classify_stats():
+    return classify.batcher.stats()
+
+@app.get("/admission/stats")
+def admission_stats():
+    return analyze.admission.stats()
+
+@app.get("/executors/stats")
+def executor_stats():
+    return executors.stats()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 app.include_router(
     analyze.router,
     prefix="/api/v1",
     tags=["Analysis"]
-)
\ No newline at end of file
+)
+
+app.include_router(
+    comments.router,
+    prefix="/api/v1",
+    tags=["Analysis"]
+)
+
+app.include_router(
+    classify.router,
+    prefix="/api/v1",
+    tags=["Classification"]
+)
+
+app.include_router(
+    jobs.router,
+    prefix="/api/v1",
+    tags=["Jobs"]
+)
+
+app.include_router(
+    profiles.router,
+    prefix="/admin",
+    tags=["Admin"]
+)
@@ -0,0 +1,52 @@
+import time
+from src.core.metrics import HTTP_IN_FLIGHT, HTTP_REQUEST_SECONDS
+from src.core.timing import start_request
+
+
+class MetricsMiddleware:
+    """
+    Counts requests in flight and times each one by route template, so
+    /api/v1/jobs/{job_id} is one series however many job ids are polled.
+
+    Also opens the request's stage timings (see src.core.timing) and sends
+    them back in a Server-Timing header.
+
+    Plain ASGI rather than BaseHTTPMiddleware: it must not buffer or copy
+    response bodies, which run to megabytes.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        timings = start_request()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", timings.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            HTTP_REQUEST_SECONDS.labels(_route_template(scope), status).observe(time.perf_counter() - start)
+
+
+def _route_template(scope) -> str:
+    """The matched route's path with its parameters put back, e.g. /api/v1/jobs/{job_id}."""
+    if scope.get("route") is None:
+        return "unmatched"     # 404s would otherwise make a series per probed URL
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
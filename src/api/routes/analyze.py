@@ -1,65 +1,279 @@
-from fastapi import APIRouter, HTTPException, Depends
-from src.schemas.requests import AnalyzeRequest
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from typing import List, Optional
+import time
+from src.schemas.requests import AnalyzeRequest, SELECTABLE_FIELDS
 from src.schemas.responses import AnalysisResponse
 from src.services.youtube import YouTubeService
 from src.services.analyzer import AnalyzerService
 from src.services.cache import CacheService
+from src.services.singleflight import ComputeFailed, SingleFlight
+from src.services.admission import AdmissionController, Overloaded
+from src.services.anytime import AnytimeAnalyzer, CostModel, new_state
+from src.services.codec import EncodedBody
 from src.utils.validators import get_videoId
-from src.api.dependencies import rate_limiter
+from src.api.dependencies import rate_limiter, profiled
+from src.api.serialization import encode_body, retag, project, add_timings
+from src.api.compression import accepts, decompress, encode_for
+from src.core.timing import Stage, current as current_timings
+from src.core.config import get_settings
+from src.core import executors
 
 router = APIRouter()
+settings = get_settings()
 
 youtube_service = YouTubeService()
 analyzer_service = AnalyzerService()
 cache_service = CacheService()
+single_flight = SingleFlight(cache_service)
+admission = AdmissionController(
+    settings.ADMISSION_MAX_ACTIVE_COMMENTS,
+    settings.ADMISSION_MAX_QUEUED_COMMENTS,
+    settings.ADMISSION_AGING_SECONDS
+)
+anytime_costs = CostModel()    # measured page, scoring and finishing costs, for deadline_ms requests
+
+SUMMARY_FIELDS = [f for f in SELECTABLE_FIELDS if f != "comments"]
+serialize_timer = Stage("serialize")
+respond_timer = Stage("respond")
 
 @router.post("/analyze", response_model=AnalysisResponse, dependencies=[Depends(rate_limiter)])
-async def analyze_url(request: AnalyzeRequest):
+async def analyze_url(request: AnalyzeRequest, http_request: Request):
     """
     Analyze Sentiment of YouTube video comments
     """
+    async with profiled(http_request, "analyze") as profile:
+        response = await _analyze(request, http_request)
+    if "name" in profile:
+        response.headers["X-Profile-Id"] = profile["name"]
+    return response
+
+
+async def _analyze(request: AnalyzeRequest, http_request: Request) -> Response:
+    deadline = time.monotonic() + request.deadline_ms / 1000 if request.deadline_ms else None
     # Step 1: Extract video ID
     video_id = get_videoId(request.video_url)
     if not video_id:
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail="Invalid YouTube URL"
         )
-    
+
     # cache_key = f"{video_id}:{request.max_comments}"
-    cache_key = cache_service.generate_analysis_key(video_id, request.max_comments)
-    cached_data = await cache_service.get(cache_key)
-    if cached_data:
-        cached_data["cached"] = True
-        cached_data["source"] = "cache"
-        return cached_data
-    
-    # Step 2: Fetch Comments
-    try:
-        comments_data = await youtube_service.get_comments(
-            video_id, 
-            request.max_comments
-        )
-    except ValueError as e:
-        # Handle validation errors (video not found, etc.)
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        print(f"YouTube API Error: {e}")
-        raise HTTPException(status_code=503, detail=f"YouTube API error: {str(e)}")
-    
-    # Step 3: Analyze Comments
-    try:
-        result = await analyzer_service.analyze_comments(
-            video_id=video_id,
-            comments=comments_data["comments"]
+    cache_key = cache_service.generate_analysis_key(
+        video_id,
+        request.max_comments,
+        request.include_replies,
+        request.sample_spec()
+    )
+    # callers that only need the aggregates read the small summary entry
+    summary_key = cache_service.summary_key(cache_key)
+    wants_comments = request.wants_comments()
+    lookup_key = cache_key if wants_comments else summary_key
+
+    accept_encoding = http_request.headers.get("accept-encoding")
+    entry = await cache_service.get_entry(lookup_key)
+    if entry:
+        body, stale = entry
+        if stale:
+            # serve what we have now, refresh for the next caller
+            single_flight.refresh(
+                cache_key,
+                lambda: _fetch_and_analyze(video_id, request, cache_key)
+            )
+        return await _send_body(
+            body, accept_encoding, cached=True, stale=stale,
+            fields=request.fields, timings=request.include_timings
         )
-        result["cached"] = False
-        result["source"] = "api"
-        await cache_service.set(cache_key, result)
-    except Exception as e:
-        print(f"Analysis Error: {e}")
-        raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
+
+    if deadline is not None:
+        # bounded by the caller's own budget, so not shared through single-flight
+        body, fresh = await _analyze_within(video_id, request, cache_key, deadline), True
+    else:
+        # Steps 2-3 run once per key, however many callers missed the cache at once
+        try:
+            body, fresh = await single_flight.run(
+                cache_key,
+                lambda: _fetch_and_analyze(video_id, request, cache_key)
+            )
+        except ComputeFailed as e:
+            # another worker was computing this key and failed; don't repeat it
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    fields = request.fields
+    if not wants_comments:
+        summary = await cache_service.get(summary_key)
+        if summary is not None:
+            body = summary
+        else:
+            fields = fields or SUMMARY_FIELDS
 
     # Step 4: Return Response
-    return result
-    
\ No newline at end of file
+    return await _send_body(body, accept_encoding, cached=not fresh, fields=fields, timings=request.include_timings)
+
+
+async def _fetch_and_analyze(video_id: str, request: AnalyzeRequest, cache_key: str) -> bytes:
+    """
+    Run the pipeline and cache the encoded body; returns the body as cached (a fresh hit).
+
+    The work is admitted first, at max_comments until the real count is known;
+    when too much is already queued the request fails fast with 503.
+    """
+    try:
+        async with admission.slot(request.max_comments) as slot:
+            # Step 2: Fetch Comments
+            try:
+                comments_data = await youtube_service.get_comments(
+                    video_id,
+                    request.max_comments,
+                    request.include_replies
+                )
+            except ValueError as e:
+                # Handle validation errors (video not found, etc.)
+                raise HTTPException(status_code=404, detail=str(e))
+            except Exception as e:
+                print(f"YouTube API Error: {e}")
+                raise HTTPException(status_code=503, detail=f"YouTube API error: {str(e)}")
+            slot.resize(len(comments_data["comments"]))
+
+            # Step 3: Analyze Comments
+            try:
+                if request.mode == "sample":
+                    result = await analyzer_service.estimate_comments(
+                        video_id,
+                        comments_data["comments"],
+                        request.margin_of_error,
+                        request.confidence_level
+                    )
+                else:
+                    result = await analyzer_service.analyze_comments(
+                        video_id=video_id,
+                        comments=comments_data["comments"]
+                    )
+                return await store_analysis(cache_key, result)
+            except Exception as e:
+                print(f"Analysis Error: {e}")
+                raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def _analyze_within(video_id: str, request: AnalyzeRequest, cache_key: str, deadline: float) -> bytes:
+    """
+    Analyze as many comments as fit before the deadline (time.monotonic()),
+    carrying on from what an earlier deadline-bounded call got through.
+
+    A complete result is cached like any other analysis. An incomplete one is
+    returned with complete=false and its coverage; only its progress is
+    cached, under the partial key, for the next call to extend. Progress is
+    read, extended and written back under the key's single-flight lease, so
+    concurrent calls extend it in turn rather than overwriting each other;
+    a call that cannot get the lease before its deadline answers from the
+    progress stored so far.
+    """
+    partial_key = cache_service.partial_key(cache_key)
+    start_time = time.time()
+    async with single_flight.lease(partial_key, until=deadline) as held:
+        state = await cache_service.get(partial_key) or new_state()
+        resumed_from = len(state["comments"])
+        if held or not state["comments"]:
+            try:
+                async with admission.slot(request.max_comments):
+                    state = await AnytimeAnalyzer(youtube_service, analyzer_service, anytime_costs).extend(
+                        video_id, request.max_comments, state, deadline
+                    )
+            except Overloaded as e:
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+            except ValueError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+            except Exception as e:
+                print(f"Analysis Error: {e}")
+                raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
+
+        finish_started = time.monotonic()
+        comments = state["comments"]
+        if comments:
+            result = await analyzer_service.summarize(video_id, comments, state["valid"], start_time)
+        else:
+            result = await analyzer_service.analyze_comments(video_id, [])
+        result["complete"] = state["complete"]
+        result["coverage"] = {
+            "comments": len(comments),
+            "max_comments": request.max_comments,
+            "ratio": round(len(comments) / request.max_comments, 4),
+            "pages": state["pages"],
+            "resumed_from": resumed_from
+        }
+        if state["complete"]:
+            body = await store_analysis(cache_key, result)
+            if held and resumed_from:
+                await cache_service.delete(partial_key)
+        else:
+            with serialize_timer.time():
+                body = await executors.cpu.run(encode_body, result)
+            if held:
+                await cache_service.set(partial_key, state)
+        anytime_costs.observe_finish(time.monotonic() - finish_started, len(comments))
+    return body
+
+
+async def store_analysis(cache_key: str, result: dict) -> bytes:
+    """Cache an analysis and its summary; returns the body as cached (a fresh hit)."""
+    with serialize_timer.time():
+        body = await executors.cpu.run(encode_body, result)
+        summary = encode_body({k: v for k, v in result.items() if k != "comments"})
+    await cache_service.set_many({cache_key: body, cache_service.summary_key(cache_key): summary})
+    return body
+
+
+async def _send_body(
+    body: EncodedBody | bytes | dict,
+    accept_encoding: Optional[str],
+    cached: bool,
+    stale: bool = False,
+    fields: Optional[List[str]] = None,
+    timings: bool = False
+) -> Response:
+    """
+    Send a pre-encoded analysis body, compressed as the client allows.
+
+    Bodies are stored tagged as fresh cache hits and kept compressed by the
+    cache, so the common case - a fresh hit from a client accepting the stored
+    coding - goes out byte-for-byte without being decompressed or recompressed.
+    Anything else is decompressed, projected to `fields`, retagged, given the
+    request's `timings` block if asked and compressed off the event loop.
+    Both paths are timed as the "respond" stage.
+
+    The body was built from our own pipeline output, so it skips response_model
+    validation; response_model still documents the shape in OpenAPI.
+    """
+    with respond_timer.time():
+        cache_status = "STALE" if stale else ("HIT" if cached else "MISS")
+
+        if isinstance(body, dict):
+            # entry cached as a dict before bodies were stored pre-encoded
+            body = encode_body(body)
+        if isinstance(body, EncodedBody):
+            if (body.encoding and cached and not stale and not fields and not timings
+                    and accepts(accept_encoding, body.encoding)):
+                return _response(body.data, body.encoding, cache_status)
+            if body.encoding:
+                body = await executors.cpu.run(decompress, body.data, body.encoding)
+            else:
+                body = body.data
+
+        if fields:
+            body = await executors.cpu.run(project, body, fields)
+        if not cached or stale:
+            body = retag(body, cached=cached, source="cache" if cached else "api", stale=stale)
+        request_timings = current_timings()
+        if timings and request_timings is not None:
+            body = add_timings(body, request_timings.as_dict())
+        content, coding = await encode_for(body, accept_encoding)
+        return _response(content, coding, cache_status)
+
+
+def _response(content: bytes, coding: Optional[str], cache_status: str) -> Response:
+    headers = {"X-Cache": cache_status, "Vary": "Accept-Encoding"}
+    if coding:
+        headers["Content-Encoding"] = coding
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends
+from typing import Dict, List
+import time
+from src.schemas.requests import ClassifyRequest
+from src.schemas.responses import ClassifyResponse
+from src.services.batcher import MicroBatcher
+from src.api.dependencies import rate_limiter
+from src.api.routes.analyze import analyzer_service
+from src.core.config import get_settings
+from src.core import executors
+
+settings = get_settings()
+router = APIRouter()
+
+# one model shared with /analyze; concurrent /classify calls share batches
+batcher = MicroBatcher(
+    analyzer_service.analyzer.analyze_batch,
+    settings.MICRO_BATCH_MAX_SIZE,
+    settings.MICRO_BATCH_MAX_WAIT_MS,
+    executors.inference.run
+)
+
+@router.post("/classify", response_model=ClassifyResponse, dependencies=[Depends(rate_limiter)])
+async def classify_texts(request: ClassifyRequest):
+    """
+    Classify the sentiment of raw texts, without going through YouTube.
+
+    Texts are cleaned the same way comments are; ones too short to classify
+    after cleaning come back neutral with confidence 0.0.
+    """
+    start_time = time.time()
+    processor = analyzer_service.preprocessor
+    cleaned = await executors.cpu.run(lambda: [processor.clean(text) for text in request.texts])
+    valid = [i for i, text in enumerate(cleaned) if processor.is_valid(text)]
+
+    sentiments = await batcher.submit([cleaned[i] for i in valid])
+
+    results: List[Dict] = [{"sentiment": "neutral", "confidence": 0.0} for _ in cleaned]
+    for i, sentiment in zip(valid, sentiments):
+        results[i] = {"sentiment": sentiment["label"], "confidence": sentiment["confidence"]}
+
+    return {
+        "results": results,
+        "processing_time_ms": int((time.time() - start_time) * 1000)
+    }
@@ -0,0 +1,123 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, List, Literal, Optional, Tuple
+import base64
+import hashlib
+import json
+from src.schemas.responses import CommentPage
+from src.services.cache import LocalCache
+from src.services.codec import EncodedBody
+from src.api.dependencies import rate_limiter
+from src.api.routes.analyze import cache_service
+from src.api.compression import decompress
+from src.core.config import get_settings
+from src.core import executors
+
+settings = get_settings()
+router = APIRouter()
+
+# Decoded comment lists and the version of the analysis they came from, so
+# paging through one analysis decodes it once; dropped when the analysis is rewritten
+comments_cache = LocalCache(settings.L1_CACHE_MAX_BYTES // 4, settings.L1_CACHE_TTL)
+cache_service.derived.append(comments_cache)
+
+@router.get(
+    "/analysis/{video_id}/comments",
+    response_model=CommentPage,
+    dependencies=[Depends(rate_limiter)]
+)
+async def list_comments(
+    video_id: str,
+    max_comments: int = 1000,
+    include_replies: bool = False,
+    sentiment: Optional[Literal["positive", "negative", "neutral"]] = None,
+    min_confidence: float = Query(0.0, ge=0.0, le=1.0),
+    sort: Literal["default", "like_count"] = "default",
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    """
+    Page through the comments of an analysis that is already cached.
+
+    The analysis is looked up by the same (max_comments, include_replies)
+    it was requested with; run POST /api/v1/analyze first.
+    """
+    cache_key = cache_service.generate_analysis_key(video_id, max_comments, include_replies)
+    loaded = await _load_comments(cache_key)
+    if loaded is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Analysis not cached. Run POST /api/v1/analyze first."
+        )
+
+    comments, version = loaded
+    # a refreshed analysis is a different list, so cursors from before it are rejected
+    fingerprint = _fingerprint(cache_key, version, sentiment, min_confidence, sort)
+    offset = _decode_cursor(cursor, fingerprint) if cursor else 0
+
+    matching = [
+        c for c in comments
+        if (sentiment is None or c.get("sentiment") == sentiment)
+        and c.get("confidence", 0.0) >= min_confidence
+    ]
+    if sort == "like_count":
+        # stable, so equally liked comments keep their original order
+        matching.sort(key=lambda c: c.get("like_count", 0), reverse=True)
+
+    page = matching[offset:offset + limit]
+    next_offset = offset + len(page)
+    return {
+        "video_id": video_id,
+        "total": len(matching),
+        "limit": limit,
+        "comments": page,
+        "next_cursor": _encode_cursor(next_offset, fingerprint) if next_offset < len(matching) else None
+    }
+
+
+async def _load_comments(cache_key: str) -> Optional[Tuple[List[Dict], str]]:
+    """The analysis' comments and a hash of the cached body they were decoded from."""
+    loaded = comments_cache.get(cache_key)
+    if loaded is not None:
+        return loaded
+
+    # stale entries are fine here; paging never triggers a recompute
+    entry = await cache_service.get_entry(cache_key)
+    if entry is None:
+        return None
+    body, _ = entry
+    if isinstance(body, dict):
+        comments = body.get("comments") or []
+        version = _digest(json.dumps(body, sort_keys=True).encode())
+        size = 0
+    else:
+        if isinstance(body, EncodedBody):
+            body = body.data if body.encoding is None else await executors.cpu.run(decompress, body.data, body.encoding)
+        version = await executors.cpu.run(_digest, body)
+        comments = (await executors.cpu.run(json.loads, body)).get("comments") or []
+        size = len(body)
+    comments_cache.set(cache_key, (comments, version), size)
+    return comments, version
+
+
+def _digest(body: bytes) -> str:
+    return hashlib.sha1(body).hexdigest()[:8]
+
+
+def _fingerprint(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:8]
+
+
+def _encode_cursor(offset: int, fingerprint: str) -> str:
+    return base64.urlsafe_b64encode(f"{offset}:{fingerprint}".encode()).decode()
+
+
+def _decode_cursor(cursor: str, fingerprint: str) -> int:
+    """Cursors are only valid for the query (filters and sort) and analysis version that produced them."""
+    try:
+        offset, _, cursor_fingerprint = base64.urlsafe_b64decode(cursor.encode()).decode().partition(":")
+        offset = int(offset)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_fingerprint != fingerprint or offset < 0:
+        raise HTTPException(status_code=400, detail="Cursor does not match this query (or the analysis was refreshed)")
+    return offset
@@ -0,0 +1,98 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from typing import Dict
+from src.schemas.requests import AnalyzeRequest, job_request
+from src.schemas.responses import JobStatus, AnalysisResponse
+from src.services.jobs import JobQueue, DONE
+from src.utils.validators import get_videoId
+from src.api.dependencies import rate_limiter
+from src.api.routes.analyze import cache_service, _send_body
+
+router = APIRouter()
+
+job_queue = JobQueue()
+
+@router.post(
+    "/jobs",
+    response_model=JobStatus,
+    status_code=202,
+    dependencies=[Depends(rate_limiter)]
+)
+async def create_job(request: AnalyzeRequest):
+    """
+    Queue an analysis to run on a worker (`python -m src.worker`).
+
+    Poll GET /api/v1/jobs/{job_id}; once it is done, the analysis is in the
+    cache and served by GET /api/v1/jobs/{job_id}/result.
+    """
+    video_id = get_videoId(request.video_url)
+    if not video_id:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid YouTube URL"
+        )
+    if request.deadline_ms is not None:
+        # a job has no caller waiting on it to answer within a budget
+        raise HTTPException(status_code=422, detail="deadline_ms is not supported for jobs")
+
+    params = {"video_id": video_id, **request.model_dump()}
+    cache_key = cache_service.generate_analysis_key(
+        video_id, request.max_comments, request.include_replies, request.sample_spec()
+    )
+    # nothing to queue when the analysis is already cached
+    cached = await cache_service.get(cache_key) is not None
+    job = await job_queue.enqueue(params, result_key=cache_key if cached else None)
+    return _status(job)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Status and progress of a queued analysis"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _status(job)
+
+
+@router.get(
+    "/jobs/{job_id}/result",
+    response_model=AnalysisResponse,
+    dependencies=[Depends(rate_limiter)]
+)
+async def get_job_result(job_id: str, http_request: Request):
+    """The analysis a finished job produced, shaped by the job's include_comments/fields"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+
+    request = job_request(job["params"])
+    key = job["result_key"] if request.wants_comments() else cache_service.summary_key(job["result_key"])
+    entry = await cache_service.get_entry(key)
+    if entry is None:
+        raise HTTPException(status_code=410, detail="Result has expired from the cache; submit the job again")
+    body, stale = entry
+    return await _send_body(
+        body,
+        http_request.headers.get("accept-encoding"),
+        cached=True,
+        stale=stale,
+        fields=request.fields,
+        timings=request.include_timings
+    )
+
+
+def _status(job: Dict) -> Dict:
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "video_id": job["params"]["video_id"],
+        "progress": job["progress"],
+        "stage": job["stage"],
+        "attempts": job["attempts"],
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "result_url": f"/api/v1/jobs/{job['id']}/result" if job["status"] == DONE else None
+    }
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import FileResponse
+from typing import Dict, List
+import asyncio
+from src.api.dependencies import require_admin, profile_store
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+async def list_profiles() -> List[Dict]:
+    """Saved request profiles, newest first."""
+    return await asyncio.to_thread(profile_store.list)
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str):
+    """
+    One profile, as collapsed stacks: feed it to flamegraph.pl, or open it
+    in speedscope.
+    """
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
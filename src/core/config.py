@@ -17,18 +17,83 @@ class Settings(BaseSettings):
     API_SERVICE_NAME: str = "youtube"
     API_VERSION: str = "v3"
     YOUTUBE_API_KEY: str | None = None
+    YOUTUBE_API_ENDPOINT: str | None = None    # e.g. the load-test mock: http://127.0.0.1:8081/
+    REPLY_FETCH_CONCURRENCY: int = 8     # workers of the replies pool, shared by all include_replies requests
 
     # Model Settings
     SENTIMENT_MODEL: str = "cardiffnlp/twitter-roberta-base-sentiment-latest"
     MAX_LENGTH: int = 512
     BATCH_SIZE: int = 32
 
+    # POST /api/v1/classify - texts per request, and micro-batching across concurrent requests
+    CLASSIFY_MAX_TEXTS: int = 1000
+    MICRO_BATCH_MAX_SIZE: int = 64
+    MICRO_BATCH_MAX_WAIT_MS: int = 5
+
+    # Thread pools per kind of blocking work; 0 sizes them from the core count
+    EXECUTOR_NETWORK_WORKERS: int = 0     # YouTube HTTP calls (default: 4 per core, up to 32)
+    EXECUTOR_CPU_WORKERS: int = 0         # cleaning, analytics, serialization (default: 1 per core)
+    EXECUTOR_INFERENCE_WORKERS: int = 0   # concurrent model calls (default: 1 per 4 cores)
+
+    # Analytics block
+    ANALYTICS_TOP_K: int = 5
+    ANALYTICS_TIME_BUCKET: str = "day"     # hour | day | week | month
+
+    # mode="sample" analyses - comments scored per round until the estimate converges
+    SAMPLE_BATCH_SIZE: int = 200     # also the smallest sample an estimate is made from
+
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
+    REDIS_MODE: str = "single"                # single | cluster | sharded
+    REDIS_SHARD_URLS: str = ""                # comma-separated nodes, for sharded
+    REDIS_SHARD_RETRY_SECONDS: int = 30       # a failed shard is skipped this long, then flushed on return
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: int = 5               # wait for a free pooled connection
+    REDIS_SOCKET_TIMEOUT: int = 10            # keep above WORKER_POLL_TIMEOUT (blocking BLMOVE)
+    REDIS_CONNECT_TIMEOUT: int = 2
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30     # PING idle connections before reuse
     CACHE_TTL: int = 3600
+    CACHE_STALE_TTL: int = 600        # served stale (and refreshed) after CACHE_TTL
+    L1_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    L1_CACHE_TTL: int = 30
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    CACHE_SERIALIZER: str = "json"          # json | msgpack (if installed)
+    CACHE_COMPRESSION: str = "zstd"         # zstd | zlib | none
+    CACHE_COMPRESSION_MIN_BYTES: int = 1024
+    CACHE_COMPRESSION_LEVEL: int = 3
+    CACHE_BODY_COMPRESSION: str = "gzip"    # gzip | zstd | zlib | none, for cached response bodies
+
+    # Response compression
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_LEVEL: int = 5
+
+    # Single-flight (one computation per analysis key across workers)
+    SINGLE_FLIGHT_LEASE_MS: int = 10000
+    SINGLE_FLIGHT_POLL_INTERVAL_MS: int = 250
+    SINGLE_FLIGHT_WAIT_TIMEOUT: int = 120
+
+    # Admission control for analyses that miss the cache, in comments (max_comments until fetched)
+    ADMISSION_MAX_ACTIVE_COMMENTS: int = 20000    # fetched and analyzed at once; 0 disables admission control
+    ADMISSION_MAX_QUEUED_COMMENTS: int = 100000   # waiting beyond this are refused with 503 + Retry-After
+    ADMISSION_AGING_SECONDS: float = 10.0         # small requests go first until a waiter is this old
+
+    # Background jobs (POST /api/v1/jobs, consumed by `python -m src.worker`)
+    JOB_QUEUE_KEY: str = "{jobs}:queue"        # the hash tag keeps all queue keys on one shard
+    JOB_TTL: int = 86400              # job records are kept this long
+    JOB_MAX_ATTEMPTS: int = 3
+    WORKER_HEARTBEAT_TTL: int = 30    # a worker silent this long is presumed dead
+    WORKER_POLL_TIMEOUT: int = 5
 
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 10
+    RATE_LIMIT_LOCAL_MAX_BYTES: int = 1024 * 1024   # in-process state for refused clients / Redis outages
+
+    # Admin endpoints and on-demand profiling (/admin/profiles); an empty token disables them
+    ADMIN_TOKEN: str = ""
+    PROFILE_SAMPLE_RATE: float = 0.0     # fraction of /api/v1/analyze requests profiled unasked
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 100
 
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -0,0 +1,120 @@
+"""
+Thread pools for the blocking work of the analysis pipeline, one per kind of
+work, instead of asyncio.to_thread's one shared default executor.
+
+    network    blocking YouTube HTTP calls
+    replies    comments().list calls a network worker fans out for include_replies
+    cpu        text cleaning, analytics, (de)serialization and compression
+    inference  sentiment model calls
+
+With a shared pool a quota stall parks every worker on YouTube sockets and
+inference queues behind it, or a 50k-comment model call holds the workers a
+cache hit needs to decompress its body. Separate pools degrade separately:
+a slow stage backs up its own queue, visible at /executors/stats and in
+executor_queue_depth{pool}, while the others keep their workers.
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+from src.core.config import get_settings
+from src.core.metrics import EXECUTOR_ACTIVE, EXECUTOR_QUEUE_DEPTH, EXECUTOR_WAIT_SECONDS
+
+settings = get_settings()
+T = TypeVar("T")
+
+
+def cpu_count() -> int:
+    """Cores this process may run on."""
+    count = getattr(os, "process_cpu_count", os.cpu_count)()
+    return count or 1
+
+
+class StageExecutor:
+    """
+    A fixed-size thread pool with asyncio.to_thread's interface: run() awaits
+    fn on a worker, with the caller's context variables (request timings).
+    """
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.wait_seconds = 0.0
+        self.busy_seconds = 0.0
+        self._wait_timer = EXECUTOR_WAIT_SECONDS.labels(name)
+        EXECUTOR_QUEUE_DEPTH.labels(name).set_function(lambda: self.queued)
+        EXECUTOR_ACTIVE.labels(name).set_function(lambda: self.active)
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # wrap_future passes the cancellation on; work not started yet never will be
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+            raise
+
+    def submit(self, fn: Callable[..., T], *args, **kwargs) -> Future:
+        """run() for callers on a worker thread of another pool, which cannot await."""
+        context = contextvars.copy_context()
+        submitted = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.wait_seconds += started - submitted
+            self._wait_timer.observe(started - submitted)
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self.busy_seconds += time.perf_counter() - started
+
+        with self._lock:
+            self.queued += 1
+        return self._pool.submit(call)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "active": self.active,
+                "queued": self.queued,
+                "completed": self.completed,
+                "avg_wait_ms": round(self.wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+                "busy_seconds": round(self.busy_seconds, 3),
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _size(configured: int, derived: int) -> int:
+    return configured if configured > 0 else max(1, derived)
+
+
+_cores = cpu_count()
+# network workers mostly wait on sockets; inference calls already use several cores each
+network = StageExecutor("network", _size(settings.EXECUTOR_NETWORK_WORKERS, min(32, _cores * 4)))
+cpu = StageExecutor("cpu", _size(settings.EXECUTOR_CPU_WORKERS, _cores))
+inference = StageExecutor("inference", _size(settings.EXECUTOR_INFERENCE_WORKERS, _cores // 4))
+# its own pool: network workers block on these calls, so they must not wait behind each other
+replies = StageExecutor("replies", _size(settings.REPLY_FETCH_CONCURRENCY, 1))
+POOLS = (network, cpu, inference, replies)
+
+
+def stats() -> Dict:
+    return {pool.name: pool.stats() for pool in POOLS}
@@ -0,0 +1,135 @@
+"""
+Sampling profiler for individual requests in a running deployment.
+
+A deterministic profiler (cProfile) hooks every call in the thread it runs
+in, which both slows the request down and misses the thread-pool workers.
+This one instead wakes every few milliseconds in its own thread and records
+the stack of every busy thread: the event loop and whichever workers are
+running a preprocessing, inference or serialization batch. The request
+itself runs untouched.
+
+Profiles are written in the collapsed-stack format that flamegraph.pl,
+speedscope and inferno read: one line per distinct stack,
+`thread;outer;...;inner <samples>`.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROFILE_SUFFIX = ".collapsed"
+PROFILE_NAME = re.compile(r"^[\w.-]+\.collapsed$")
+
+# innermost frames of threads that are parked, not working
+_IDLE = {
+    ("thread.py", "_worker"),        # executor worker waiting for a work item
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE
+
+
+class SamplingProfiler:
+    """Samples the stacks of busy threads every `interval` seconds between start() and stop()."""
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._start
+        return self.samples
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or _is_idle(frame):
+                    continue
+                stack: List[str] = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileStore:
+    """Profiles on disk, newest first, keeping at most `max_files`."""
+    def __init__(self, directory: str, max_files: int):
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def save(self, label: str, profiler: SamplingProfiler) -> str:
+        """Write a profile (blocking; call off the event loop). Returns its name."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        name = f"{stamp}-{re.sub(r'[^\w-]', '_', label)}{PROFILE_SUFFIX}"
+        (self.directory / name).write_text(profiler.collapsed())
+        for old in self.list()[self.max_files:]:
+            (self.directory / old["name"]).unlink(missing_ok=True)
+        return name
+
+    def list(self) -> List[Dict]:
+        if not self.directory.is_dir():
+            return []
+        profiles = []
+        for path in self.directory.glob(f"*{PROFILE_SUFFIX}"):
+            stat = path.stat()
+            profiles.append({"name": path.name, "bytes": stat.st_size, "created_at": stat.st_mtime})
+        return sorted(profiles, key=lambda p: p["name"], reverse=True)
+
+    def path(self, name: str) -> Optional[Path]:
+        """The file of a listed profile; None for anything else (including path tricks)."""
+        if not PROFILE_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+
+# every busy thread is sampled, so two profiles at once would each see the other's work
+_active = threading.Lock()
+
+
+def try_start(interval: float) -> Optional[SamplingProfiler]:
+    """A started profiler, or None if another request is being profiled."""
+    if not _active.acquire(blocking=False):
+        return None
+    profiler = SamplingProfiler(interval)
+    profiler.start()
+    return profiler
+
+
+def finish(profiler: SamplingProfiler) -> SamplingProfiler:
+    try:
+        profiler.stop()
+    finally:
+        _active.release()
+    return profiler
@@ -0,0 +1,74 @@
+import redis.asyncio as aioredis
+from redis.asyncio.cluster import RedisCluster
+from typing import Any, Dict
+from src.core.config import get_settings
+from src.core.sharding import ShardedRedis
+
+settings = get_settings()
+
+# one client, and so one set of connection pools, per process (and response mode)
+_clients: Dict[bool, Any] = {}
+
+
+def get_redis(decode_responses: bool = False) -> Any:
+    """
+    Shared Redis client for the cache, locks, rate limiting and jobs.
+
+    REDIS_MODE picks the topology:
+    - single:  one node at REDIS_URL
+    - cluster: Redis Cluster, discovered from REDIS_URL
+    - sharded: client-side consistent hashing over REDIS_SHARD_URLS
+    Keys carry {hash tags}, so related keys share a slot/shard in either
+    of the multi-node modes.
+    """
+    client = _clients.get(decode_responses)
+    if client is None:
+        if settings.REDIS_MODE == "cluster":
+            client = RedisCluster.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+                socket_keepalive=True,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+                decode_responses=decode_responses
+            )
+        elif settings.REDIS_MODE == "sharded":
+            urls = [url.strip() for url in settings.REDIS_SHARD_URLS.split(",") if url.strip()]
+            if not urls:
+                raise ValueError("REDIS_MODE=sharded needs REDIS_SHARD_URLS")
+            client = ShardedRedis(
+                {url: _single(url, decode_responses) for url in urls},
+                retry_after=settings.REDIS_SHARD_RETRY_SECONDS
+            )
+        elif settings.REDIS_MODE == "single":
+            client = _single(settings.REDIS_URL, decode_responses)
+        else:
+            raise ValueError(f"Unknown REDIS_MODE: {settings.REDIS_MODE}")
+        _clients[decode_responses] = client
+    return client
+
+
+def _single(url: str, decode_responses: bool) -> aioredis.Redis:
+    """
+    Client for one node. The pool is capped at REDIS_MAX_CONNECTIONS; under a
+    burst, callers wait up to REDIS_POOL_TIMEOUT for a free connection instead
+    of opening (and then dropping) extra ones.
+    """
+    pool = aioredis.BlockingConnectionPool.from_url(
+        url,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        decode_responses=decode_responses
+    )
+    return aioredis.Redis.from_pool(pool)
+
+
+async def close_redis():
+    """Disconnect the shared clients' pools; call once on shutdown."""
+    for client in _clients.values():
+        await client.aclose()
@@ -0,0 +1,278 @@
+import asyncio
+import bisect
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from redis.exceptions import ConnectionError, TimeoutError
+
+# failures that mean "this node is gone", as opposed to a bad command
+NODE_ERRORS = (ConnectionError, TimeoutError, OSError)
+
+
+def hash_tag(key: str) -> str:
+    """
+    The part of a key that decides its shard, by Redis Cluster's rule: the
+    text inside the first {...} if it is non-empty, else the whole key. So
+    analysis:{abc}:1000 and lock:analysis:{abc}:1000 always share a node.
+    """
+    start = key.find("{")
+    if start != -1:
+        end = key.find("}", start + 1)
+        if end > start + 1:
+            return key[start + 1:end]
+    return key
+
+
+def _point(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes. Adding or losing a node only
+    moves the keys that node owned (about 1/N of them).
+    """
+    def __init__(self, nodes: List[str], vnodes: int = 160):
+        self.nodes = list(nodes)
+        ring = sorted((_point(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._points = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    def nodes_for(self, key: str) -> List[str]:
+        """Every node, in the order a key falls back to them (its owner first)."""
+        start = bisect.bisect(self._points, _point(hash_tag(key))) % len(self._points)
+        order: List[str] = []
+        for i in range(len(self._points)):
+            node = self._owners[(start + i) % len(self._points)]
+            if node not in order:
+                order.append(node)
+                if len(order) == len(self.nodes):
+                    break
+        return order
+
+
+class ShardedRedis:
+    """
+    Client-side sharding over independent Redis nodes, for deployments
+    without Redis Cluster. Speaks the subset of the redis.asyncio API the
+    services use.
+
+    Keys are placed on a HashRing by hash tag. A node that fails is skipped
+    for `retry_after` seconds and its keys fall through to the next node on
+    the ring: for a cache that is a burst of misses, not an outage. Pub/sub
+    runs on one control node (the first reachable one, in order).
+
+    A node that comes back is flushed before it serves again. Whatever it
+    still holds predates the writes its keys took on the fallback node while
+    it was away, and reading it would serve those stale values (until their
+    TTL) instead of missing. The cost is a second burst of misses, and the
+    loss of any job records that lived only on that node.
+    """
+    def __init__(self, clients: Dict[str, Any], retry_after: float = 30):
+        self.clients = clients
+        self.ring = HashRing(list(clients))
+        self.retry_after = retry_after
+        self._down_until: Dict[str, float] = {}
+        self._flushes: Dict[str, asyncio.Future] = {}
+
+    # --- routing
+
+    def _healthy(self, node: str) -> bool:
+        return self._down_until.get(node, 0) <= time.monotonic()
+
+    def _mark_down(self, node: str, error: Exception):
+        print(f"Redis shard {node} unavailable for {self.retry_after}s: {error}")
+        self._down_until[node] = time.monotonic() + self.retry_after
+
+    async def _revive(self, node: str):
+        """Flush a node that was marked down before its first command since."""
+        if node not in self._down_until:
+            return
+        flush = self._flushes.get(node)
+        if flush is None:
+            flush = self._flushes[node] = asyncio.ensure_future(self._flush(node))
+        # every command that reaches the node meanwhile waits for the one flush
+        await asyncio.shield(flush)
+
+    async def _flush(self, node: str):
+        try:
+            await self.clients[node].flushdb()
+            self._down_until.pop(node, None)
+            print(f"Redis shard {node} is back; flushed its stale keys")
+        finally:
+            self._flushes.pop(node, None)
+
+    def _candidates(self, key: str) -> List[str]:
+        nodes = self.ring.nodes_for(key)
+        healthy = [node for node in nodes if self._healthy(node)]
+        # everything down: keep trying in ring order rather than giving up
+        return healthy or nodes
+
+    async def _call(self, key: str, command: str, *args, **kwargs):
+        error: Optional[Exception] = None
+        for node in self._candidates(key):
+            try:
+                await self._revive(node)
+                return await getattr(self.clients[node], command)(*args, **kwargs)
+            except NODE_ERRORS as e:
+                self._mark_down(node, e)
+                error = e
+        raise error
+
+    def node_for(self, key: str) -> str:
+        return self._candidates(key)[0]
+
+    # --- single-key commands
+
+    def __getattr__(self, command: str):
+        # get, set, hset, lpush, expire, incr, ... : the first argument is the key
+        async def call(key, *args, **kwargs):
+            return await self._call(key, command, key, *args, **kwargs)
+        return call
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args):
+        return await self._call(self._script_key(numkeys, keys_and_args), "eval", script, numkeys, *keys_and_args)
+
+    async def evalsha(self, sha: str, numkeys: int, *keys_and_args):
+        return await self._call(self._script_key(numkeys, keys_and_args), "evalsha", sha, numkeys, *keys_and_args)
+
+    @staticmethod
+    def _script_key(numkeys: int, keys_and_args: Tuple) -> str:
+        if not numkeys:
+            raise ValueError("Scripts on a sharded Redis need at least one key to route by")
+        return keys_and_args[0]
+
+    # --- multi-key commands, split by node
+
+    async def mget(self, keys: List[str]) -> List[Any]:
+        by_node: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            by_node.setdefault(self.node_for(key), []).append(i)
+
+        async def fetch(node: str, indices: List[int]):
+            try:
+                await self._revive(node)
+                return indices, await self.clients[node].mget([keys[i] for i in indices])
+            except NODE_ERRORS as e:
+                # treat the lost node's keys as misses; they land elsewhere from now on
+                self._mark_down(node, e)
+                return indices, [None] * len(indices)
+
+        values: List[Any] = [None] * len(keys)
+        for indices, results in await asyncio.gather(*(fetch(n, i) for n, i in by_node.items())):
+            for i, value in zip(indices, results):
+                values[i] = value
+        return values
+
+    async def delete(self, *keys: str) -> int:
+        return sum(await asyncio.gather(*(self._call(key, "delete", key) for key in keys)))
+
+    async def exists(self, *keys: str) -> int:
+        return sum(await asyncio.gather(*(self._call(key, "exists", key) for key in keys)))
+
+    async def _same_node(self, command: str, first: str, second: str, *args, **kwargs):
+        if hash_tag(first) != hash_tag(second):
+            raise ValueError(f"{command} keys must share a hash tag on a sharded Redis: {first}, {second}")
+        return await self._call(first, command, first, second, *args, **kwargs)
+
+    async def lmove(self, first_list: str, second_list: str, *args, **kwargs):
+        return await self._same_node("lmove", first_list, second_list, *args, **kwargs)
+
+    async def blmove(self, first_list: str, second_list: str, *args, **kwargs):
+        return await self._same_node("blmove", first_list, second_list, *args, **kwargs)
+
+    # --- node-wide commands
+
+    async def flushdb(self) -> bool:
+        results = await asyncio.gather(
+            *(client.flushdb() for client in self.clients.values()), return_exceptions=True
+        )
+        return all(result is True for result in results)
+
+    def _control(self) -> Any:
+        for node in self.clients:
+            if self._healthy(node):
+                return self.clients[node]
+        return next(iter(self.clients.values()))
+
+    async def publish(self, channel: str, message) -> int:
+        return await self._control().publish(channel, message)
+
+    def pubsub(self, **kwargs):
+        return self._control().pubsub(**kwargs)
+
+    def pipeline(self, transaction: bool = False) -> "ShardedPipeline":
+        if transaction:
+            raise ValueError("Transactions are not supported across shards")
+        return ShardedPipeline(self)
+
+    async def aclose(self):
+        for client in self.clients.values():
+            await client.aclose()
+
+
+class ShardedPipeline:
+    """
+    Queues commands, then sends one pipeline per node concurrently and
+    returns the results in the order the commands were queued.
+    """
+    def __init__(self, redis: ShardedRedis):
+        self.redis = redis
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._commands = []
+        return False
+
+    def __getattr__(self, command: str):
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def _node_for(self, command: str, args: tuple) -> Optional[str]:
+        if command == "publish":
+            return None     # control node
+        return self.redis.node_for(args[0])
+
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        groups: Dict[Optional[str], List[int]] = {}
+        for i, (command, args, _) in enumerate(self._commands):
+            groups.setdefault(self._node_for(command, args), []).append(i)
+
+        async def run(node: Optional[str], indices: List[int]):
+            client = self.redis._control() if node is None else self.redis.clients[node]
+            try:
+                if node is not None:
+                    await self.redis._revive(node)
+                async with client.pipeline(transaction=False) as pipe:
+                    for i in indices:
+                        command, args, kwargs = self._commands[i]
+                        getattr(pipe, command)(*args, **kwargs)
+                    return indices, await pipe.execute(raise_on_error=False)
+            except NODE_ERRORS as e:
+                if node is not None:
+                    self.redis._mark_down(node, e)
+                # replay one by one; each command fails over on its own
+                return indices, await asyncio.gather(
+                    *(self._replay(i) for i in indices), return_exceptions=True
+                )
+
+        results: List[Any] = [None] * len(self._commands)
+        for indices, values in await asyncio.gather(*(run(node, i) for node, i in groups.items())):
+            for i, value in zip(indices, values):
+                results[i] = value
+        self._commands = []
+
+        if raise_on_error:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+    async def _replay(self, i: int):
+        command, args, kwargs = self._commands[i]
+        return await getattr(self.redis, command)(*args, **kwargs)
@@ -0,0 +1,119 @@
+"""
+Per-request stage timings, for the Server-Timing header and the optional
+`timings` block of an analysis.
+
+Each request gets a RequestTimings in a context variable. Pipeline stages are
+timed with Stage, which feeds both the process-wide analysis_stage_seconds
+histogram and the current request's RequestTimings, if there is one. That
+reaches the services without threading an argument through them:
+asyncio tasks, asyncio.to_thread and the stage executors (src.core.executors)
+all copy context variables to the code they run.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from src.core.metrics import STAGE_SECONDS
+
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Time and call count per stage, plus notes such as which cache tier answered."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}     # stage -> [seconds, count]
+        self.notes: Dict[str, str] = {}
+        self._lock = threading.Lock()                # reply pages are timed from several threads
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def note(self, key: str, value: str):
+        """Record a fact about the request; the first value for a key wins."""
+        self.notes.setdefault(key, value)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            stages = {
+                stage: {"ms": round(seconds * 1000, 3), "count": count}
+                for stage, (seconds, count) in self.stages.items()
+            }
+        return {"total_ms": round(self.elapsed_ms(), 3), "stages": stages, **self.notes}
+
+    def server_timing(self) -> str:
+        """The Server-Timing header value: one metric per stage, then the notes and the total."""
+        with self._lock:
+            stages = list(self.stages.items())
+        parts = []
+        for stage, (seconds, count) in stages:
+            part = f"{stage};dur={seconds * 1000:.3f}"
+            if count > 1:
+                part += f';desc="{count} calls"'
+            parts.append(part)
+        parts.extend(f'{key};desc="{value}"' for key, value in self.notes.items())
+        parts.append(f"total;dur={self.elapsed_ms():.3f}")
+        return ", ".join(parts)
+
+
+def start_request() -> RequestTimings:
+    """Begin timing a request in the current context."""
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def note(key: str, value: str):
+    """RequestTimings.note() on the current request, if any."""
+    timings = _current.get()
+    if timings is not None:
+        timings.note(key, value)
+
+
+class _StageTimer:
+    __slots__ = ("_stage", "_start")
+
+    def __init__(self, stage: "Stage"):
+        self._stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._stage.record(time.perf_counter() - self._start)
+        return False
+
+
+class Stage:
+    """
+    A named pipeline stage.
+
+        CLEAN = Stage("clean")
+        with CLEAN.time():
+            ...
+    """
+    __slots__ = ("name", "_histogram")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._histogram = STAGE_SECONDS.labels(name)
+
+    def time(self) -> _StageTimer:
+        return _StageTimer(self)
+
+    def record(self, seconds: float):
+        self._histogram.observe(seconds)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(self.name, seconds)
@@ -1,8 +1,11 @@
 from transformers import pipeline
 from src.core.config import get_settings
+from src.core.metrics import MODEL_BATCH_SIZE
+from src.core.timing import Stage
 from typing import Dict
 
 settings = get_settings()
+inference_timer = Stage("inference_batch")
 
 
 class SentimentAnalyzer:
@@ -53,7 +56,14 @@ class SentimentAnalyzer:
                 for _ in texts
             ]
         
-        results = self.model(valid_texts)
+        # one model call per BATCH_SIZE texts, so batch sizes and timings are per batch
+        results = []
+        step = max(1, settings.BATCH_SIZE)
+        for start in range(0, len(valid_texts), step):
+            chunk = valid_texts[start:start + step]
+            MODEL_BATCH_SIZE.observe(len(chunk))
+            with inference_timer.time():
+                results.extend(self.model(chunk))
         output = [{"label": "neutral", "confidence": 0.0} for _ in texts]
 
         for valid_idx, result in zip(valid_indices, results):
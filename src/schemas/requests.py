@@ -1,10 +1,27 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ValidationInfo, field_validator
 from src.utils.validators import get_videoId
-from typing import Optional
+from src.schemas.responses import AnalysisResponse
+from src.core.config import get_settings
+from typing import Dict, List, Optional, Tuple
+
+settings = get_settings()
+
+# top-level response fields that can be selected; cached/source/stale always come back
+SELECTABLE_FIELDS = [
+    f for f in AnalysisResponse.model_fields if f not in ("cached", "source", "stale", "timings")
+]
 
 class AnalyzeRequest(BaseModel):
     video_url: str
     max_comments: Optional[int] = 1000
+    include_replies: bool = False
+    include_comments: bool = True
+    fields: Optional[List[str]] = None
+    include_timings: bool = False     # per-stage breakdown in the body (always in Server-Timing)
+    deadline_ms: Optional[int] = None  # answer within this budget, over as many comments as fit
+    mode: str = "full"                 # full | sample: estimate the distribution from a random sample
+    margin_of_error: float = 2.0       # mode="sample": percentage points, at confidence_level
+    confidence_level: float = 0.95
     
     @field_validator("video_url")
     @classmethod
@@ -24,4 +41,81 @@ class AnalyzeRequest(BaseModel):
                 raise ValueError('max_comments must be at least 1')
             if v > 50000:
                 raise ValueError('max_comments cannot exceed 50000')
-        return v
\ No newline at end of file
+        return v
+
+    @field_validator("deadline_ms")
+    @classmethod
+    def validate_deadline_ms(cls, v: Optional[int], info: ValidationInfo) -> Optional[int]:
+        """A sensible budget, and top-level comments only (replies are not paged incrementally)"""
+        if v is not None:
+            if v < 100 or v > 600000:
+                raise ValueError("deadline_ms must be between 100 and 600000")
+            if info.data.get("include_replies"):
+                raise ValueError("deadline_ms cannot be combined with include_replies")
+        return v
+
+    @field_validator("mode")
+    @classmethod
+    def validate_mode(cls, v: str, info: ValidationInfo) -> str:
+        """full or sample; a sample is drawn from every comment, so it has no deadline"""
+        if v not in ("full", "sample"):
+            raise ValueError("mode must be 'full' or 'sample'")
+        if v == "sample" and info.data.get("deadline_ms") is not None:
+            raise ValueError("mode 'sample' cannot be combined with deadline_ms")
+        return v
+
+    @field_validator("margin_of_error")
+    @classmethod
+    def validate_margin_of_error(cls, v: float) -> float:
+        if v < 0.5 or v > 25:
+            raise ValueError("margin_of_error must be between 0.5 and 25 percentage points")
+        return v
+
+    @field_validator("confidence_level")
+    @classmethod
+    def validate_confidence_level(cls, v: float) -> float:
+        if v < 0.8 or v >= 1:
+            raise ValueError("confidence_level must be at least 0.8 and below 1")
+        return v
+
+    @field_validator("fields")
+    @classmethod
+    def validate_fields(cls, v: Optional[List[str]]) -> Optional[List[str]]:
+        """Only allow known top-level response fields"""
+        if v is not None:
+            unknown = [f for f in v if f not in SELECTABLE_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return v
+
+    def wants_comments(self) -> bool:
+        """Whether the per-comment list is part of the response"""
+        return self.include_comments and (self.fields is None or "comments" in self.fields)
+
+    def sample_spec(self) -> Optional[Tuple[float, float]]:
+        """(margin_of_error, confidence_level) for mode="sample", else None"""
+        if self.mode != "sample":
+            return None
+        return self.margin_of_error, self.confidence_level
+
+
+def job_request(params: Dict) -> AnalyzeRequest:
+    """
+    The AnalyzeRequest a job was queued with. Fields added since the job was
+    stored take their defaults; extra params (video_id) are ignored.
+    """
+    return AnalyzeRequest.model_validate(params)
+
+
+class ClassifyRequest(BaseModel):
+    texts: List[str]
+
+    @field_validator("texts")
+    @classmethod
+    def validate_texts(cls, v: List[str]) -> List[str]:
+        """Between 1 and CLASSIFY_MAX_TEXTS texts"""
+        if not v:
+            raise ValueError("texts must not be empty")
+        if len(v) > settings.CLASSIFY_MAX_TEXTS:
+            raise ValueError(f"texts cannot have more than {settings.CLASSIFY_MAX_TEXTS} items")
+        return v
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 
 class CommentResult(BaseModel):
     author: str
@@ -10,6 +10,8 @@ class CommentResult(BaseModel):
     updated_at: str
     sentiment: str
     confidence: float
+    comment_id: Optional[str] = None
+    parent_id: Optional[str] = None
 
 
 class SentimentDistribution(BaseModel):
@@ -18,6 +20,73 @@ class SentimentDistribution(BaseModel):
     neutral: float
 
 
+class TimeBucket(BaseModel):
+    start: str
+    positive: int
+    negative: int
+    neutral: int
+
+
+class SentimentOverTime(BaseModel):
+    bucket: str
+    buckets: List[TimeBucket]
+
+
+class ConfidenceHistogram(BaseModel):
+    edges: List[float]
+    counts: List[int]
+
+
+class TopComment(BaseModel):
+    comment_id: Optional[str] = None
+    author: str
+    text: str
+    like_count: int
+    confidence: float
+
+
+class Analytics(BaseModel):
+    weighted_distribution: SentimentDistribution     # weighted by 1 + like_count
+    sentiment_over_time: SentimentOverTime
+    confidence_histogram: ConfidenceHistogram
+    top_positive: List[TopComment]
+    top_negative: List[TopComment]
+
+
+class StageTiming(BaseModel):
+    ms: float
+    count: int
+
+
+class Timings(BaseModel):
+    total_ms: float                  # up to when the body was built
+    stages: Dict[str, StageTiming]   # rate_limit, cache_get, youtube_page, inference_batch, ...
+    cache: Optional[str] = None      # l1 | l2 | miss: where the first lookup was answered
+
+
+class Coverage(BaseModel):
+    comments: int            # analyzed so far, including earlier calls this one extended
+    max_comments: int
+    ratio: float             # comments / max_comments
+    pages: int
+    resumed_from: int        # comments carried over from an earlier partial result
+
+
+class Interval(BaseModel):
+    low: float
+    high: float
+
+
+class SampleEstimate(BaseModel):
+    sampled: int             # comments the model scored
+    population: int          # valid comments the sample was drawn from
+    margin_of_error: float   # requested, in percentage points
+    confidence_level: float
+    exact: bool              # every valid comment was scored before the estimate converged
+    sentiment_intervals: Dict[str, Interval]     # per sentiment, in percent like sentiment_distribution
+    average_confidence_interval: Interval
+
+
 class AnalysisResponse(BaseModel):
     video_id: str
     total_comments: int
@@ -25,7 +94,45 @@ class AnalysisResponse(BaseModel):
     sentiment_distribution: SentimentDistribution
     overall_sentiment: str
     average_confidence: float
-    comments: List[CommentResult]
+    analytics: Optional[Analytics] = None    # absent from analyses cached before it existed
+    comments: Optional[List[CommentResult]] = None   # omitted for summary requests
+    complete: bool = True    # false when deadline_ms cut the analysis short
+    coverage: Optional[Coverage] = None      # only with deadline_ms
+    sample: Optional[SampleEstimate] = None  # only with mode="sample"; the distribution is then an estimate
     processing_time_ms: int
+    timings: Optional[Timings] = None    # only with include_timings
     cached: bool = False
-    source: str
\ No newline at end of file
+    source: str
+    stale: bool = False
+
+
+class CommentPage(BaseModel):
+    video_id: str
+    total: int               # comments matching the filters
+    limit: int
+    comments: List[CommentResult]
+    next_cursor: Optional[str] = None
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str              # queued | running | done | failed
+    video_id: str
+    progress: float          # 0.0 - 1.0
+    stage: str
+    attempts: int
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result_url: Optional[str] = None
+
+
+class ClassifyResult(BaseModel):
+    sentiment: str
+    confidence: float        # 0.0 when the cleaned text was too short to classify
+
+
+class ClassifyResponse(BaseModel):
+    results: List[ClassifyResult]   # in input order
+    processing_time_ms: int
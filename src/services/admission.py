@@ -0,0 +1,176 @@
+import asyncio
+import itertools
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional, Tuple
+from src.core.metrics import ADMISSION_COMMENTS, ADMISSION_REJECTED
+from src.core.timing import Stage
+
+wait_timer = Stage("admission_wait")
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing work the controller has no room for."""
+    def __init__(self, retry_after: int):
+        super().__init__(f"Server overloaded, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Waiter:
+    cost: int
+    seq: int
+    since: float
+    future: asyncio.Future = field(repr=False)
+
+
+class AdmissionController:
+    """
+    Bounds the analysis work a process takes on, measured in comments.
+
+    Up to `max_active` comments are fetched and analyzed at once; requests
+    beyond that wait, and once `max_queued` comments are waiting, new
+    requests are refused with Overloaded rather than piling up unbounded
+    work (and memory) behind the ones already running. Waiters are let in
+    smallest first, so a 50k-comment request does not hold up a burst of
+    small ones, until one has waited `aging_seconds`: from then on it goes
+    next, so a big request is delayed but never starved.
+
+    A cost above `max_active` is treated as `max_active` (the request runs
+    alone). max_active=0 disables the controller.
+    """
+    RATE_WINDOW = 60.0          # seconds of completed work the drain rate is measured over
+    DEFAULT_RETRY_AFTER = 5     # before anything has completed
+    MAX_RETRY_AFTER = 120
+
+    def __init__(self, max_active: int, max_queued: int, aging_seconds: float = 10.0):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.aging_seconds = aging_seconds
+        self.active = 0
+        self.queued = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._completed: Deque[Tuple[float, int]] = deque()
+        self.admitted = 0
+        self.rejected = 0
+
+    def slot(self, cost: int) -> "Slot":
+        """`async with controller.slot(n):` holds room for n comments, waiting or raising Overloaded."""
+        return Slot(self, cost)
+
+    async def _acquire(self, cost: int) -> int:
+        cost = min(cost or self.max_active, self.max_active)
+        if not self._waiters and self.active + cost <= self.max_active:
+            self._grant(cost)
+            return cost
+        if self.queued + cost > self.max_queued:
+            self.rejected += 1
+            ADMISSION_REJECTED.inc()
+            raise Overloaded(self.retry_after(cost))
+
+        waiter = _Waiter(cost, next(self._seq), time.monotonic(), asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._set_queued(self.queued + cost)
+        self._dispatch()     # it may fit beside a big waiter that does not
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(cost, completed=False)     # granted just as we were cancelled
+            else:
+                self._waiters.remove(waiter)
+                self._set_queued(self.queued - cost)
+                self._dispatch()
+            raise
+        return cost
+
+    def _grant(self, cost: int):
+        self.admitted += 1
+        self.active += cost
+        ADMISSION_COMMENTS.labels("active").inc(cost)
+
+    def _release(self, cost: int, completed: bool = True):
+        self.active -= cost
+        ADMISSION_COMMENTS.labels("active").dec(cost)
+        if completed:
+            self._completed.append((time.monotonic(), cost))
+        self._dispatch()
+
+    def _set_queued(self, queued: int):
+        ADMISSION_COMMENTS.labels("queued").inc(queued - self.queued)
+        self.queued = queued
+
+    def _next_waiter(self) -> _Waiter:
+        oldest = min(self._waiters, key=lambda w: w.seq)
+        if time.monotonic() - oldest.since >= self.aging_seconds:
+            return oldest
+        return min(self._waiters, key=lambda w: (w.cost, w.seq))
+
+    def _dispatch(self):
+        """Let waiters in, in priority order, while the next one fits."""
+        while self._waiters:
+            waiter = self._next_waiter()
+            if self.active + waiter.cost > self.max_active:
+                return
+            self._waiters.remove(waiter)
+            self._set_queued(self.queued - waiter.cost)
+            self._grant(waiter.cost)
+            waiter.future.set_result(None)
+
+    def drain_rate(self) -> Optional[float]:
+        """Comments completed per second over the last RATE_WINDOW seconds; None before any completed."""
+        now = time.monotonic()
+        while self._completed and now - self._completed[0][0] > self.RATE_WINDOW:
+            self._completed.popleft()
+        if not self._completed:
+            return None
+        elapsed = max(now - self._completed[0][0], 1.0)
+        return sum(cost for _, cost in self._completed) / elapsed
+
+    def retry_after(self, cost: int) -> int:
+        """Seconds until the work ahead of a `cost`-comment request would have drained."""
+        rate = self.drain_rate()
+        if not rate:
+            return self.DEFAULT_RETRY_AFTER
+        backlog = self.active + self.queued + cost - self.max_active
+        return min(max(1, math.ceil(backlog / rate)), self.MAX_RETRY_AFTER)
+
+    def stats(self) -> dict:
+        rate = self.drain_rate()
+        return {
+            "active_comments": self.active,
+            "queued_comments": self.queued,
+            "waiting_requests": len(self._waiters),
+            "max_active_comments": self.max_active,
+            "max_queued_comments": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "drain_rate": round(rate, 1) if rate else 0.0
+        }
+
+
+class Slot:
+    """Room for a request's comments; resize() once the real count is known."""
+    def __init__(self, controller: AdmissionController, cost: int):
+        self.controller = controller
+        self.cost = cost
+
+    async def __aenter__(self) -> "Slot":
+        if self.controller.max_active > 0:
+            with wait_timer.time():
+                self.cost = await self.controller._acquire(self.cost)
+        return self
+
+    def resize(self, cost: int):
+        """Give back what a request reserved but turned out not to need (it never grows)."""
+        if self.controller.max_active > 0 and cost < self.cost:
+            self.controller._release(self.cost - cost, completed=False)
+            self.cost = cost
+
+    async def __aexit__(self, *exc):
+        if self.controller.max_active > 0:
+            self.controller._release(self.cost)
+        return False
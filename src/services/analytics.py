@@ -0,0 +1,169 @@
+import heapq
+from typing import Dict, List
+import numpy as np
+
+SENTIMENTS = ("positive", "negative", "neutral")
+CONFIDENCE_BINS = 10
+
+# time bucket name -> numpy datetime64 unit
+TIME_UNITS = {"hour": "h", "day": "D", "week": "W", "month": "M"}
+# datetime64[W] counts weeks from 1970-01-01, a Thursday; shifting by 3 days starts them on Monday
+WEEK_SHIFT = np.timedelta64(3, "D")
+
+
+def _columns(comments: List[Dict]) -> Dict[str, np.ndarray]:
+    """Pull the fields the aggregates need into columnar arrays."""
+    codes = {s: i for i, s in enumerate(SENTIMENTS)}
+    sentiment = np.fromiter(
+        (codes.get(c.get("sentiment"), 2) for c in comments), dtype=np.int8, count=len(comments)
+    )
+    likes = np.fromiter((c.get("like_count") or 0 for c in comments), dtype=np.int64, count=len(comments))
+    confidence = np.fromiter((c.get("confidence") or 0.0 for c in comments), dtype=np.float64, count=len(comments))
+    # YouTube timestamps are UTC ("...Z"); drop the suffix so numpy parses them as naive
+    stamps = [(c.get("published_at") or "")[:19] or "NaT" for c in comments]
+    try:
+        published = np.array(stamps, dtype="datetime64[s]")
+    except ValueError:
+        published = np.array([_parse_stamp(s) for s in stamps], dtype="datetime64[s]")
+    return {"sentiment": sentiment, "likes": likes, "confidence": confidence, "published": published}
+
+
+def _parse_stamp(stamp: str) -> np.datetime64:
+    try:
+        return np.datetime64(stamp, "s")
+    except ValueError:
+        return np.datetime64("NaT", "s")
+
+
+def _percentages(weights: np.ndarray) -> Dict[str, float]:
+    total = weights.sum()
+    if total == 0:
+        return {s: 0.0 for s in SENTIMENTS}
+    return {s: round(float(w / total * 100), 2) for s, w in zip(SENTIMENTS, weights)}
+
+
+def _over_time(sentiment: np.ndarray, published: np.ndarray, bucket: str) -> List[Dict]:
+    known = ~np.isnat(published)
+    if not known.any():
+        return []
+    shift = WEEK_SHIFT if bucket == "week" else np.timedelta64(0, "D")
+    buckets = (published[known] + shift).astype(f"datetime64[{TIME_UNITS[bucket]}]")
+    starts, index = np.unique(buckets, return_inverse=True)
+    starts = starts.astype("datetime64[s]") - shift
+    # one bincount over (bucket, sentiment) pairs instead of a loop per bucket
+    counts = np.bincount(
+        index * len(SENTIMENTS) + sentiment[known], minlength=len(starts) * len(SENTIMENTS)
+    ).reshape(len(starts), len(SENTIMENTS))
+    return [
+        {"start": str(start), **{s: int(n) for s, n in zip(SENTIMENTS, row)}}
+        for start, row in zip(starts, counts)
+    ]
+
+
+def _top_liked(comments: List[Dict], likes: np.ndarray, mask: np.ndarray, k: int) -> List[Dict]:
+    # heap selection: O(n log k) rather than sorting every matching comment
+    indices = np.flatnonzero(mask).tolist()
+    top = heapq.nlargest(k, indices, key=likes.__getitem__)
+    return [
+        {
+            "comment_id": comments[i].get("comment_id"),
+            "author": comments[i].get("author", ""),
+            "text": comments[i].get("text", ""),
+            "like_count": int(likes[i]),
+            "confidence": comments[i].get("confidence", 0.0),
+        }
+        for i in top
+    ]
+
+
+def compute_analytics(comments: List[Dict], top_k: int = 5, time_bucket: str = "day") -> Dict:
+    """
+    Aggregates over analyzed comments, computed in one pass over columnar arrays.
+
+    - weighted_distribution: sentiment percentages with each comment weighted
+      by 1 + like_count, so heavily liked comments count for more
+    - sentiment_over_time: sentiment counts per time_bucket of published_at
+    - confidence_histogram: counts over CONFIDENCE_BINS equal-width bins of
+      [0, 1], for comments the model scored
+    - top_positive / top_negative: the top_k most liked comments of each
+    """
+    if time_bucket not in TIME_UNITS:
+        raise ValueError(f"Unknown time bucket: {time_bucket}")
+    if not comments:
+        return empty_analytics(time_bucket)
+
+    columns = _columns(comments)
+    sentiment, likes, confidence = columns["sentiment"], columns["likes"], columns["confidence"]
+
+    weighted = np.bincount(sentiment, weights=likes + 1, minlength=len(SENTIMENTS))
+    scored = confidence[confidence > 0.0]
+    histogram, edges = np.histogram(scored, bins=CONFIDENCE_BINS, range=(0.0, 1.0))
+
+    return {
+        "weighted_distribution": _percentages(weighted),
+        "sentiment_over_time": {
+            "bucket": time_bucket,
+            "buckets": _over_time(sentiment, columns["published"], time_bucket),
+        },
+        "confidence_histogram": {
+            "edges": [round(float(e), 2) for e in edges],
+            "counts": histogram.tolist(),
+        },
+        "top_positive": _top_liked(comments, likes, sentiment == 0, top_k),
+        "top_negative": _top_liked(comments, likes, sentiment == 1, top_k),
+    }
+
+
+def empty_analytics(time_bucket: str = "day") -> Dict:
+    return {
+        "weighted_distribution": {s: 0.0 for s in SENTIMENTS},
+        "sentiment_over_time": {"bucket": time_bucket, "buckets": []},
+        "confidence_histogram": {
+            "edges": [round(i / CONFIDENCE_BINS, 2) for i in range(CONFIDENCE_BINS + 1)],
+            "counts": [0] * CONFIDENCE_BINS,
+        },
+        "top_positive": [],
+        "top_negative": [],
+    }
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    def sample(n: int) -> List[Dict]:
+        return [
+            {
+                "comment_id": f"c{i}",
+                "author": f"User{i}",
+                "text": "comment",
+                "like_count": random.randint(0, 5000),
+                "published_at": f"2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}T12:00:00Z",
+                "sentiment": random.choice(SENTIMENTS),
+                "confidence": round(random.random(), 4),
+            }
+            for i in range(n)
+        ]
+
+    def naive(comments: List[Dict], top_k: int = 5) -> Dict:
+        # what a client had to do with the full comment list
+        by_day: Dict[str, Dict[str, int]] = {}
+        for c in comments:
+            day = by_day.setdefault(c["published_at"][:10], {s: 0 for s in SENTIMENTS})
+            day[c["sentiment"]] += 1
+        ranked = sorted(comments, key=lambda c: c["like_count"], reverse=True)
+        return {
+            "buckets": by_day,
+            "top_positive": [c for c in ranked if c["sentiment"] == "positive"][:top_k],
+            "top_negative": [c for c in ranked if c["sentiment"] == "negative"][:top_k],
+        }
+
+    for n in (1000, 10000, 50000):
+        comments = sample(n)
+        start = time.perf_counter()
+        compute_analytics(comments)
+        fast_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        naive(comments)
+        naive_ms = (time.perf_counter() - start) * 1000
+        print(f"{n:>6} comments: analytics {fast_ms:.1f} ms, naive loop + sort {naive_ms:.1f} ms")
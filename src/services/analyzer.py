@@ -1,9 +1,18 @@
 from src.models.sentiment import SentimentAnalyzer
 from src.models.preprocessing import TextProcessor
-from typing import List, Dict
-import asyncio
+from src.services.analytics import compute_analytics, empty_analytics
+from src.services.sampling import SentimentEstimate, sample_order
+from src.core.config import get_settings
+from src.core import executors
+from src.core.metrics import COMMENTS_NOT_SCORED, COMMENTS_PROCESSED, INFERENCE_QUEUE_DEPTH
+from src.core.timing import Stage
+from typing import List, Dict, Tuple
 import time
 
+settings = get_settings()
+clean_timer = Stage("clean")
+aggregate_timer = Stage("aggregate")
+
 class AnalyzerService:
     """Orchestrates the comment analysis pipeline"""
     def __init__(self):
@@ -16,60 +25,148 @@ class AnalyzerService:
         
         if not comments:
             return self._empty_response(video_id)
-        
-        texts = [comment.get("text", "") for comment in comments]
-        cleaned_texts = [self.preprocessor.clean(text) for text in texts]
 
-        valid_texts = []
-        valid_indices = []
-        
-        for i, cleaned in enumerate(cleaned_texts):
-            if self.preprocessor.is_valid(cleaned):
-                valid_texts.append(cleaned)
-                valid_indices.append(i)
-                
-        if valid_texts:
-            sentiments = await asyncio.to_thread(
-                self.analyzer.analyze_batch, valid_texts
-            )
-        else:
-            sentiments = []
+        enriched_comments, valid_count = await self.enrich(comments)
+        return await self.summarize(video_id, enriched_comments, valid_count, start_time)
 
-        enriched_comments = []
-        sentiment_idx = 0
+    async def enrich(self, comments: List[Dict]) -> Tuple[List[Dict], int]:
+        """Clean and score comments; returns them with cleaned_text, sentiment and confidence, and how many were valid."""
+        COMMENTS_PROCESSED.inc(len(comments))
+        cleaned_texts, valid_texts, valid_indices = await executors.cpu.run(self._clean, comments)
 
-        for i, comment in enumerate(comments):
-            enriched = comment.copy()
-            enriched["cleaned_text"] = cleaned_texts[i]
+        sentiments = await self._infer(valid_texts)
+
+        with aggregate_timer.time():
+            enriched_comments = []
+            sentiment_idx = 0
+
+            for i, comment in enumerate(comments):
+                enriched = comment.copy()
+                enriched["cleaned_text"] = cleaned_texts[i]
 
-            if i in valid_indices and sentiment_idx < len(sentiments):
-                enriched["sentiment"] = sentiments[sentiment_idx]["label"]
-                enriched["confidence"] = sentiments[sentiment_idx]["confidence"]
-                sentiment_idx += 1
-            else:
-                enriched["sentiment"] = "neutral"
-                enriched["confidence"] = 0.0
+                if i in valid_indices and sentiment_idx < len(sentiments):
+                    enriched["sentiment"] = sentiments[sentiment_idx]["label"]
+                    enriched["confidence"] = sentiments[sentiment_idx]["confidence"]
+                    sentiment_idx += 1
+                else:
+                    enriched["sentiment"] = "neutral"
+                    enriched["confidence"] = 0.0
 
-            enriched_comments.append(enriched)
+                enriched_comments.append(enriched)
+        return enriched_comments, len(valid_texts)
 
-        distribution = self._calculate_distribution(enriched_comments)
-        overall = self._get_overall_sentiment(distribution)
-        avg_confidence = self._calculate_avg_confidence(enriched_comments)
-        valid_count = len(valid_texts)
+    async def summarize(self, video_id: str, enriched_comments: List[Dict], valid_count: int, start_time: float) -> Dict:
+        """The analysis result for comments enrich() has scored."""
+        with aggregate_timer.time():
+            distribution = self._calculate_distribution(enriched_comments)
+            overall = self._get_overall_sentiment(distribution)
+            avg_confidence = self._calculate_avg_confidence(enriched_comments)
+            analytics = await executors.cpu.run(
+                compute_analytics,
+                enriched_comments,
+                settings.ANALYTICS_TOP_K,
+                settings.ANALYTICS_TIME_BUCKET
+            )
         
         processing_time_ms = int((time.time() - start_time) * 1000)
 
         return {
             "video_id": video_id,
-            "total_comments": len(comments),
+            "total_comments": len(enriched_comments),
             "valid_comments": valid_count,
             "sentiment_distribution": distribution,
             "overall_sentiment": overall,
             "average_confidence": avg_confidence,
+            "analytics": analytics,
             "comments": enriched_comments,
             "processing_time_ms": processing_time_ms
         }
     
+    async def estimate_comments(self, video_id: str, comments: List[Dict], margin: float,
+                                confidence_level: float = 0.95) -> Dict:
+        """
+        clean → score a random sample → estimate, instead of scoring every comment.
+
+        Valid comments are scored SAMPLE_BATCH_SIZE at a time, in a random order
+        seeded by the video id, until every sentiment percentage is known to
+        within `margin` percentage points. The distribution and average
+        confidence are estimates with confidence intervals (the "sample" block);
+        total/valid counts are exact, and the comments and analytics are the
+        scored sample's.
+        """
+        start_time = time.time()
+
+        if not comments:
+            return self._empty_response(video_id)
+
+        COMMENTS_PROCESSED.inc(len(comments))
+        cleaned_texts, valid_texts, valid_indices = await executors.cpu.run(self._clean, comments)
+        estimate = SentimentEstimate(len(comments), len(valid_texts), confidence_level)
+        order = sample_order(len(valid_texts), video_id)
+
+        scored = {}
+        batch_size = max(1, settings.SAMPLE_BATCH_SIZE)
+        while not estimate.converged(margin):
+            batch = order[estimate.sampled:estimate.sampled + batch_size]
+            sentiments = await self._infer([valid_texts[j] for j in batch])
+            estimate.add(sentiments)
+            scored.update(zip(batch, sentiments))
+        COMMENTS_NOT_SCORED.inc(len(valid_texts) - estimate.sampled)
+
+        sample = []
+        for j in sorted(scored):
+            i = valid_indices[j]
+            enriched = comments[i].copy()
+            enriched["cleaned_text"] = cleaned_texts[i]
+            enriched["sentiment"] = scored[j]["label"]
+            enriched["confidence"] = scored[j]["confidence"]
+            sample.append(enriched)
+
+        result = await self.summarize(video_id, sample, len(sample), start_time)
+        distribution = estimate.distribution()
+        average_confidence, confidence_interval = estimate.average_confidence()
+        result.update({
+            "total_comments": len(comments),
+            "valid_comments": len(valid_texts),
+            "sentiment_distribution": distribution,
+            "overall_sentiment": self._get_overall_sentiment(distribution),
+            "average_confidence": average_confidence,
+            "sample": {
+                "sampled": estimate.sampled,
+                "population": len(valid_texts),
+                "margin_of_error": margin,
+                "confidence_level": confidence_level,
+                "exact": estimate.exact,
+                "sentiment_intervals": estimate.intervals(),
+                "average_confidence_interval": confidence_interval
+            }
+        })
+        return result
+
+    async def _infer(self, texts: List[str]) -> List[Dict]:
+        """Score texts on the inference pool."""
+        if not texts:
+            return []
+        INFERENCE_QUEUE_DEPTH.inc(len(texts))
+        try:
+            return await executors.inference.run(self.analyzer.analyze_batch, texts)
+        finally:
+            INFERENCE_QUEUE_DEPTH.dec(len(texts))
+
+    def _clean(self, comments: List[Dict]) -> Tuple[List[str], List[str], List[int]]:
+        """Cleaned text of every comment, plus the valid ones and their indices."""
+        with clean_timer.time():
+            cleaned_texts = [self.preprocessor.clean(comment.get("text", "")) for comment in comments]
+
+            valid_texts = []
+            valid_indices = []
+
+            for i, cleaned in enumerate(cleaned_texts):
+                if self.preprocessor.is_valid(cleaned):
+                    valid_texts.append(cleaned)
+                    valid_indices.append(i)
+        return cleaned_texts, valid_texts, valid_indices
+
     def _calculate_distribution(self, comments: List[Dict]) -> Dict:
         total = len(comments)
         if total == 0:
@@ -116,6 +213,7 @@ class AnalyzerService:
             },
             "overall_sentiment": "neutral",
             "average_confidence": 0.0,
+            "analytics": empty_analytics(settings.ANALYTICS_TIME_BUCKET),
             "comments": [],
             "processing_time_ms": 0
         }
\ No newline at end of file
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from src.services.youtube import YouTubeService
+from src.services.analyzer import AnalyzerService
+
+PAGE_MAX = 100
+
+
+def new_state() -> Dict:
+    """Progress of a deadline-bounded analysis, as cached between calls."""
+    return {"comments": [], "valid": 0, "next_page_token": None, "pages": 0, "complete": False}
+
+
+class CostModel:
+    """
+    What the pipeline has been measured to cost, as moving averages: one
+    YouTube page, cleaning and scoring one comment, and finishing (aggregating
+    and serializing) one comment. Starts from rough guesses, which the first
+    measurement of each replaces outright.
+    """
+    HEADROOM = 1.25    # estimates are averages; leave room for a slower than average page
+
+    def __init__(self, page_seconds: float = 0.3, enrich_seconds: float = 0.002,
+                 finish_seconds: float = 0.00005, alpha: float = 0.2):
+        self.page_seconds = page_seconds
+        self.enrich_seconds = enrich_seconds      # per comment
+        self.finish_seconds = finish_seconds      # per comment
+        self.alpha = alpha
+        self._measured = set()
+
+    def _update(self, name: str, observed: float):
+        current = getattr(self, name)
+        if name not in self._measured:
+            self._measured.add(name)
+            current = observed
+        setattr(self, name, current + self.alpha * (observed - current))
+
+    def observe_page(self, seconds: float):
+        self._update("page_seconds", seconds)
+
+    def observe_enrich(self, seconds: float, comments: int):
+        if comments:
+            self._update("enrich_seconds", seconds / comments)
+
+    def observe_finish(self, seconds: float, comments: int):
+        if comments:
+            self._update("finish_seconds", seconds / comments)
+
+    def next_page(self, page_size: int, total_after: int) -> float:
+        """Seconds to fetch and score one more page, then finish with `total_after` comments."""
+        return self.HEADROOM * (
+            self.page_seconds + page_size * self.enrich_seconds + total_after * self.finish_seconds
+        )
+
+
+class AnytimeAnalyzer:
+    """
+    Fetches and scores comments a page at a time until a deadline, instead of
+    all max_comments at once: huge videos get an answer in bounded time, over
+    the comments that fit.
+
+    Before each page it checks, with the CostModel, that fetching and scoring
+    the page and then finishing the response still fits before the deadline,
+    and a page fetch that runs past it is abandoned. The first page of an
+    analysis is always fetched, whatever the budget, so there is something
+    to answer with. Progress is a state dict (see new_state()) that the next
+    call can carry on from.
+    """
+    def __init__(self, youtube: YouTubeService, analyzer: AnalyzerService, costs: Optional[CostModel] = None):
+        self.youtube = youtube
+        self.analyzer = analyzer
+        self.costs = costs or CostModel()
+
+    async def extend(self, video_id: str, max_comments: int, state: Dict, deadline: float) -> Dict:
+        """Carry `state` on until the deadline (time.monotonic()) or completion; returns the new state."""
+        comments = state["comments"]
+        valid = state["valid"]
+        token = state["next_page_token"]
+        pages = state["pages"]
+
+        while len(comments) < max_comments:
+            page_size = min(PAGE_MAX, max_comments - len(comments))
+            remaining = deadline - time.monotonic()
+            if comments and remaining < self.costs.next_page(page_size, len(comments) + page_size):
+                break
+
+            started = time.monotonic()
+            fetch = self.youtube.get_comment_page(video_id, page_size, token)
+            if comments:
+                try:
+                    page = await asyncio.wait_for(fetch, timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                page = await fetch
+            self.costs.observe_page(time.monotonic() - started)
+
+            started = time.monotonic()
+            enriched, page_valid = await self.analyzer.enrich(page["comments"]) if page["comments"] else ([], 0)
+            self.costs.observe_enrich(time.monotonic() - started, len(enriched))
+
+            # new lists: the old state may be the cache's in-process copy
+            comments = comments + enriched
+            valid += page_valid
+            token = page["next_page_token"]
+            pages += 1
+            if token is None:
+                break
+
+        return {
+            "comments": comments,
+            "valid": valid,
+            "next_page_token": token,
+            "pages": pages,
+            "complete": len(comments) >= max_comments or (pages > 0 and token is None),
+        }
@@ -0,0 +1,82 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, List, Optional, Tuple
+from src.core.metrics import INFERENCE_QUEUE_DEPTH
+
+
+class MicroBatcher:
+    """
+    Groups items submitted by concurrent callers into batches for one call
+    of a (blocking) batch function.
+
+    The first item to arrive waits up to max_wait_ms for others to join, so
+    ten callers with five texts each cost one model call instead of ten.
+    Batches run one at a time in a worker thread, in arrival order, and each
+    caller gets back the results for its own items, in order. `run_in_thread`
+    is what puts them there: asyncio.to_thread, or a StageExecutor's run.
+    """
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        run_in_thread: Callable[..., Awaitable[Any]] = asyncio.to_thread
+    ):
+        self.fn = fn
+        self.run_in_thread = run_in_thread
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: Deque[Tuple[Any, asyncio.Future]] = deque()
+        self._worker: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, items: List[Any]) -> List[Any]:
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in items]
+        self._pending.extend(zip(items, futures))
+        INFERENCE_QUEUE_DEPTH.inc(len(items))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        return list(await asyncio.gather(*futures))
+
+    async def _drain(self):
+        while self._pending:
+            if len(self._pending) < self.max_batch_size:
+                # give concurrent callers a moment to join this batch
+                await asyncio.sleep(self.max_wait)
+            batch = []
+            taken = 0
+            while self._pending and len(batch) < self.max_batch_size:
+                item, future = self._pending.popleft()
+                taken += 1
+                if not future.done():   # skip items of callers that gave up
+                    batch.append((item, future))
+            if not batch:
+                INFERENCE_QUEUE_DEPTH.dec(taken)
+                continue
+
+            try:
+                results = await self.run_in_thread(self.fn, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                INFERENCE_QUEUE_DEPTH.dec(taken)
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "pending": len(self._pending)
+        }
@@ -1,43 +1,347 @@
-import redis.asyncio as aioredis
-import json
-from typing import Optional, Any
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Any, Dict, List, Tuple
 from src.core.config import get_settings
+from src.core import executors
+from src.core.redis import get_redis
+from src.core.metrics import CACHE_HITS, CACHE_MISSES
+from src.core.timing import Stage, note
+from redis.asyncio.cluster import RedisCluster
+from src.services.codec import CacheCodec
 
 settings = get_settings()
 
+# timers cover the Redis round-trips; L1 lookups are too cheap to be worth one
+cache_get_timer = Stage("cache_get")
+cache_set_timer = Stage("cache_set")
+l1_hits, l2_hits = CACHE_HITS.labels("l1"), CACHE_HITS.labels("l2")
+
+
+class LocalCache:
+    """
+    In-process LRU cache bounded by (approximate) payload size in bytes.
+
+    Sizes are the length of the serialized (uncompressed) value, which is a good enough
+    proxy for ranking and bounding memory. Not thread-safe: it is only
+    touched from the event loop.
+    """
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, size, expires_at)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, size, expires_at = entry
+        if expires_at <= time.monotonic():
+            self.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, size: int, ttl: int = None):
+        self.pop(key)
+        if size > self.max_bytes:
+            return
+        ttl = min(ttl or self.ttl, self.ttl)
+        self._entries[key] = (value, size, time.monotonic() + ttl)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+
+    def pop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 
 class CacheService:
     def __init__(self):
-        self.redis_server = aioredis.from_url(
-            settings.REDIS_URL, 
-            decode_responses=True
-        )
+        self.redis_server = get_redis()
         self.ttl = settings.CACHE_TTL
+        self.stale_ttl = settings.CACHE_STALE_TTL
+        self.codec = CacheCodec(
+            settings.CACHE_SERIALIZER,
+            settings.CACHE_COMPRESSION,
+            settings.CACHE_COMPRESSION_MIN_BYTES,
+            settings.CACHE_COMPRESSION_LEVEL,
+            settings.CACHE_BODY_COMPRESSION
+        )
+        self.local = LocalCache(settings.L1_CACHE_MAX_BYTES, settings.L1_CACHE_TTL)
+        # in-process caches of values decoded from our entries, dropped along with them
+        self.derived: List[LocalCache] = []
+        self.channel = settings.CACHE_INVALIDATION_CHANNEL
+        self.instance_id = uuid.uuid4().hex
+        self.hits = {"l1": 0, "l2": 0}
+        self.misses = 0
+        self.stale_hits = 0
+        self._listener: Optional[asyncio.Task] = None
 
     async def get(self, key: str) -> Optional[Any]:
-        """Retrieve data from cache"""
-        data = await self.redis_server.get(key)
-        if data:
-            return json.loads(data)
-        return None
+        """Retrieve fresh data from cache; stale entries count as missing"""
+        entry = await self.get_entry(key)
+        if entry is None or entry[1]:
+            return None
+        return entry[0]
+
+    async def get_entry(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """
+        Retrieve (value, stale) from cache, checking the in-process tier first.
+
+        An entry is stale once its soft expiry has passed; Redis drops it
+        CACHE_STALE_TTL seconds later.
+        """
+        entry = self._get_local(key)
+        if entry is None:
+            with cache_get_timer.time():
+                data = await self.redis_server.get(key)
+            entry = self._load(key, data)
+            if entry is None:
+                return None
+        return self._entry(*entry)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Tuple[Any, bool]]:
+        """
+        get_entry() for several keys: L1 first, then one MGET for the rest.
+
+        Returns {key: (value, stale)}; keys that are not cached are left out.
+        """
+        found = {key: self._get_local(key) for key in keys}
+        remote = [key for key, entry in found.items() if entry is None]
+        if remote:
+            with cache_get_timer.time():
+                if isinstance(self.redis_server, RedisCluster):
+                    # plain MGET refuses keys from different slots
+                    values = await self.redis_server.mget_nonatomic(remote)
+                else:
+                    values = await self.redis_server.mget(remote)
+            for key, data in zip(remote, values):
+                found[key] = self._load(key, data)
+        return {key: self._entry(*entry) for key, entry in found.items() if entry is not None}
 
     async def set(self, key: str, value: Any, expire: int = None) -> bool:
-        """Store data in cache as JSON string"""
+        """
+        Store data in cache, encoded by the configured codec.
+
+        The entry is fresh for `expire` seconds and may then be served stale
+        for another CACHE_STALE_TTL seconds before Redis evicts it.
+        """
         expire = expire or self.ttl
-        return await self.redis_server.set(
-            key, json.dumps(value),
-            ex=expire
-        )
+        data, local_value, size, soft_expires_at = await self._encode(value, expire)
+        with cache_set_timer.time():
+            stored = await self.redis_server.set(
+                key, data,
+                ex=expire + self.stale_ttl
+            )
+        self._forget_derived(key)
+        self.local.set(key, (local_value, soft_expires_at), size, expire + self.stale_ttl)
+        await self._publish_invalidation(key)
+        return stored
+
+    async def set_many(self, items: Dict[str, Any], expire: int = None) -> bool:
+        """
+        set() for several keys in one round-trip: the SETs and their
+        invalidation messages go out in a single (non-transactional) pipeline.
+        """
+        expire = expire or self.ttl
+        encoded = {key: await self._encode(value, expire) for key, value in items.items()}
+        async with self.redis_server.pipeline(transaction=False) as pipe:
+            for key, (data, _, _, _) in encoded.items():
+                pipe.set(key, data, ex=expire + self.stale_ttl)
+                pipe.publish(self.channel, f"{self.instance_id} {key}")
+            with cache_set_timer.time():
+                results = await pipe.execute(raise_on_error=False)
+
+        stored, published = results[0::2], results[1::2]
+        for result in stored:
+            if isinstance(result, Exception):
+                raise result
+        for result in published:
+            if isinstance(result, Exception):
+                # peers fall back to their L1 TTL, which bounds the staleness
+                print(f"Cache invalidation publish failed: {result}")
+        for key, (_, local_value, size, soft_expires_at) in encoded.items():
+            self._forget_derived(key)
+            self.local.set(key, (local_value, soft_expires_at), size, expire + self.stale_ttl)
+        return all(stored)
+
+    async def _encode(self, value: Any, expire: int) -> Tuple[bytes, Any, int, int]:
+        """Returns (data for Redis, value for L1, its size, soft expiry)."""
+        soft_expires_at = int(time.time()) + expire
+        if isinstance(value, (bytes, bytearray)):
+            # response bodies run to megabytes; compress them off the event loop
+            data = await executors.cpu.run(self.codec.encode, value, soft_expires_at)
+            value, size, _ = self.codec.decode(data)
+        else:
+            data = self.codec.encode(value, soft_expires_at)
+            size = self.codec.payload_size(data)
+        return data, value, size, soft_expires_at
+
+    def _get_local(self, key: str) -> Optional[Tuple[Any, int]]:
+        entry = self.local.get(key)
+        if entry is not None:
+            self.hits["l1"] += 1
+            l1_hits.inc()
+            note("cache", "l1")
+        return entry
+
+    def _load(self, key: str, data: Optional[bytes]) -> Optional[Tuple[Any, int]]:
+        """Decode an entry read from Redis and keep it in L1."""
+        if not data:
+            self.misses += 1
+            CACHE_MISSES.inc()
+            note("cache", "miss")
+            return None
+        self.hits["l2"] += 1
+        l2_hits.inc()
+        note("cache", "l2")
+        value, size, soft_expires_at = self.codec.decode(data)
+        self.local.set(key, (value, soft_expires_at), size)
+        return value, soft_expires_at
+
+    def _entry(self, value: Any, soft_expires_at: int) -> Tuple[Any, bool]:
+        stale = bool(soft_expires_at) and time.time() >= soft_expires_at
+        if stale:
+            self.stale_hits += 1
+        return self._copy(value), stale
 
     async def delete(self, key: str) -> bool:
         """Remove a specific key from cache"""
-        return bool(await self.redis_server.delete(key))
+        self.local.pop(key)
+        self._forget_derived(key)
+        deleted = bool(await self.redis_server.delete(key))
+        await self._publish_invalidation(key)
+        return deleted
 
     async def flush_all(self):
         """Clear the entire cache"""
-        return await self.redis_server.flushdb()
-    
+        self.local.clear()
+        self._forget_derived("*")
+        flushed = await self.redis_server.flushdb()
+        await self._publish_invalidation("*")
+        return flushed
+
+    def stats(self) -> Dict:
+        """Hit ratios per tier. The L2 ratio only counts lookups that missed L1."""
+        l1_lookups = self.hits["l1"] + self.hits["l2"] + self.misses
+        l2_lookups = self.hits["l2"] + self.misses
+        return {
+            "l1": {
+                "hits": self.hits["l1"],
+                "hit_ratio": round(self.hits["l1"] / l1_lookups, 4) if l1_lookups else 0.0,
+                "entries": len(self.local),
+                "bytes": self.local.current_bytes,
+                "max_bytes": self.local.max_bytes,
+            },
+            "l2": {
+                "hits": self.hits["l2"],
+                "hit_ratio": round(self.hits["l2"] / l2_lookups, 4) if l2_lookups else 0.0,
+            },
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+        }
+
+    # --- cross-worker L1 invalidation over pub/sub
+
+    async def _publish_invalidation(self, key: str):
+        try:
+            await self.redis_server.publish(self.channel, f"{self.instance_id} {key}")
+        except Exception as e:
+            # peers fall back to their L1 TTL, which bounds the staleness
+            print(f"Cache invalidation publish failed: {e}")
+
+    def _handle_invalidation(self, message: bytes | str):
+        if isinstance(message, bytes):
+            message = message.decode()
+        sender, _, key = message.partition(" ")
+        if sender == self.instance_id:
+            return
+        if key == "*":
+            self.local.clear()
+        else:
+            self.local.pop(key)
+        self._forget_derived(key)
+
+    def _forget_derived(self, key: str):
+        for cache in self.derived:
+            if key == "*":
+                cache.clear()
+            else:
+                cache.pop(key)
+
+    async def _listen_invalidations(self):
+        while True:
+            pubsub = self.redis_server.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._handle_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # whatever we missed while disconnected may be stale now
+                print(f"Cache invalidation listener error: {e}")
+                self.local.clear()
+                self._forget_derived("*")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def start_invalidation_listener(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen_invalidations())
+
+    async def stop_invalidation_listener(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        # callers tag hits with cached/source, so never hand out the stored dict
+        return dict(value) if isinstance(value, dict) else value
+
     @staticmethod
-    def generate_analysis_key(video_id: str, max_comments: int) -> str:
-        """Generate consistent cache key for analysis results"""
-        return f"analysis:{video_id}:{max_comments}"
\ No newline at end of file
+    def summary_key(analysis_key: str) -> str:
+        """Key of the comment-free summary stored next to an analysis"""
+        return f"{analysis_key}:summary"
+
+    @staticmethod
+    def partial_key(analysis_key: str) -> str:
+        """Key of the progress a deadline-bounded analysis made, for the next call to extend"""
+        return f"{analysis_key}:partial"
+
+    @staticmethod
+    def generate_analysis_key(video_id: str, max_comments: int, include_replies: bool = False,
+                              sample: Optional[Tuple[float, float]] = None) -> str:
+        """
+        Generate consistent cache key for analysis results.
+
+        The video id is a {hash tag}, so every key for a video (summary, lock)
+        lands on the same shard. Sampled analyses are keyed by their
+        (margin_of_error, confidence_level).
+        """
+        key = f"analysis:{{{video_id}}}:{max_comments}"
+        if include_replies:
+            key += ":replies"
+        if sample:
+            key += ":sample:{:g}:{:g}".format(*sample)
+        return key
@@ -0,0 +1,204 @@
+import gzip
+import json
+import struct
+import zlib
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+try:
+    from compression import zstd      # stdlib since Python 3.14
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# Header: magic, format version, serializer id, compressor id, serialized length,
+# and (since v2) the soft expiry as epoch seconds, 0 meaning "none".
+# 0xFE can never start a UTF-8 string, so legacy JSON entries are told apart
+# from framed ones by the first byte alone.
+MAGIC = b"\xfeC"
+FORMAT_VERSION = 2
+HEADER_V1 = struct.Struct(">2sBBBI")
+HEADER = struct.Struct(">2sBBBII")
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+# name -> (id, dumps, loads). "raw" is picked automatically for bytes values,
+# e.g. response bodies that were serialized before reaching the cache.
+SERIALIZERS: Dict[str, Tuple[int, Callable, Callable]] = {
+    "raw": (0, bytes, bytes),
+    "json": (1, _json_dumps, json.loads),
+}
+if msgpack is not None:
+    SERIALIZERS["msgpack"] = (2, msgpack.packb, msgpack.unpackb)
+
+# name -> (id, compress(data, level), decompress)
+COMPRESSORS: Dict[str, Tuple[int, Callable, Callable]] = {
+    "none": (0, lambda data, level: data, lambda data: data),
+    "zlib": (1, lambda data, level: zlib.compress(data, level), zlib.decompress),
+}
+if zstd is not None:
+    COMPRESSORS["zstd"] = (2, lambda data, level: zstd.compress(data, level=level), zstd.decompress)
+COMPRESSORS["gzip"] = (3, lambda data, level: gzip.compress(data, compresslevel=level, mtime=0), gzip.decompress)
+
+# Compressors whose output is also a valid HTTP content-coding
+CONTENT_CODINGS = {"gzip": "gzip", "zlib": "deflate", "zstd": "zstd"}
+
+
+class EncodedBody(NamedTuple):
+    """A raw (bytes) cache entry as stored: possibly still compressed."""
+    data: bytes
+    encoding: Optional[str]   # HTTP content-coding of data, None if plain
+
+
+class CacheCodec:
+    """
+    Encodes cache values as a small binary header followed by the serialized,
+    optionally compressed, payload.
+
+    Decoding dispatches on the ids stored in the header rather than on the
+    current settings, so entries written with any serializer/compressor (or
+    as plain JSON strings before framing existed) keep reading correctly
+    while the configuration changes underneath them.
+    """
+    def __init__(
+        self,
+        serializer: str = "json",
+        compression: str = "zstd",
+        min_compress_bytes: int = 1024,
+        level: int = 3,
+        raw_compression: str = "gzip"
+    ):
+        # fall back to what is importable rather than failing at startup
+        if serializer not in SERIALIZERS or serializer == "raw":
+            serializer = "json"
+        if compression not in COMPRESSORS:
+            compression = "zlib" if compression != "none" else "none"
+        if raw_compression != "none" and raw_compression not in CONTENT_CODINGS:
+            raw_compression = "gzip"
+
+        self.serializer = serializer
+        self.compression = compression
+        # bytes values are response bodies: keep them in a coding HTTP clients accept
+        self.raw_compression = raw_compression
+        self.min_compress_bytes = min_compress_bytes
+        self.level = level
+        self._serializers_by_id = {sid: (dumps, loads) for sid, dumps, loads in SERIALIZERS.values()}
+        self._compressors_by_id = {cid: (comp, decomp) for cid, comp, decomp in COMPRESSORS.values()}
+        self._coding_by_id = {COMPRESSORS[name][0]: coding for name, coding in CONTENT_CODINGS.items() if name in COMPRESSORS}
+
+    def encode(self, value: Any, soft_expires_at: int = 0) -> bytes:
+        raw = isinstance(value, (bytes, bytearray))
+        serializer_id, dumps, _ = SERIALIZERS["raw" if raw else self.serializer]
+        compression = self.raw_compression if raw else self.compression
+        payload = dumps(value)
+        size = len(payload)
+
+        compressor_id = 0
+        if compression != "none" and size >= self.min_compress_bytes:
+            compressor_id, compress, _ = COMPRESSORS[compression]
+            payload = compress(payload, self.level)
+
+        return HEADER.pack(MAGIC, FORMAT_VERSION, serializer_id, compressor_id, size, soft_expires_at) + payload
+
+    @staticmethod
+    def payload_size(data: bytes) -> int:
+        """Serialized size of an encoded entry, read from its header."""
+        if not data.startswith(MAGIC):
+            return len(data)
+        return HEADER_V1.unpack_from(data)[4]   # same offset in every version
+
+    def decode(self, data: bytes) -> Tuple[Any, int, int]:
+        """
+        Return (value, size, soft expiry). The size - the serialized,
+        uncompressed length from the header, whatever form the value is kept
+        in - feeds the L1 byte budget; entries written without a soft expiry
+        report 0.
+
+        Raw entries come back as an EncodedBody that is left compressed when
+        its compressor is an HTTP content-coding, so it can be sent as-is.
+        """
+        if not data.startswith(MAGIC):
+            # entries written before framing: a bare JSON string
+            return json.loads(data), len(data), 0
+
+        version = data[2]
+        if version == 1:
+            header = HEADER_V1
+            _, _, serializer_id, compressor_id, size = HEADER_V1.unpack_from(data)
+            soft_expires_at = 0
+        elif version == FORMAT_VERSION:
+            header = HEADER
+            _, _, serializer_id, compressor_id, size, soft_expires_at = HEADER.unpack_from(data)
+        else:
+            raise ValueError(f"Unsupported cache format version: {version}")
+        if serializer_id not in self._serializers_by_id or compressor_id not in self._compressors_by_id:
+            raise ValueError(f"Unsupported cache codec: serializer={serializer_id}, compressor={compressor_id}")
+
+        _, loads = self._serializers_by_id[serializer_id]
+        _, decompress = self._compressors_by_id[compressor_id]
+        payload = data[header.size:]
+
+        if serializer_id == SERIALIZERS["raw"][0]:
+            coding = self._coding_by_id.get(compressor_id)
+            if coding is None:
+                payload, coding = decompress(payload), None
+            return EncodedBody(payload, coding), size, soft_expires_at
+
+        return loads(decompress(payload)), size, soft_expires_at
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    def sample_analysis(n: int) -> dict:
+        words = ["great", "video", "love", "this", "terrible", "mid", "😂", "song", "again", "first"]
+        comments = []
+        for i in range(n):
+            text = " ".join(random.choices(words, k=random.randint(3, 40)))
+            comments.append({
+                "author": f"User{i}",
+                "text": text,
+                "cleaned_text": text.lower(),
+                "like_count": random.randint(0, 5000),
+                "published_at": "2024-01-01T00:00:00Z",
+                "updated_at": "2024-01-01T00:00:00Z",
+                "sentiment": random.choice(["positive", "negative", "neutral"]),
+                "confidence": round(random.random(), 4),
+            })
+        return {"video_id": "dQw4w9WgXcQ", "total_comments": n, "comments": comments}
+
+    def timed(fn, repeat: int = 5) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best * 1000
+
+    value = sample_analysis(50000)
+    legacy = json.dumps(value)
+    print(f"{'format':<18}{'bytes':>12}{'ratio':>8}{'encode ms':>12}{'decode ms':>12}")
+    print(
+        f"{'legacy json str':<18}{len(legacy.encode()):>12,}{1.0:>8.2f}"
+        f"{timed(lambda: json.dumps(value)):>12.1f}{timed(lambda: json.loads(legacy)):>12.1f}"
+    )
+    for serializer in [s for s in SERIALIZERS if s != "raw"]:
+        for compression in COMPRESSORS:
+            codec = CacheCodec(serializer, compression)
+            data = codec.encode(value)
+            ratio = len(data) / len(legacy.encode())
+            print(
+                f"{serializer + '+' + compression:<18}{len(data):>12,}{ratio:>8.2f}"
+                f"{timed(lambda: codec.encode(value)):>12.1f}{timed(lambda: codec.decode(data)):>12.1f}"
+            )
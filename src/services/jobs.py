@@ -0,0 +1,222 @@
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+from src.core.config import get_settings
+from src.core.redis import get_redis
+
+settings = get_settings()
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# handler(job, report) -> result_key; report(progress, stage) records progress
+Reporter = Callable[[float, str], Awaitable[None]]
+Handler = Callable[[Dict, Reporter], Awaitable[str]]
+
+
+class PermanentJobError(Exception):
+    """A job failure that retrying will not fix (e.g. the video does not exist)"""
+
+
+class JobQueue:
+    """
+    Redis-backed queue of analysis jobs.
+
+    Each job is a hash at job:<id>. Ids are LPUSHed onto JOB_QUEUE_KEY and
+    workers BLMOVE them onto their own processing list, so a job whose worker
+    dies is still on record and is pushed back onto the queue once that
+    worker's heartbeat expires.
+    """
+    def __init__(self, redis_server=None):
+        self.redis_server = redis_server or get_redis(decode_responses=True)
+        self.queue_key = settings.JOB_QUEUE_KEY
+        self.job_ttl = settings.JOB_TTL
+        self.max_attempts = settings.JOB_MAX_ATTEMPTS
+        self.heartbeat_ttl = settings.WORKER_HEARTBEAT_TTL
+
+    @staticmethod
+    def job_key(job_id: str) -> str:
+        return f"job:{job_id}"
+
+    def processing_key(self, worker_id: str) -> str:
+        return f"{self.queue_key}:processing:{worker_id}"
+
+    def workers_key(self) -> str:
+        return f"{self.queue_key}:workers"
+
+    def heartbeat_key(self, worker_id: str) -> str:
+        return f"{self.queue_key}:worker:{worker_id}"
+
+    async def enqueue(self, params: Dict, result_key: Optional[str] = None) -> Dict:
+        """
+        Record a job and queue it for the workers.
+
+        A job created with a result_key is already done (its analysis is
+        cached) and is recorded without being queued.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        fields = {
+            "id": job_id,
+            "status": DONE if result_key else QUEUED,
+            "params": json.dumps(params),
+            "progress": 1.0 if result_key else 0.0,
+            "stage": DONE if result_key else QUEUED,
+            "attempts": 0,
+            "created_at": now,
+        }
+        if result_key:
+            fields.update(result_key=result_key, finished_at=now)
+        await self.redis_server.hset(self.job_key(job_id), mapping=fields)
+        await self.redis_server.expire(self.job_key(job_id), self.job_ttl)
+        if not result_key:
+            await self.redis_server.lpush(self.queue_key, job_id)
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        raw = await self.redis_server.hgetall(self.job_key(job_id))
+        if not raw:
+            return None
+        job = dict(raw)
+        job["params"] = json.loads(job.get("params", "{}"))
+        job["progress"] = float(job.get("progress", 0.0))
+        job["attempts"] = int(job.get("attempts", 0))
+        for field in ("created_at", "started_at", "finished_at"):
+            if field in job:
+                job[field] = float(job[field])
+        return job
+
+    async def claim(self, worker_id: str, timeout: float) -> Optional[Dict]:
+        """Take the oldest queued job, waiting up to timeout seconds for one."""
+        job_id = await self.redis_server.blmove(
+            self.queue_key, self.processing_key(worker_id), timeout, src="RIGHT", dest="LEFT"
+        )
+        if job_id is None:
+            return None
+        key = self.job_key(job_id)
+        if not await self.redis_server.exists(key):
+            # the record expired while queued; nothing left to run
+            await self.redis_server.lrem(self.processing_key(worker_id), 0, job_id)
+            return None
+        await self.redis_server.hincrby(key, "attempts", 1)
+        await self.redis_server.hset(key, mapping={
+            "status": RUNNING, "stage": RUNNING, "worker": worker_id, "started_at": time.time()
+        })
+        return await self.get(job_id)
+
+    async def progress(self, job_id: str, progress: float, stage: str):
+        await self.redis_server.hset(self.job_key(job_id), mapping={"progress": progress, "stage": stage})
+
+    async def complete(self, job_id: str, worker_id: str, result_key: str):
+        await self.redis_server.hset(self.job_key(job_id), mapping={
+            "status": DONE, "stage": DONE, "progress": 1.0,
+            "result_key": result_key, "finished_at": time.time()
+        })
+        await self.redis_server.lrem(self.processing_key(worker_id), 0, job_id)
+
+    async def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True) -> bool:
+        """
+        Record a failed attempt. Returns True if the job went back on the
+        queue, False once it is marked failed for good.
+        """
+        job = await self.get(job_id)
+        if retry and job is not None and job["attempts"] < self.max_attempts:
+            await self.redis_server.hset(self.job_key(job_id), mapping={
+                "status": QUEUED, "stage": QUEUED, "error": error
+            })
+            # workers pop from the right, so a retried job runs next
+            await self.redis_server.lrem(self.processing_key(worker_id), 0, job_id)
+            await self.redis_server.rpush(self.queue_key, job_id)
+            return True
+        await self.redis_server.hset(self.job_key(job_id), mapping={
+            "status": FAILED, "stage": FAILED, "error": error, "finished_at": time.time()
+        })
+        await self.redis_server.lrem(self.processing_key(worker_id), 0, job_id)
+        return False
+
+    async def heartbeat(self, worker_id: str):
+        await self.redis_server.sadd(self.workers_key(), worker_id)
+        await self.redis_server.set(self.heartbeat_key(worker_id), time.time(), ex=self.heartbeat_ttl)
+
+    async def unregister(self, worker_id: str):
+        await self.recover_worker(worker_id)
+        await self.redis_server.srem(self.workers_key(), worker_id)
+        await self.redis_server.delete(self.heartbeat_key(worker_id))
+
+    async def recover(self) -> int:
+        """Requeue the jobs of every worker whose heartbeat has expired."""
+        recovered = 0
+        for worker_id in await self.redis_server.smembers(self.workers_key()):
+            if await self.redis_server.exists(self.heartbeat_key(worker_id)):
+                continue
+            recovered += await self.recover_worker(worker_id)
+            await self.redis_server.srem(self.workers_key(), worker_id)
+        return recovered
+
+    async def recover_worker(self, worker_id: str) -> int:
+        recovered = 0
+        # LMOVE is atomic, so two workers recovering the same list never both take a job
+        while (job_id := await self.redis_server.lmove(
+            self.processing_key(worker_id), self.queue_key, src="LEFT", dest="RIGHT"
+        )) is not None:
+            await self.redis_server.hset(self.job_key(job_id), mapping={"status": QUEUED, "stage": QUEUED})
+            recovered += 1
+        return recovered
+
+
+class JobWorker:
+    """Claims jobs from a JobQueue and runs them through handler, one at a time."""
+    def __init__(self, queue: JobQueue, handler: Handler, worker_id: Optional[str] = None):
+        self.queue = queue
+        self.handler = handler
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_timeout = settings.WORKER_POLL_TIMEOUT
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        """Finish the current job, then exit run()."""
+        self._stopping.set()
+
+    async def run(self):
+        await self.queue.heartbeat(self.worker_id)
+        await self.queue.recover()
+        beat = asyncio.create_task(self._keep_alive())
+        try:
+            while not self._stopping.is_set():
+                await self.run_once()
+        finally:
+            beat.cancel()
+            await self.queue.unregister(self.worker_id)
+
+    async def run_once(self) -> Optional[Dict]:
+        """Claim and process at most one job; returns the job that was run."""
+        job = await self.queue.claim(self.worker_id, self.poll_timeout)
+        if job is None:
+            return None
+
+        async def report(progress: float, stage: str):
+            await self.queue.progress(job["id"], progress, stage)
+
+        try:
+            result_key = await self.handler(job, report)
+        except PermanentJobError as e:
+            await self.queue.fail(job["id"], self.worker_id, str(e), retry=False)
+        except Exception as e:
+            print(f"Job {job['id']} failed (attempt {job['attempts']}): {e}")
+            await self.queue.fail(job["id"], self.worker_id, str(e))
+        else:
+            await self.queue.complete(job["id"], self.worker_id, result_key)
+        return job
+
+    async def _keep_alive(self):
+        """Refresh our heartbeat and requeue jobs from workers that have died."""
+        while True:
+            await asyncio.sleep(self.queue.heartbeat_ttl / 3)
+            try:
+                await self.queue.heartbeat(self.worker_id)
+                await self.queue.recover()
+            except Exception as e:
+                print(f"Worker heartbeat failed: {e}")
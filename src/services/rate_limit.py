@@ -0,0 +1,89 @@
+import hashlib
+import itertools
+import math
+import time
+import uuid
+from typing import Tuple
+from redis.exceptions import NoScriptError, RedisError
+from src.core.config import get_settings
+from src.core.redis import get_redis
+from src.services.cache import LocalCache
+
+settings = get_settings()
+
+# Sliding-window log: the key is a sorted set of the client's admitted
+# requests in the last period, scored by time in ms. A request is let through
+# while fewer than `limit` remain in the window, so no rolling period ever
+# admits more than `limit`, bursts included. Members are made unique by the
+# caller (ARGV[3]), since several requests can land in the same millisecond.
+WINDOW_SCRIPT = """
+local t = redis.call("TIME")
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local period = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", now - period)
+local count = redis.call("ZCARD", KEYS[1])
+if count >= limit then
+    local oldest = redis.call("ZRANGE", KEYS[1], 0, 0, "WITHSCORES")
+    return {0, 0, tonumber(oldest[2]) + period - now}
+end
+redis.call("ZADD", KEYS[1], now, now .. ":" .. ARGV[3])
+redis.call("PEXPIRE", KEYS[1], period)
+return {1, limit - count - 1, 0}
+"""
+WINDOW_SHA = hashlib.sha1(WINDOW_SCRIPT.encode()).hexdigest()
+
+Decision = Tuple[bool, int, float]   # (allowed, remaining, retry_after seconds)
+
+
+class RateLimiter:
+    """
+    Per-client sliding-window rate limiter: at most `limit` requests in any
+    `period` seconds.
+
+    The check is one atomic script call (EVALSHA, falling back to EVAL the
+    first time a Redis has not seen it). Clients Redis has just refused are
+    remembered in-process until they may retry, so hammering an exhausted
+    limit is rejected without a round-trip. If Redis is unreachable the same
+    algorithm runs per process, which keeps limits roughly in force.
+    """
+    def __init__(self, limit: int = None, period: int = 60):
+        self.redis_server = get_redis()
+        self.instance_id = uuid.uuid4().hex
+        self.limit = limit or settings.RATE_LIMIT_PER_MINUTE
+        self.period_ms = period * 1000
+        self.blocked = LocalCache(settings.RATE_LIMIT_LOCAL_MAX_BYTES, period)
+        self.local_log = LocalCache(settings.RATE_LIMIT_LOCAL_MAX_BYTES, period)
+        self._sequence = itertools.count()
+
+    async def check(self, client: str) -> Decision:
+        blocked_until = self.blocked.get(client)
+        if blocked_until is not None and blocked_until > time.monotonic():
+            return False, 0, blocked_until - time.monotonic()
+
+        key = f"rate_limit:{client}"
+        args = (self.period_ms, self.limit, f"{self.instance_id}:{next(self._sequence)}")
+        try:
+            try:
+                allowed, remaining, retry_ms = await self.redis_server.evalsha(WINDOW_SHA, 1, key, *args)
+            except NoScriptError:
+                allowed, remaining, retry_ms = await self.redis_server.eval(WINDOW_SCRIPT, 1, key, *args)
+        except RedisError as e:
+            print(f"Rate limiter falling back to local state: {e}")
+            return self._check_locally(client)
+
+        if not allowed:
+            retry_after = retry_ms / 1000
+            self.blocked.set(client, time.monotonic() + retry_after, 64, math.ceil(retry_after))
+            return False, 0, retry_after
+        return True, int(remaining), 0.0
+
+    def _check_locally(self, client: str) -> Decision:
+        """The window script, against this process's own state."""
+        now = time.monotonic() * 1000
+        log = [at for at in self.local_log.get(client) or [] if at > now - self.period_ms]
+        if len(log) >= self.limit:
+            return False, 0, (log[0] + self.period_ms - now) / 1000
+        log.append(now)
+        self.local_log.set(client, log, 16 * len(log), math.ceil(self.period_ms / 1000))
+        return True, self.limit - len(log), 0.0
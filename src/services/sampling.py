@@ -0,0 +1,108 @@
+import math
+import random
+from statistics import NormalDist
+from typing import Dict, List, Tuple
+
+SENTIMENTS = ("positive", "negative", "neutral")
+
+
+def sample_order(size: int, seed: str) -> List[int]:
+    """0..size-1 in a random order that is the same for the same seed (the video id)."""
+    return random.Random(seed).sample(range(size), size)
+
+
+class SentimentEstimate:
+    """
+    The sentiment distribution of a video's comments, estimated from a random
+    sample of them scored a batch at a time.
+
+    Comments too short to classify are known without the model (neutral,
+    confidence 0), so they are counted exactly and only the valid ones are
+    sampled. Intervals are Agresti-Coull, with the finite population
+    correction: they narrow to nothing once every valid comment is scored.
+    Percentages and margins are in percentage points, like the distribution.
+    """
+    def __init__(self, total: int, valid: int, confidence_level: float = 0.95):
+        self.total = total
+        self.valid = valid
+        self.confidence_level = confidence_level
+        self.z = NormalDist().inv_cdf((1 + confidence_level) / 2)
+        self.sampled = 0
+        self.counts = {s: 0 for s in SENTIMENTS}
+        self._confidence_sum = 0.0
+        self._confidence_squares = 0.0
+
+    def add(self, sentiments: List[Dict]):
+        """Count a batch of model outputs ({"label", "confidence"})."""
+        for sentiment in sentiments:
+            label = sentiment["label"] if sentiment["label"] in self.counts else "neutral"
+            self.counts[label] += 1
+            self._confidence_sum += sentiment["confidence"]
+            self._confidence_squares += sentiment["confidence"] ** 2
+        self.sampled += len(sentiments)
+
+    @property
+    def exact(self) -> bool:
+        return self.sampled >= self.valid
+
+    def _fpc(self) -> float:
+        if self.exact or self.valid <= 1:
+            return 0.0
+        return (self.valid - self.sampled) / (self.valid - 1)
+
+    def _share(self, label: str, valid_share: float) -> float:
+        """Percent of all comments, given the share of valid comments with `label`."""
+        invalid = self.total - self.valid if label == "neutral" else 0
+        return (valid_share * self.valid + invalid) / self.total * 100
+
+    def _interval(self, label: str) -> Tuple[float, float]:
+        """Confidence interval of the share of valid comments with `label`."""
+        if self.exact:
+            share = self.counts[label] / self.sampled if self.sampled else 0.0
+            return share, share
+        n = self.sampled + self.z ** 2
+        center = (self.counts[label] + self.z ** 2 / 2) / n
+        half = self.z * math.sqrt(center * (1 - center) / n * self._fpc())
+        return max(0.0, center - half), min(1.0, center + half)
+
+    def half_widths(self) -> Dict[str, float]:
+        """Margin of error of each percentage, in percentage points."""
+        if self.total == 0:
+            return {s: 0.0 for s in SENTIMENTS}
+        widths = {}
+        for label in SENTIMENTS:
+            low, high = self._interval(label)
+            widths[label] = (high - low) / 2 * self.valid / self.total * 100
+        return widths
+
+    def converged(self, margin: float) -> bool:
+        """Whether every percentage is known to within `margin` points (or exactly)."""
+        return self.exact or (self.sampled > 0 and max(self.half_widths().values()) <= margin)
+
+    def distribution(self) -> Dict[str, float]:
+        if self.total == 0:
+            return {s: 0.0 for s in SENTIMENTS}
+        return {
+            label: round(self._share(label, self.counts[label] / self.sampled if self.sampled else 0.0), 2)
+            for label in SENTIMENTS
+        }
+
+    def intervals(self) -> Dict[str, Dict[str, float]]:
+        if self.total == 0:
+            return {s: {"low": 0.0, "high": 0.0} for s in SENTIMENTS}
+        intervals = {}
+        for label in SENTIMENTS:
+            low, high = self._interval(label)
+            intervals[label] = {"low": round(self._share(label, low), 2), "high": round(self._share(label, high), 2)}
+        return intervals
+
+    def average_confidence(self) -> Tuple[float, Dict[str, float]]:
+        """Mean model confidence over valid comments, and its confidence interval."""
+        if not self.sampled:
+            return 0.0, {"low": 0.0, "high": 0.0}
+        mean = self._confidence_sum / self.sampled
+        half = 0.0
+        if self.sampled > 1:
+            variance = max(0.0, (self._confidence_squares - self.sampled * mean ** 2) / (self.sampled - 1))
+            half = self.z * math.sqrt(variance / self.sampled * self._fpc())
+        return round(mean, 4), {"low": round(max(0.0, mean - half), 4), "high": round(min(1.0, mean + half), 4)}
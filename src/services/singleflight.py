@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+from redis.exceptions import RedisError
+from src.core.config import get_settings
+from src.services.cache import CacheService
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# how long a failed computation is reported to the callers waiting on it
+FAILURE_TTL_MS = 5000
+
+# Only the holder of the token may extend or release a lock
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class ComputeFailed(Exception):
+    """Another worker's computation of the key failed, with this HTTP status and detail."""
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class SingleFlight:
+    """
+    Makes sure only one computation runs per key at a time.
+
+    Within a worker, concurrent callers share one task. Across workers, the
+    task first takes a short-lease Redis lock. Workers that lose the race poll
+    the cache until the winner's result lands there, and take over the
+    computation if the lock holder dies and its lease runs out. If the
+    winner's computation fails it leaves a short-lived failure marker, which
+    the waiters raise as ComputeFailed instead of computing the key again.
+    """
+    def __init__(self, cache: CacheService):
+        self.cache = cache
+        self.lease_ms = settings.SINGLE_FLIGHT_LEASE_MS
+        self.poll_interval = settings.SINGLE_FLIGHT_POLL_INTERVAL_MS / 1000
+        self.wait_timeout = settings.SINGLE_FLIGHT_WAIT_TIMEOUT
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Return (value, fresh). fresh is False when the value was read back
+        from the cache after another worker computed it.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_across_workers(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller disconnecting must not cancel everyone's result
+        result = await asyncio.shield(task)
+        if result is None:
+            # we joined a background refresh that deferred to another worker
+            return await self._run_across_workers(key, compute)
+        return result
+
+    def refresh(self, key: str, compute: Callable[[], Awaitable[Any]]):
+        """
+        Recompute key in the background, at most once across all workers.
+
+        Does nothing if a computation for key is already running here, or if
+        another worker holds the lock (it is refreshing the same entry).
+        """
+        if key in self._inflight:
+            return
+        task = asyncio.create_task(self._run_across_workers(key, compute, wait=False))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finish_refresh(key, t))
+
+    def _finish_refresh(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background refresh failed for %s: %s", key, task.exception())
+
+    async def _run_across_workers(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        wait: bool = True
+    ) -> Optional[Tuple[Any, bool]]:
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            try:
+                acquired = await self.cache.redis_server.set(lock_key, token, nx=True, px=self.lease_ms)
+            except RedisError as e:
+                logger.warning("Single-flight lock unavailable, computing locally: %s", e)
+                return await compute(), True
+
+            if not acquired and not wait:
+                return None
+
+            if acquired:
+                try:
+                    # the previous holder may have finished between our miss and the lock
+                    cached = await self.cache.get(key)
+                    if cached is not None:
+                        return cached, False
+                    keeper = asyncio.create_task(self._keep_lease(lock_key, token))
+                    try:
+                        return await compute(), True
+                    except Exception as e:
+                        await self._mark_failed(key, e)
+                        raise
+                    finally:
+                        keeper.cancel()
+                finally:
+                    await self._release(lock_key, token)
+
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached, False
+            await self._raise_if_failed(key)
+            if time.monotonic() > deadline:
+                logger.warning("Single-flight wait timed out for %s, computing locally", key)
+                return await compute(), True
+            await asyncio.sleep(self.poll_interval)
+
+    @asynccontextmanager
+    async def lease(self, key: str, until: float) -> AsyncIterator[bool]:
+        """
+        Hold key's cross-worker lock while the block runs, without sharing a
+        result: for read-modify-write of an entry that callers must not do at
+        once. Waits for the lock until `until` (time.monotonic()) and yields
+        whether it is held. Without Redis it is, as run() then computes locally.
+        """
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        while True:
+            try:
+                acquired = await self.cache.redis_server.set(lock_key, token, nx=True, px=self.lease_ms)
+            except RedisError as e:
+                logger.warning("Single-flight lock unavailable, proceeding unlocked: %s", e)
+                acquired, token = True, None
+            if acquired or time.monotonic() >= until:
+                break
+            await asyncio.sleep(max(0.0, min(self.poll_interval, until - time.monotonic())))
+
+        if not acquired or token is None:
+            yield acquired
+            return
+        keeper = asyncio.create_task(self._keep_lease(lock_key, token))
+        try:
+            yield True
+        finally:
+            keeper.cancel()
+            await self._release(lock_key, token)
+
+    async def _mark_failed(self, key: str, error: Exception):
+        failure = {
+            "status_code": getattr(error, "status_code", 500),
+            "detail": str(getattr(error, "detail", error))
+        }
+        try:
+            await self.cache.redis_server.set(f"failed:{key}", json.dumps(failure), px=FAILURE_TTL_MS)
+        except RedisError as e:
+            # waiters then take the lock and compute again
+            logger.warning("Single-flight failure marker not written: %s", e)
+
+    async def _raise_if_failed(self, key: str):
+        try:
+            failure = await self.cache.redis_server.get(f"failed:{key}")
+        except RedisError:
+            return
+        if failure:
+            failure = json.loads(failure)
+            raise ComputeFailed(failure["status_code"], failure["detail"])
+
+    async def _keep_lease(self, lock_key: str, token: str):
+        """Extend the lease while the computation is still running."""
+        while True:
+            await asyncio.sleep(self.lease_ms / 3000)
+            try:
+                await self.cache.redis_server.eval(RENEW_SCRIPT, 1, lock_key, token, self.lease_ms)
+            except RedisError as e:
+                logger.warning("Single-flight lease renewal failed: %s", e)
+
+    async def _release(self, lock_key: str, token: str):
+        try:
+            await self.cache.redis_server.eval(RELEASE_SCRIPT, 1, lock_key, token)
+        except RedisError as e:
+            # the lease expires on its own
+            logger.warning("Single-flight lock release failed: %s", e)
@@ -1,7 +1,14 @@
 import googleapiclient.discovery as discovery
 import googleapiclient.errors as errors
-import asyncio
+import httplib2
+import threading
+from typing import Dict, List, Optional
 from src.core.config import get_settings
+from src.core import executors
+from src.core.timing import Stage
+
+page_timer = Stage("youtube_page")
+reply_page_timer = Stage("youtube_replies_page")
 
 
 class YouTubeService:
@@ -11,23 +18,52 @@ class YouTubeService:
         self.youtube_client = discovery.build(
             settings.API_SERVICE_NAME,
             settings.API_VERSION,
-            developerKey=settings.YOUTUBE_API_KEY
+            developerKey=settings.YOUTUBE_API_KEY,
+            client_options={"api_endpoint": settings.YOUTUBE_API_ENDPOINT} if settings.YOUTUBE_API_ENDPOINT else None
         )
+        # httplib2.Http is not thread-safe, so every reply and page worker gets its own
+        self._local = threading.local()
 
-    async def get_comments(self, video_id: str, max_results: int) -> dict:
+    async def get_comments(self, video_id: str, max_results: int, include_replies: bool = False) -> dict:
         """Fetch comments asynchronously by offloading blocking I/O to a thread pool."""
-        return await asyncio.to_thread(
+        return await executors.network.run(
             self._fetch_comments_async,
             video_id,
-            max_results
+            max_results,
+            include_replies
+        )
+
+    async def get_comment_page(self, video_id: str, page_size: int, page_token: Optional[str] = None) -> dict:
+        """
+        One page of top-level comments (at most 100), for callers that page
+        themselves: {"comments": [...], "next_page_token": token or None}.
+        """
+        return await executors.network.run(self._fetch_page, video_id, page_size, page_token)
+
+    def _fetch_page(self, video_id: str, page_size: int, page_token: Optional[str]) -> dict:
+        request = self.youtube_client.commentThreads().list(
+            part="snippet",
+            videoId=video_id,
+            maxResults=min(100, page_size),
+            pageToken=page_token
         )
+        try:
+            with page_timer.time():
+                response = request.execute(http=self._http())
+        except errors.HttpError as e:
+            raise self._api_error(e, video_id)
+        return {
+            "comments": [self._to_comment(item["snippet"]["topLevelComment"]["snippet"]) for item in response["items"]],
+            "next_page_token": response.get("nextPageToken")
+        }
 
-    def _fetch_comments_async(self, video_id: str, max_results: int) -> dict:
-        """Synchronous implementation - runs inside a thread via asyncio.to_thread."""
+    def _fetch_comments_async(self, video_id: str, max_results: int, include_replies: bool = False) -> dict:
+        """Synchronous implementation - runs on a network pool worker."""
         comments = []
+        threads = []
         next_page_token = None
         total_fetched = 0
-        
+
         try:
             while True:
                 if total_fetched >= max_results:
@@ -36,42 +72,140 @@ class YouTubeService:
                 page_size = min(100, remaining)
 
                 request = self.youtube_client.commentThreads().list(
-                    part="snippet",
+                    part="snippet,replies" if include_replies else "snippet",
                     videoId=video_id,
                     maxResults=page_size,
                     pageToken=next_page_token
                 )
-                response = request.execute()
+                with page_timer.time():
+                    response = request.execute()
 
                 for item in response["items"]:
                     snippet = item["snippet"]["topLevelComment"]["snippet"]
-                    comments.append({
-                        "author": snippet["authorDisplayName"],
-                        "published_at": snippet["publishedAt"],
-                        "updated_at": snippet["updatedAt"],
-                        "like_count": snippet["likeCount"],
-                        "text": snippet["textDisplay"]
-                    })
-
-                total_fetched = len(comments)
+                    comment = self._to_comment(snippet)
+                    if include_replies:
+                        comment["comment_id"] = item["id"]
+                        comment["parent_id"] = None
+                        threads.append({
+                            "comment": comment,
+                            "total_replies": item["snippet"].get("totalReplyCount", 0),
+                            "replies": [
+                                self._to_reply(reply, item["id"])
+                                for reply in item.get("replies", {}).get("comments", [])
+                            ]
+                        })
+                        # budget for the whole thread so we stop paging early
+                        total_fetched += 1 + item["snippet"].get("totalReplyCount", 0)
+                    else:
+                        comments.append(comment)
+
+                if not include_replies:
+                    total_fetched = len(comments)
                 next_page_token = response.get("nextPageToken")
                 if not next_page_token:
                     break
 
+            if include_replies:
+                comments = self._merge_replies(threads, max_results)
+
             # comments_df = pd.DataFrame(comments, columns=["author", "published_at", "updated_at", "like_count", "text"])
             # os.makedirs("src/models/data", exist_ok=True)
             # comments_df.to_csv("src/models/data/comments.csv", index=False, encoding="utf-8")
-                
+
             return {
                 "video_id": video_id,
                 "comments": comments,
                 "total": len(comments)
             }
-        
+
         except errors.HttpError as e:
-            if e.resp.status == 404:
-                raise ValueError(f"Video not found: {video_id}")
-            elif e.resp.status == 403:
-                raise ValueError("API quota exceeded or comments disabled")
-            else:
-                raise Exception(f"YouTube API error: {str(e)}")
\ No newline at end of file
+            raise self._api_error(e, video_id)
+
+    @staticmethod
+    def _api_error(e: errors.HttpError, video_id: str) -> Exception:
+        if e.resp.status == 404:
+            return ValueError(f"Video not found: {video_id}")
+        elif e.resp.status == 403:
+            return ValueError("API quota exceeded or comments disabled")
+        else:
+            return Exception(f"YouTube API error: {str(e)}")
+
+    def _http(self) -> httplib2.Http:
+        """This thread's own connection (httplib2.Http is not thread-safe)."""
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = httplib2.Http()
+        return http
+
+    def _merge_replies(self, threads: List[Dict], max_results: int) -> List[Dict]:
+        """
+        Flatten threads into parent-then-replies order, capped at max_results.
+
+        commentThreads only inlines a handful of replies per thread. Threads
+        whose share of the budget is more than was inlined get the rest
+        through comments().list, only as many pages as that share needs,
+        concurrently on the replies pool (REPLY_FETCH_CONCURRENCY workers).
+        """
+        budget = max_results
+        incomplete = []
+        for thread in threads:
+            budget -= 1
+            if budget <= 0:
+                break
+            wanted = min(thread["total_replies"], budget)
+            if wanted > len(thread["replies"]):
+                incomplete.append((thread, wanted))
+            budget -= wanted
+
+        futures = [
+            executors.replies.submit(self._fetch_replies, thread["comment"]["comment_id"], wanted)
+            for thread, wanted in incomplete
+        ]
+        for (thread, _), future in zip(incomplete, futures):
+            thread["replies"] = future.result()
+
+        comments = []
+        for thread in threads:
+            if len(comments) >= max_results:
+                break
+            comments.append(thread["comment"])
+            comments.extend(thread["replies"][:max_results - len(comments)])
+        return comments
+
+    def _fetch_replies(self, parent_id: str, limit: int) -> List[Dict]:
+        """Fetch up to `limit` replies of a single thread (runs on a replies pool worker)."""
+        http = self._http()
+
+        replies = []
+        next_page_token = None
+        while len(replies) < limit:
+            request = self.youtube_client.comments().list(
+                part="snippet",
+                parentId=parent_id,
+                maxResults=min(100, limit - len(replies)),
+                pageToken=next_page_token
+            )
+            with reply_page_timer.time():
+                response = request.execute(http=http)
+            replies.extend(self._to_reply(item, parent_id) for item in response["items"])
+
+            next_page_token = response.get("nextPageToken")
+            if not next_page_token:
+                break
+        return replies[:limit]
+
+    def _to_reply(self, item: Dict, parent_id: str) -> Dict:
+        reply = self._to_comment(item["snippet"])
+        reply["comment_id"] = item["id"]
+        reply["parent_id"] = parent_id
+        return reply
+
+    @staticmethod
+    def _to_comment(snippet: Dict) -> Dict:
+        return {
+            "author": snippet["authorDisplayName"],
+            "published_at": snippet["publishedAt"],
+            "updated_at": snippet["updatedAt"],
+            "like_count": snippet["likeCount"],
+            "text": snippet["textDisplay"]
+        }
@@ -0,0 +1,231 @@
+"""
+Offline bulk sentiment classification for JSONL, CSV and Parquet files.
+
+    python -m src.utils.bulk_classify comments.jsonl results.jsonl --workers 4
+
+Streams the input in chunks through TextProcessor and SentimentAnalyzer on a
+pool of worker processes, and appends each record (with `sentiment`,
+`confidence` and `cleaned_text` added) to a JSONL output as soon as its chunk
+is done. A checkpoint next to the output records how far it got, so
+re-running the same command after a crash or Ctrl+C picks up where it left
+off instead of starting over.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from rich.console import Console
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+console = Console(stderr=True)
+
+# every worker process loads its own RoBERTa (~0.5 GB+ of RAM each), so the
+# default is one per 4 cores, like the API's inference pool, not one per core
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 1) // 4)
+
+# per-process models, loaded once by _init_worker
+_processor = None
+_analyzer = None
+
+
+def _init_worker(threads: Optional[int] = None):
+    global _processor, _analyzer
+    if threads:
+        # N processes x all cores each just thrash; give each its share
+        import torch
+        torch.set_num_threads(threads)
+    from src.models.preprocessing import TextProcessor
+    from src.models.sentiment import SentimentAnalyzer
+    _processor = TextProcessor()
+    _analyzer = SentimentAnalyzer()
+
+
+def classify_texts(texts: List[str]) -> List[Dict]:
+    """clean → analyze, the same way AnalyzerService treats comments"""
+    cleaned = [_processor.clean(text) if isinstance(text, str) else "" for text in texts]
+    valid = [i for i, text in enumerate(cleaned) if _processor.is_valid(text)]
+    sentiments = _analyzer.analyze_batch([cleaned[i] for i in valid]) if valid else []
+
+    results = [{"cleaned_text": text, "sentiment": "neutral", "confidence": 0.0} for text in cleaned]
+    for i, sentiment in zip(valid, sentiments):
+        results[i]["sentiment"] = sentiment["label"]
+        results[i]["confidence"] = sentiment["confidence"]
+    return results
+
+
+def read_records(path: Path, chunk_size: int) -> Iterator[List[Dict]]:
+    """Yield the records of a JSONL, CSV or Parquet file, chunk_size at a time."""
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        if pq is None:
+            raise SystemExit("Reading Parquet needs pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+        return
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if suffix == ".csv":
+            rows = csv.DictReader(f)
+        elif suffix in (".jsonl", ".ndjson"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            raise SystemExit(f"Unsupported input format: {suffix} (use .jsonl, .csv or .parquet)")
+        while chunk := list(islice(rows, chunk_size)):
+            yield chunk
+
+
+class Checkpoint:
+    """
+    Progress of a run: chunks and records done, and the output size after
+    the last complete chunk. Written atomically after every chunk.
+    """
+    def __init__(self, path: Path, input_path: Path, chunk_size: int):
+        self.path = path
+        self.input = str(input_path.resolve())
+        self.chunk_size = chunk_size
+        self.chunks = 0
+        self.records = 0
+        self.output_bytes = 0
+
+    def load(self) -> bool:
+        if not self.path.exists():
+            return False
+        state = json.loads(self.path.read_text())
+        if state["input"] != self.input or state["chunk_size"] != self.chunk_size:
+            raise SystemExit(
+                f"{self.path} belongs to a different input or chunk size; "
+                "delete it or pass --restart"
+            )
+        self.chunks, self.records, self.output_bytes = state["chunks"], state["records"], state["output_bytes"]
+        return True
+
+    def save(self):
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({
+            "input": self.input,
+            "chunk_size": self.chunk_size,
+            "chunks": self.chunks,
+            "records": self.records,
+            "output_bytes": self.output_bytes
+        }))
+        os.replace(tmp, self.path)
+
+
+def run(
+    input_path: Path,
+    output_path: Path,
+    text_field: str = "text",
+    chunk_size: int = 512,
+    workers: int = 1,
+    restart: bool = False
+) -> Dict:
+    """
+    Classify input_path into output_path, resuming from its checkpoint.
+
+    workers=0 classifies in this process (no pool). Chunks are classified
+    concurrently but written in input order, so the checkpoint is a plain
+    prefix of the input.
+    """
+    checkpoint = Checkpoint(output_path.with_name(output_path.name + ".checkpoint"), input_path, chunk_size)
+    resumed = not restart and checkpoint.load()
+    if resumed:
+        console.print(f"Resuming after {checkpoint.records:,} records ({checkpoint.chunks:,} chunks)")
+
+    if resumed and not output_path.exists():
+        raise SystemExit(f"{checkpoint.path} exists but {output_path} does not; pass --restart")
+    output = open(output_path, "r+b" if resumed else "wb")
+    # drop whatever a crash left after the last complete chunk
+    output.truncate(checkpoint.output_bytes)
+    output.seek(checkpoint.output_bytes)
+
+    # finished chunks are still read (formats can't seek to a record), just not classified
+    chunks = islice(read_records(input_path, chunk_size), checkpoint.chunks, None)
+    start = time.perf_counter()
+    done = 0
+
+    def write(records: List[Dict], results: List[Dict]):
+        nonlocal done
+        lines = b"".join(
+            json.dumps({**record, **result}, ensure_ascii=False, default=str).encode() + b"\n"
+            for record, result in zip(records, results)
+        )
+        output.write(lines)
+        output.flush()
+        os.fsync(output.fileno())
+        checkpoint.chunks += 1
+        checkpoint.records += len(records)
+        checkpoint.output_bytes = output.tell()
+        checkpoint.save()
+        done += len(records)
+        elapsed = time.perf_counter() - start
+        console.print(f"{checkpoint.records:>12,} records  {done / elapsed:>10,.0f} comments/sec")
+
+    try:
+        if workers == 0:
+            _init_worker()
+            for records in chunks:
+                write(records, classify_texts([r.get(text_field) for r in records]))
+        else:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(threads,)) as pool:
+                # keep every worker busy, but never read far ahead of the writer
+                pending = deque()
+                for records in chunks:
+                    pending.append((records, pool.submit(classify_texts, [r.get(text_field) for r in records])))
+                    if len(pending) >= workers * 2:
+                        records, future = pending.popleft()
+                        write(records, future.result())
+                while pending:
+                    records, future = pending.popleft()
+                    write(records, future.result())
+    finally:
+        output.close()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "records": checkpoint.records,
+        "classified": done,
+        "seconds": round(elapsed, 2),
+        "comments_per_sec": round(done / elapsed, 1) if elapsed else 0.0
+    }
+    console.print(
+        f"Done: {done:,} classified in {elapsed:.1f}s "
+        f"({stats['comments_per_sec']:,.0f} comments/sec), {checkpoint.records:,} in {output_path}"
+    )
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Classify the sentiment of every record in a file.")
+    parser.add_argument("input", type=Path, help=".jsonl, .csv or .parquet file")
+    parser.add_argument("output", type=Path, help="JSONL file to write results to")
+    parser.add_argument("--text-field", default="text", help="field holding the comment text (default: text)")
+    parser.add_argument("--chunk-size", type=int, default=512, help="records per chunk (default: 512)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="worker processes, each loading its own model (~0.5 GB+ of RAM); "
+                             f"0 runs in-process (default: {DEFAULT_WORKERS}, one per 4 CPUs)")
+    parser.add_argument("--restart", action="store_true", help="ignore any checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    if not args.input.exists():
+        parser.error(f"{args.input} does not exist")
+    run(args.input, args.output, args.text_field, args.chunk_size, args.workers, args.restart)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Interrupted; run the same command again to resume[/yellow]")
+        sys.exit(130)
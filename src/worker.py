@@ -0,0 +1,84 @@
+"""
+Analysis worker: consumes jobs queued by POST /api/v1/jobs.
+
+    python -m src.worker
+
+Run as many as needed, on any host that reaches the same Redis. Each one
+processes a job at a time and writes the result to the analysis cache,
+where GET /api/v1/jobs/{id}/result and POST /api/v1/analyze find it.
+"""
+import asyncio
+import signal
+from typing import Dict
+from src.api.routes.analyze import (
+    youtube_service,
+    analyzer_service,
+    cache_service,
+    single_flight,
+    store_analysis
+)
+from src.services.singleflight import ComputeFailed
+from src.schemas.requests import job_request
+from src.services.jobs import JobQueue, JobWorker, PermanentJobError, Reporter
+from src.core.redis import close_redis
+
+
+async def analyze_job(job: Dict, report: Reporter) -> str:
+    """Run the analysis pipeline for a job; returns the cache key of the result."""
+    video_id = job["params"]["video_id"]
+    request = job_request(job["params"])
+    sample = request.sample_spec()
+    cache_key = cache_service.generate_analysis_key(
+        video_id,
+        request.max_comments,
+        request.include_replies,
+        sample
+    )
+
+    async def compute() -> bytes:
+        await report(0.05, "fetching")
+        try:
+            comments_data = await youtube_service.get_comments(
+                video_id,
+                request.max_comments,
+                request.include_replies
+            )
+        except ValueError as e:
+            raise PermanentJobError(str(e))
+
+        await report(0.4, "analyzing")
+        if sample:
+            result = await analyzer_service.estimate_comments(video_id, comments_data["comments"], *sample)
+        else:
+            result = await analyzer_service.analyze_comments(
+                video_id=video_id,
+                comments=comments_data["comments"]
+            )
+
+        await report(0.9, "caching")
+        return await store_analysis(cache_key, result)
+
+    # an API node (or another job) may already be computing the same key
+    try:
+        await single_flight.run(cache_key, compute)
+    except ComputeFailed as e:
+        if e.status_code == 404:
+            raise PermanentJobError(e.detail)
+        raise
+    return cache_key
+
+
+async def main():
+    worker = JobWorker(JobQueue(), analyze_job)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    print(f"Worker {worker.worker_id} waiting for jobs")
+    try:
+        await worker.run()
+    finally:
+        await close_redis()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
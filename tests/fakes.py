@@ -0,0 +1,213 @@
+"""
+In-memory stand-in for the redis.asyncio client, for tests that need Redis
+semantics (lists, hashes, sets, expiry) without a server.
+
+Only the commands the services use are implemented, with decode_responses
+behaviour: values are stored and returned as str, except that bytes given to
+SET come back as bytes.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: Dict[str, object] = {}
+        self.expires_at: Dict[str, float] = {}
+        self.published: List[tuple] = []
+
+    def _live(self, key: str):
+        expires_at = self.expires_at.get(key)
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self.data.pop(key, None)
+            self.expires_at.pop(key, None)
+        return self.data.get(key)
+
+    def _container(self, key: str, kind):
+        value = self._live(key)
+        if value is None:
+            value = self.data[key] = kind()
+        return value
+
+    def _drop_if_empty(self, key: str):
+        if key in self.data and not self.data[key]:
+            del self.data[key]
+            self.expires_at.pop(key, None)
+
+    # ── keys ──
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._live(key)
+
+    async def set(self, key: str, value, ex: int = None, px: int = None, nx: bool = False):
+        if nx and self._live(key) is not None:
+            return None
+        # bytes stay bytes, as for a client without decode_responses (CacheService)
+        self.data[key] = value if isinstance(value, bytes) else str(value)
+        self.expires_at.pop(key, None)
+        if ex or px:
+            self.expires_at[key] = time.monotonic() + (ex if ex else px / 1000)
+        return True
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [self._live(key) for key in keys]
+
+    async def exists(self, *keys: str) -> int:
+        return sum(self._live(key) is not None for key in keys)
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self._live(key) is not None:
+                del self.data[key]
+                deleted += 1
+            self.expires_at.pop(key, None)
+        return deleted
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if self._live(key) is None:
+            return False
+        self.expires_at[key] = time.monotonic() + seconds
+        return True
+
+    # ── hashes ──
+
+    async def hset(self, key: str, field=None, value=None, mapping: Dict = None) -> int:
+        values = dict(mapping or {})
+        if field is not None:
+            values[field] = value
+        h = self._container(key, dict)
+        added = sum(f not in h for f in values)
+        h.update({f: str(v) for f, v in values.items()})
+        return added
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        return dict(self._live(key) or {})
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        h = self._container(key, dict)
+        h[field] = str(int(h.get(field, 0)) + amount)
+        return int(h[field])
+
+    # ── lists ──
+
+    async def lpush(self, key: str, *values) -> int:
+        items = self._container(key, deque)
+        for value in values:
+            items.appendleft(str(value))
+        return len(items)
+
+    async def rpush(self, key: str, *values) -> int:
+        items = self._container(key, deque)
+        items.extend(str(v) for v in values)
+        return len(items)
+
+    async def llen(self, key: str) -> int:
+        return len(self._live(key) or ())
+
+    async def lrange(self, key: str, start: int, end: int):
+        items = list(self._live(key) or ())
+        return items[start:None if end == -1 else end + 1]
+
+    async def lrem(self, key: str, count: int, value) -> int:
+        items = self._live(key)
+        if not items:
+            return 0
+        kept = [v for v in items if v != str(value)]
+        removed = len(items) - len(kept)
+        self.data[key] = deque(kept)
+        self._drop_if_empty(key)
+        return removed
+
+    async def lmove(self, first_list: str, second_list: str, src: str = "LEFT", dest: str = "RIGHT"):
+        items = self._live(first_list)
+        if not items:
+            return None
+        value = items.popleft() if src == "LEFT" else items.pop()
+        self._drop_if_empty(first_list)
+        target = self._container(second_list, deque)
+        target.appendleft(value) if dest == "LEFT" else target.append(value)
+        return value
+
+    async def blmove(self, first_list: str, second_list: str, timeout: float, src: str = "LEFT", dest: str = "RIGHT"):
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            value = await self.lmove(first_list, second_list, src, dest)
+            if value is not None or (deadline is not None and time.monotonic() >= deadline):
+                return value
+            await asyncio.sleep(0.001)
+
+    # ── sets ──
+
+    async def sadd(self, key: str, *members) -> int:
+        s = self._container(key, set)
+        added = len({str(m) for m in members} - s)
+        s.update(str(m) for m in members)
+        return added
+
+    async def srem(self, key: str, *members) -> int:
+        s = self._live(key) or set()
+        removed = len(s & {str(m) for m in members})
+        s.difference_update(str(m) for m in members)
+        self._drop_if_empty(key)
+        return removed
+
+    async def smembers(self, key: str):
+        return set(self._live(key) or ())
+
+    # ── counters ──
+
+    async def incr(self, key: str) -> int:
+        value = int(self._live(key) or 0) + 1
+        self.data[key] = str(value)
+        return value
+
+    # ── server ──
+
+    async def flushdb(self) -> bool:
+        self.data.clear()
+        self.expires_at.clear()
+        return True
+
+    async def publish(self, channel: str, message) -> int:
+        self.published.append((channel, message))
+        return 0
+
+    def pipeline(self, transaction: bool = False) -> "FakePipeline":
+        return FakePipeline(self)
+
+    async def aclose(self):
+        pass
+
+
+class FakePipeline:
+    """Queues commands and runs them in order on execute()."""
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, command: str):
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self, raise_on_error: bool = True):
+        results = []
+        for command, args, kwargs in self.commands:
+            try:
+                results.append(await getattr(self.redis, command)(*args, **kwargs))
+            except Exception as e:
+                if raise_on_error:
+                    raise
+                results.append(e)
+        self.commands = []
+        return results
@@ -1,6 +1,10 @@
 from fastapi import status
 from unittest.mock import AsyncMock, patch, MagicMock
 import pytest
+import asyncio
+import gzip
+from src.api.serialization import encode_body
+from src.services.codec import EncodedBody
 
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
@@ -43,22 +47,27 @@ MOCK_ANALYSIS_RESULT = {
 }
 
 
-# ── Shared fixture: mock the Redis client that dependencies.py holds ──────────
+# ── Shared fixture: mock the Redis clients the API modules hold ──────────────
 #
-# dependencies.py does `cache_service = CacheService()` at module level.
-# Patching the attribute on that already-created instance is the only reliable
-# way to intercept calls — patching the class constructor is too late.
+# dependencies.py and analyze.py each do `cache_service = CacheService()` at
+# module level. Patching the attribute on those already-created instances is
+# the only reliable way to intercept calls — patching the class constructor
+# is too late.
 
 @pytest.fixture
 def mock_redis():
     """
-    Patch the redis_server on the module-level cache_service singleton
-    that the rate_limiter dependency uses.
+    Patch the redis_server on the module-level singletons used by the
+    rate_limiter dependency and the single-flight lock.
     """
     mock = MagicMock()
-    mock.incr = AsyncMock(return_value=1)
-    mock.expire = AsyncMock(return_value=True)
-    with patch("src.api.dependencies.cache_service.redis_server", mock):
+    mock.evalsha = AsyncMock(return_value=[1, 9, 0])  # rate limiter: allowed, remaining, retry ms
+    mock.set = AsyncMock(return_value=True)
+    mock.eval = AsyncMock(return_value=1)
+    with (
+        patch("src.api.dependencies.limiter.redis_server", mock),
+        patch("src.api.routes.analyze.cache_service.redis_server", mock),
+    ):
         yield mock
 
 
@@ -133,8 +142,8 @@ class TestAnalyzeSuccess:
     def mock_all(self, mock_redis):
         """Patch all external I/O so tests are fast and deterministic."""
         with (
-            patch("src.api.routes.analyze.cache_service.get", new_callable=AsyncMock, return_value=None),
-            patch("src.api.routes.analyze.cache_service.set", new_callable=AsyncMock, return_value=True),
+            patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=None),
+            patch("src.api.routes.analyze.cache_service.set_many", new_callable=AsyncMock, return_value=True),
             patch(
                 "src.api.routes.analyze.youtube_service.get_comments",
                 new_callable=AsyncMock,
@@ -152,6 +161,64 @@ class TestAnalyzeSuccess:
         response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
         assert response.status_code == status.HTTP_200_OK
 
+    def test_request_shows_in_metrics(self, client):
+        client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        response = client.get("/metrics")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'analysis_stage_seconds_count{stage="rate_limit"}' in response.text
+        assert 'analysis_stage_seconds_count{stage="serialize"}' in response.text
+        assert 'http_request_duration_seconds_count{route="/api/v1/analyze",status="200"}' in response.text
+        assert "http_requests_in_flight 1" in response.text     # the scrape itself
+
+    def test_server_timing_header(self, client):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        server_timing = response.headers["server-timing"]
+        assert server_timing.startswith("rate_limit;dur=")
+        assert "serialize;dur=" in server_timing
+        assert server_timing.split(", ")[-1].startswith("total;dur=")
+        assert "timings" not in response.json()
+
+    def test_timings_block_on_request(self, client):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL, "include_timings": True})
+        timings = response.json()["timings"]
+        assert {"rate_limit", "serialize"} <= set(timings["stages"])
+        assert timings["stages"]["rate_limit"]["count"] == 1
+        assert timings["total_ms"] >= timings["stages"]["serialize"]["ms"]
+
+    def test_overload_returns_503_with_retry_after(self, client):
+        from src.services.admission import AdmissionController
+        full = AdmissionController(max_active=10, max_queued=0)
+        full.active = 10
+        with patch("src.api.routes.analyze.admission", full):
+            response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+            stats = client.get("/admission/stats").json()
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert int(response.headers["retry-after"]) >= 1
+        assert stats["rejected"] == 1
+
+    def test_admission_released_after_analysis(self, client):
+        client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        stats = client.get("/admission/stats").json()
+        assert stats["active_comments"] == stats["queued_comments"] == 0
+        assert stats["admitted"] >= 1
+
+    def test_serialization_runs_on_the_cpu_pool(self, client):
+        before = client.get("/executors/stats").json()["cpu"]["completed"]
+        client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        stats = client.get("/executors/stats").json()
+        assert stats["cpu"]["completed"] > before
+        assert set(stats) == {"network", "cpu", "inference", "replies"}
+
+    def test_metrics_use_route_templates(self, client):
+        from tests.fakes import FakeRedis
+        with patch("src.api.routes.jobs.job_queue.redis_server", FakeRedis()):
+            client.get("/api/v1/jobs/not-a-job")
+        client.get("/no/such/page")
+        response = client.get("/metrics")
+        assert 'route="/api/v1/jobs/{job_id}"' in response.text
+        assert 'route="unmatched",status="404"' in response.text
+
     def test_response_shape(self, client):
         response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
         data = response.json()
@@ -181,6 +248,19 @@ class TestAnalyzeSuccess:
         response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
         assert response.json()["source"] == "api"
 
+    def test_cache_stores_encoded_body(self, client):
+        from src.api.routes.analyze import cache_service
+        client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        stored = cache_service.set_many.await_args.args[0]
+        assert stored[f"analysis:{{{VALID_VIDEO_ID}}}:1000"] == encode_body(MOCK_ANALYSIS_RESULT)
+        assert b'"comments"' not in stored[f"analysis:{{{VALID_VIDEO_ID}}}:1000:summary"]
+
+    def test_summary_request_on_miss(self, client):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL, "include_comments": False})
+        data = response.json()
+        assert "comments" not in data
+        assert data["cached"] is False
+
     def test_default_max_comments_accepted(self, client):
         """Omitting max_comments should use the default and not error."""
         response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
@@ -194,14 +274,145 @@ class TestAnalyzeSuccess:
         assert response.status_code == status.HTTP_200_OK
 
 
+# ── /api/v1/analyze — deadline_ms ────────────────────────────────────────────
+
+class TestAnalyzeDeadline:
+
+    @pytest.fixture(autouse=True)
+    def mock_all(self, mock_redis):
+        comments = MOCK_ANALYSIS_RESULT["comments"]
+
+        async def slow_page(*args):
+            await asyncio.sleep(0.06)
+            return {"comments": comments, "next_page_token": "more"}
+
+        with (
+            patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=None),
+            patch("src.api.routes.analyze.cache_service.get", new_callable=AsyncMock, return_value=None) as get,
+            patch("src.api.routes.analyze.cache_service.set", new_callable=AsyncMock, return_value=True) as set_,
+            patch("src.api.routes.analyze.cache_service.set_many", new_callable=AsyncMock, return_value=True) as set_many,
+            patch("src.api.routes.analyze.youtube_service.get_comment_page", side_effect=slow_page) as page,
+            patch(
+                "src.api.routes.analyze.analyzer_service.enrich",
+                new_callable=AsyncMock,
+                return_value=(comments, 2),
+            ),
+        ):
+            self.get, self.set, self.set_many, self.page = get, set_, set_many, page
+            yield
+
+    def test_partial_result_within_budget(self, client):
+        response = client.post(
+            "/api/v1/analyze",
+            json={"video_url": VALID_URL, "max_comments": 1000, "deadline_ms": 100}     # room for one page
+        )
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["complete"] is False
+        assert data["coverage"]["comments"] == data["total_comments"] == 2
+        assert data["coverage"]["resumed_from"] == 0
+        # only the progress is cached, not the analysis
+        key, state = self.set.await_args.args
+        assert key.endswith(":partial")
+        assert state["next_page_token"] == "more"
+        self.set_many.assert_not_awaited()
+
+    def test_complete_result_is_cached_as_an_analysis(self, client):
+        response = client.post(
+            "/api/v1/analyze",
+            json={"video_url": VALID_URL, "max_comments": 2, "deadline_ms": 5000}
+        )
+        data = response.json()
+        assert data["complete"] is True
+        assert data["coverage"]["ratio"] == 1.0
+        self.set_many.assert_awaited_once()
+
+    def test_concurrent_extension_answers_from_stored_progress(self, client, mock_redis):
+        mock_redis.set.return_value = False      # another call holds the partial's lease
+        self.get.return_value = {
+            "comments": MOCK_ANALYSIS_RESULT["comments"], "valid": 2,
+            "next_page_token": "more", "pages": 1, "complete": False
+        }
+        response = client.post(
+            "/api/v1/analyze",
+            json={"video_url": VALID_URL, "max_comments": 1000, "deadline_ms": 100}
+        )
+        data = response.json()
+        assert data["complete"] is False
+        assert data["coverage"]["resumed_from"] == data["coverage"]["comments"] == 2
+        self.page.assert_not_called()
+        self.set.assert_not_awaited()
+
+    def test_deadline_with_replies_returns_422(self, client):
+        response = client.post(
+            "/api/v1/analyze",
+            json={"video_url": VALID_URL, "deadline_ms": 500, "include_replies": True}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_deadline_too_short_returns_422(self, client):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL, "deadline_ms": 5})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestAnalyzeSample:
+
+    @pytest.fixture(autouse=True)
+    def mock_all(self, mock_redis):
+        estimated = {
+            **MOCK_ANALYSIS_RESULT,
+            "sample": {
+                "sampled": 2, "population": 2, "margin_of_error": 1.0, "confidence_level": 0.9, "exact": True,
+                "sentiment_intervals": {s: {"low": 0.0, "high": 0.0} for s in ("positive", "negative", "neutral")},
+                "average_confidence_interval": {"low": 0.91, "high": 0.91},
+            },
+        }
+        with (
+            patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=None),
+            patch("src.api.routes.analyze.cache_service.set_many", new_callable=AsyncMock, return_value=True) as set_many,
+            patch(
+                "src.api.routes.analyze.youtube_service.get_comments",
+                new_callable=AsyncMock,
+                return_value={"comments": MOCK_ANALYSIS_RESULT["comments"], "total": 2},
+            ),
+            patch(
+                "src.api.routes.analyze.analyzer_service.estimate_comments",
+                new_callable=AsyncMock,
+                return_value=estimated,
+            ) as estimate,
+        ):
+            self.set_many, self.estimate = set_many, estimate
+            yield
+
+    def test_sample_mode_returns_the_estimate(self, client):
+        response = client.post(
+            "/api/v1/analyze",
+            json={"video_url": VALID_URL, "mode": "sample", "margin_of_error": 1, "confidence_level": 0.9}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["sample"]["sampled"] == 2
+        assert self.estimate.await_args.args[2:] == (1.0, 0.9)
+        # cached apart from full analyses of the same video
+        assert f"analysis:{{{VALID_VIDEO_ID}}}:1000:sample:1:0.9" in self.set_many.await_args.args[0]
+
+    def test_sample_with_deadline_returns_422(self, client):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL, "deadline_ms": 500, "mode": "sample"})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_unknown_mode_or_margin_returns_422(self, client):
+        for body in ({"mode": "guess"}, {"mode": "sample", "margin_of_error": 0.1}):
+            response = client.post("/api/v1/analyze", json={"video_url": VALID_URL, **body})
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 # ── /api/v1/analyze — Cache Hit ──────────────────────────────────────────────
 
 class TestAnalyzeCacheHit:
 
     @pytest.fixture(autouse=True)
     def mock_cache_hit(self, mock_redis):
-        cached = {**MOCK_ANALYSIS_RESULT, "cached": True, "source": "cache"}
-        with patch("src.api.routes.analyze.cache_service.get", new_callable=AsyncMock, return_value=cached):
+        cached = EncodedBody(encode_body(MOCK_ANALYSIS_RESULT), None)
+        with patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=(cached, False)):
             yield
 
     def test_cached_true_on_cache_hit(self, client):
@@ -212,6 +423,273 @@ class TestAnalyzeCacheHit:
         response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
         assert response.json()["source"] == "cache"
 
+    def test_fresh_hit_is_not_stale(self, client):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        assert response.json()["stale"] is False
+
+    def test_cache_status_header(self, client):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        assert response.headers["x-cache"] == "HIT"
+
+    def test_body_matches_analysis(self, client):
+        data = client.post("/api/v1/analyze", json={"video_url": VALID_URL}).json()
+        assert data["comments"] == MOCK_ANALYSIS_RESULT["comments"]
+        assert data["sentiment_distribution"] == MOCK_ANALYSIS_RESULT["sentiment_distribution"]
+
+    def test_legacy_dict_entries_still_served(self, client):
+        legacy = {**MOCK_ANALYSIS_RESULT, "cached": False, "source": "api"}
+        with patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=(legacy, False)):
+            data = client.post("/api/v1/analyze", json={"video_url": VALID_URL}).json()
+        assert data["cached"] is True
+        assert data["source"] == "cache"
+
+
+class TestAnalyzeStaleHit:
+
+    @pytest.fixture(autouse=True)
+    def mock_stale_hit(self, mock_redis):
+        cached = EncodedBody(encode_body(MOCK_ANALYSIS_RESULT), None)
+        with (
+            patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=(cached, True)),
+            patch("src.api.routes.analyze.single_flight.refresh") as refresh,
+        ):
+            self.refresh = refresh
+            yield
+
+    def test_stale_entry_is_served_and_marked(self, client):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["stale"] is True
+        assert response.json()["cached"] is True
+        assert response.headers["x-cache"] == "STALE"
+
+    def test_stale_entry_schedules_refresh(self, client):
+        client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        self.refresh.assert_called_once()
+        assert self.refresh.call_args.args[0] == f"analysis:{{{VALID_VIDEO_ID}}}:1000"
+
+
+# ── /api/v1/analyze — Response Compression ───────────────────────────────────
+
+LARGE_ANALYSIS_RESULT = {
+    **MOCK_ANALYSIS_RESULT,
+    "comments": MOCK_ANALYSIS_RESULT["comments"] * 200,
+}
+
+
+class TestAnalyzeCompression:
+
+    def test_stored_gzip_body_sent_without_recompressing(self, client, mock_redis):
+        stored = EncodedBody(gzip.compress(encode_body(LARGE_ANALYSIS_RESULT)), "gzip")
+        with (
+            patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=(stored, False)),
+            patch("src.api.routes.analyze.encode_for") as encode_for,
+        ):
+            response = client.post(
+                "/api/v1/analyze",
+                json={"video_url": VALID_URL},
+                headers={"Accept-Encoding": "gzip"},
+            )
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["cached"] is True
+        assert len(response.json()["comments"]) == 400
+        encode_for.assert_not_called()
+
+    def test_timings_on_a_stored_body(self, client, mock_redis):
+        stored = EncodedBody(gzip.compress(encode_body(LARGE_ANALYSIS_RESULT)), "gzip")
+        with patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=(stored, False)):
+            response = client.post(
+                "/api/v1/analyze",
+                json={"video_url": VALID_URL, "include_timings": True},
+                headers={"Accept-Encoding": "gzip"},
+            )
+        data = response.json()
+        assert "rate_limit" in data["timings"]["stages"]
+        assert len(data["comments"]) == 400
+        assert data["cached"] is True
+
+    def test_stored_body_decompressed_for_identity_clients(self, client, mock_redis):
+        stored = EncodedBody(gzip.compress(encode_body(LARGE_ANALYSIS_RESULT)), "gzip")
+        with patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=(stored, False)):
+            response = client.post(
+                "/api/v1/analyze",
+                json={"video_url": VALID_URL},
+                headers={"Accept-Encoding": "identity"},
+            )
+        assert "content-encoding" not in response.headers
+        assert len(response.json()["comments"]) == 400
+
+    def test_fresh_response_is_compressed(self, client, mock_redis):
+        with (
+            patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=None),
+            patch("src.api.routes.analyze.cache_service.set_many", new_callable=AsyncMock, return_value=True),
+            patch("src.api.routes.analyze.youtube_service.get_comments", new_callable=AsyncMock, return_value={"comments": [], "total": 0}),
+            patch(
+                "src.api.routes.analyze.analyzer_service.analyze_comments",
+                new_callable=AsyncMock,
+                return_value=LARGE_ANALYSIS_RESULT.copy(),
+            ),
+        ):
+            response = client.post(
+                "/api/v1/analyze",
+                json={"video_url": VALID_URL},
+                headers={"Accept-Encoding": "gzip"},
+            )
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.json()["cached"] is False
+
+    def test_small_bodies_are_not_compressed(self, client, mock_redis):
+        stored = EncodedBody(encode_body(MOCK_ANALYSIS_RESULT), None)
+        with patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=(stored, False)):
+            response = client.post(
+                "/api/v1/analyze",
+                json={"video_url": VALID_URL},
+                headers={"Accept-Encoding": "gzip"},
+            )
+        assert "content-encoding" not in response.headers
+
+
+# ── /api/v1/analyze — Projection ─────────────────────────────────────────────
+
+SUMMARY = {k: v for k, v in MOCK_ANALYSIS_RESULT.items() if k != "comments"}
+
+
+class TestAnalyzeProjection:
+
+    @pytest.fixture
+    def cache_entries(self, mock_redis):
+        """Serve the summary and full bodies from their own keys."""
+        entries = {
+            f"analysis:{{{VALID_VIDEO_ID}}}:1000": EncodedBody(encode_body(MOCK_ANALYSIS_RESULT), None),
+            f"analysis:{{{VALID_VIDEO_ID}}}:1000:summary": EncodedBody(encode_body(SUMMARY), None),
+        }
+
+        async def get_entry(key):
+            return (entries[key], False) if key in entries else None
+
+        with patch("src.api.routes.analyze.cache_service.get_entry", side_effect=get_entry) as mock:
+            yield mock
+
+    def test_summary_only_reads_summary_key(self, client, cache_entries):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL, "include_comments": False})
+        data = response.json()
+        assert "comments" not in data
+        assert data["sentiment_distribution"] == MOCK_ANALYSIS_RESULT["sentiment_distribution"]
+        assert cache_entries.call_args.args[0].endswith(":summary")
+
+    def test_field_selection(self, client, cache_entries):
+        response = client.post(
+            "/api/v1/analyze",
+            json={"video_url": VALID_URL, "fields": ["overall_sentiment", "average_confidence"]},
+        )
+        assert response.json() == {
+            "overall_sentiment": "positive",
+            "average_confidence": 0.91,
+            "cached": True,
+            "source": "cache",
+            "stale": False,
+        }
+
+    def test_field_selection_with_comments_reads_full_entry(self, client, cache_entries):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL, "fields": ["comments"]})
+        assert len(response.json()["comments"]) == 2
+        assert not cache_entries.call_args.args[0].endswith(":summary")
+
+    @pytest.mark.parametrize("body", [
+        {"fields": ["coverage"]},
+        {"fields": ["sample"], "include_timings": True},
+        {"fields": ["comments"], "include_comments": False},
+    ])
+    def test_fields_missing_from_the_analysis_give_an_empty_object(self, client, cache_entries, body):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL, **body})
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert {k: data[k] for k in ("cached", "source", "stale")} == {"cached": True, "source": "cache", "stale": False}
+        assert set(data) <= {"cached", "source", "stale", "timings"}
+
+    def test_field_missing_from_an_old_dict_entry(self, client, mock_redis):
+        with patch(
+            "src.api.routes.analyze.cache_service.get_entry",
+            new_callable=AsyncMock,
+            return_value=(dict(MOCK_ANALYSIS_RESULT), False),
+        ):
+            response = client.post("/api/v1/analyze", json={"video_url": VALID_URL, "fields": ["analytics"]})
+        assert response.json() == {"cached": True, "source": "cache", "stale": False}
+
+    def test_unknown_field_returns_422(self, client, mock_redis):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL, "fields": ["nope"]})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+# ── /api/v1/analysis/{video_id}/comments ─────────────────────────────────────
+
+class TestCommentPages:
+
+    @pytest.fixture(autouse=True)
+    def cached_analysis(self, mock_redis):
+        comments = [
+            {**MOCK_ANALYSIS_RESULT["comments"][i % 2], "like_count": i, "author": f"User{i}"}
+            for i in range(25)
+        ]
+        body = gzip.compress(encode_body({**MOCK_ANALYSIS_RESULT, "comments": comments}))
+        with patch(
+            "src.api.routes.comments.cache_service.get_entry",
+            new_callable=AsyncMock,
+            return_value=(EncodedBody(body, "gzip"), False),
+        ) as get_entry:
+            from src.api.routes.comments import comments_cache
+            comments_cache.clear()
+            self.get_entry = get_entry
+            yield
+
+    def url(self, **params):
+        query = "&".join(f"{k}={v}" for k, v in params.items())
+        return f"/api/v1/analysis/{VALID_VIDEO_ID}/comments?{query}"
+
+    def test_pages_through_all_comments(self, client):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+            page = client.get(self.url(**params)).json()
+            seen.extend(c["author"] for c in page["comments"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == [f"User{i}" for i in range(25)]
+
+    def test_filters_by_sentiment_and_confidence(self, client):
+        page = client.get(self.url(sentiment="negative", min_confidence=0.8)).json()
+        assert page["total"] == 12
+        assert all(c["sentiment"] == "negative" for c in page["comments"])
+
+    def test_sorts_by_like_count(self, client):
+        page = client.get(self.url(sort="like_count", limit=3)).json()
+        assert [c["like_count"] for c in page["comments"]] == [24, 23, 22]
+
+    def test_cursor_from_other_query_is_rejected(self, client):
+        cursor = client.get(self.url(limit=5)).json()["next_cursor"]
+        response = client.get(self.url(limit=5, sort="like_count", cursor=cursor))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_cursor_from_before_a_refresh_is_rejected(self, client):
+        from src.api.routes.analyze import cache_service
+        cursor = client.get(self.url(limit=5)).json()["next_cursor"]
+
+        refreshed = encode_body({**MOCK_ANALYSIS_RESULT, "processing_time_ms": 99})
+        self.get_entry.return_value = (EncodedBody(refreshed, None), False)
+        # another worker rewrote the analysis
+        cache_service._handle_invalidation(f"other-worker analysis:{{{VALID_VIDEO_ID}}}:1000")
+
+        response = client.get(self.url(limit=5, cursor=cursor))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get(self.url(limit=5)).json()["total"] == 2
+
+    def test_uncached_analysis_returns_404(self, client):
+        with patch("src.api.routes.comments.cache_service.get_entry", new_callable=AsyncMock, return_value=None):
+            response = client.get(f"/api/v1/analysis/{VALID_VIDEO_ID}/comments?max_comments=5")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
 
 # ── /api/v1/analyze — Upstream Errors ────────────────────────────────────────
 
@@ -219,7 +697,7 @@ class TestAnalyzeErrors:
 
     def test_youtube_video_not_found_returns_404(self, client, mock_redis):
         with (
-            patch("src.api.routes.analyze.cache_service.get", new_callable=AsyncMock, return_value=None),
+            patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=None),
             patch(
                 "src.api.routes.analyze.youtube_service.get_comments",
                 new_callable=AsyncMock,
@@ -229,9 +707,22 @@ class TestAnalyzeErrors:
             response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
             assert response.status_code == status.HTTP_404_NOT_FOUND
 
+    def test_failure_on_another_worker_is_returned_to_waiters(self, client, mock_redis):
+        import json
+        mock_redis.set.return_value = False     # another worker holds the lock
+        mock_redis.get = AsyncMock(return_value=json.dumps({"status_code": 404, "detail": "Video not found: x"}))
+        with (
+            patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=None),
+            patch("src.api.routes.analyze.youtube_service.get_comments", new_callable=AsyncMock) as get_comments,
+        ):
+            response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()["detail"] == "Video not found: x"
+        get_comments.assert_not_awaited()
+
     def test_youtube_api_failure_returns_503(self, client, mock_redis):
         with (
-            patch("src.api.routes.analyze.cache_service.get", new_callable=AsyncMock, return_value=None),
+            patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=None),
             patch(
                 "src.api.routes.analyze.youtube_service.get_comments",
                 new_callable=AsyncMock,
@@ -243,7 +734,7 @@ class TestAnalyzeErrors:
 
     def test_analyzer_failure_returns_500(self, client, mock_redis):
         with (
-            patch("src.api.routes.analyze.cache_service.get", new_callable=AsyncMock, return_value=None),
+            patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=None),
             patch(
                 "src.api.routes.analyze.youtube_service.get_comments",
                 new_callable=AsyncMock,
@@ -259,22 +750,260 @@ class TestAnalyzeErrors:
             assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
 
 
+# ── /api/v1/classify ─────────────────────────────────────────────────────────
+
+class TestClassify:
+
+    def test_returns_results_in_input_order(self, client, mock_redis):
+        with patch(
+            "src.api.routes.classify.batcher.fn",
+            side_effect=lambda texts: [
+                {"label": "negative" if "terrible" in t else "positive", "confidence": 0.9} for t in texts
+            ],
+        ) as model:
+            response = client.post("/api/v1/classify", json={"texts": ["Great!", "!", "Terrible 😡"]})
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["results"]
+        assert [r["sentiment"] for r in results] == ["positive", "neutral", "negative"]
+        assert results[1]["confidence"] == 0.0
+        # the text too short to classify never reaches the model
+        assert model.call_args.args[0] == ["great!", "terrible enraged_face"]
+
+    def test_empty_texts_returns_422(self, client, mock_redis):
+        response = client.post("/api/v1/classify", json={"texts": []})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_too_many_texts_returns_422(self, client, mock_redis):
+        from src.core.config import get_settings
+        texts = ["ok"] * (get_settings().CLASSIFY_MAX_TEXTS + 1)
+        response = client.post("/api/v1/classify", json={"texts": texts})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+# ── /api/v1/jobs ─────────────────────────────────────────────────────────────
+
+class TestJobs:
+
+    @pytest.fixture(autouse=True)
+    def job_env(self, mock_redis):
+        """Jobs on a Redis stand-in, the analysis cache on a dict."""
+        from tests.fakes import FakeRedis
+        store = {}
+
+        async def cache_set_many(items, expire=None):
+            store.update({key: EncodedBody(bytes(value), None) for key, value in items.items()})
+            return True
+
+        async def cache_get_entry(key):
+            return (store[key], False) if key in store else None
+
+        with (
+            patch("src.api.routes.jobs.job_queue.redis_server", FakeRedis()),
+            patch("src.api.routes.analyze.cache_service.set_many", side_effect=cache_set_many),
+            patch("src.api.routes.analyze.cache_service.get_entry", side_effect=cache_get_entry),
+            patch(
+                "src.api.routes.analyze.youtube_service.get_comments",
+                new_callable=AsyncMock,
+                return_value={"comments": MOCK_ANALYSIS_RESULT["comments"], "total": 2},
+            ) as get_comments,
+            patch(
+                "src.api.routes.analyze.analyzer_service.analyze_comments",
+                new_callable=AsyncMock,
+                return_value=MOCK_ANALYSIS_RESULT,
+            ),
+        ):
+            self.store = store
+            self.get_comments = get_comments
+            yield
+
+    def run_worker_once(self):
+        import asyncio
+        from src.api.routes.jobs import job_queue
+        from src.services.jobs import JobWorker
+        from src.worker import analyze_job
+        worker = JobWorker(job_queue, analyze_job, worker_id="test")
+        worker.poll_timeout = 0.01
+        return asyncio.run(worker.run_once())
+
+    def test_create_job_returns_202_and_queues(self, client):
+        response = client.post("/api/v1/jobs", json={"video_url": VALID_URL})
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job = response.json()
+        assert job["status"] == "queued"
+        assert job["video_id"] == VALID_VIDEO_ID
+        assert job["result_url"] is None
+
+    def test_cached_analysis_creates_finished_job(self, client):
+        self.store[f"analysis:{{{VALID_VIDEO_ID}}}:1000"] = EncodedBody(encode_body(MOCK_ANALYSIS_RESULT), None)
+        job = client.post("/api/v1/jobs", json={"video_url": VALID_URL}).json()
+        assert job["status"] == "done"
+        assert job["result_url"] == f"/api/v1/jobs/{job['job_id']}/result"
+
+    def test_unknown_job_returns_404(self, client):
+        assert client.get("/api/v1/jobs/nope").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_result_before_done_returns_409(self, client):
+        job = client.post("/api/v1/jobs", json={"video_url": VALID_URL}).json()
+        response = client.get(f"/api/v1/jobs/{job['job_id']}/result")
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_worker_runs_job_and_result_is_served(self, client):
+        job = client.post("/api/v1/jobs", json={"video_url": VALID_URL, "max_comments": 50}).json()
+        self.run_worker_once()
+
+        status_data = client.get(f"/api/v1/jobs/{job['job_id']}").json()
+        assert status_data["status"] == "done"
+        assert status_data["progress"] == 1.0
+        assert f"analysis:{{{VALID_VIDEO_ID}}}:50" in self.store
+
+        result = client.get(status_data["result_url"])
+        assert result.status_code == status.HTTP_200_OK
+        assert result.json()["comments"] == MOCK_ANALYSIS_RESULT["comments"]
+        assert result.json()["cached"] is True
+
+    def test_result_respects_job_projection(self, client):
+        job = client.post(
+            "/api/v1/jobs",
+            json={"video_url": VALID_URL, "include_comments": False, "fields": ["overall_sentiment"]},
+        ).json()
+        self.run_worker_once()
+        data = client.get(f"/api/v1/jobs/{job['job_id']}/result").json()
+        assert data == {"overall_sentiment": "positive", "cached": True, "source": "cache", "stale": False}
+
+    def test_sample_job_runs_a_sample_analysis(self, client):
+        self.store[f"analysis:{{{VALID_VIDEO_ID}}}:1000"] = EncodedBody(encode_body(MOCK_ANALYSIS_RESULT), None)
+        job = client.post("/api/v1/jobs", json={"video_url": VALID_URL, "mode": "sample"}).json()
+        assert job["status"] == "queued"     # the cached full analysis is not a sample
+
+        with patch(
+            "src.api.routes.analyze.analyzer_service.estimate_comments",
+            new_callable=AsyncMock,
+            return_value=MOCK_ANALYSIS_RESULT,
+        ) as estimate:
+            self.run_worker_once()
+        assert estimate.await_args.args[2:] == (2.0, 0.95)
+        assert f"analysis:{{{VALID_VIDEO_ID}}}:1000:sample:2:0.95" in self.store
+
+    def test_result_of_a_job_queued_before_newer_fields(self, client):
+        from src.api.routes.jobs import job_queue
+        self.store[f"analysis:{{{VALID_VIDEO_ID}}}:1000"] = EncodedBody(encode_body(MOCK_ANALYSIS_RESULT), None)
+        params = {"video_id": VALID_VIDEO_ID, "video_url": VALID_URL, "max_comments": 1000,
+                  "include_replies": False, "include_comments": True, "fields": None}
+        job = asyncio.run(job_queue.enqueue(params, result_key=f"analysis:{{{VALID_VIDEO_ID}}}:1000"))
+        response = client.get(f"/api/v1/jobs/{job['id']}/result")
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_deadline_is_rejected_for_jobs(self, client):
+        response = client.post("/api/v1/jobs", json={"video_url": VALID_URL, "deadline_ms": 500})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_worker_runs_a_job_queued_with_older_params(self, client):
+        from src.api.routes.jobs import job_queue
+        params = {"video_id": VALID_VIDEO_ID, "video_url": VALID_URL, "max_comments": 50}
+        job = asyncio.run(job_queue.enqueue(params))
+        self.run_worker_once()
+
+        assert client.get(f"/api/v1/jobs/{job['id']}").json()["status"] == "done"
+        assert f"analysis:{{{VALID_VIDEO_ID}}}:50" in self.store
+
+    def test_missing_video_fails_without_retry(self, client):
+        self.get_comments.side_effect = ValueError("Video not found")
+        job = client.post("/api/v1/jobs", json={"video_url": VALID_URL}).json()
+        self.run_worker_once()
+
+        data = client.get(f"/api/v1/jobs/{job['job_id']}").json()
+        assert data["status"] == "failed"
+        assert data["error"] == "Video not found"
+        assert data["attempts"] == 1
+
+
+# ── Profiling (/admin/profiles) ──────────────────────────────────────────────
+
+class TestProfiling:
+
+    @pytest.fixture(autouse=True)
+    def profiling_env(self, mock_redis, tmp_path):
+        with (
+            patch("src.api.dependencies.settings.ADMIN_TOKEN", "s3cret"),
+            patch("src.api.dependencies.profile_store.directory", tmp_path),
+            patch("src.api.routes.analyze.cache_service.get_entry", new_callable=AsyncMock, return_value=None),
+            patch("src.api.routes.analyze.cache_service.set_many", new_callable=AsyncMock, return_value=True),
+            patch(
+                "src.api.routes.analyze.youtube_service.get_comments",
+                new_callable=AsyncMock,
+                return_value={"comments": MOCK_ANALYSIS_RESULT["comments"], "total": 2},
+            ),
+            patch(
+                "src.api.routes.analyze.analyzer_service.analyze_comments",
+                new_callable=AsyncMock,
+                return_value=MOCK_ANALYSIS_RESULT.copy(),
+            ),
+        ):
+            yield
+
+    def test_admin_can_profile_a_request(self, client):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL}, headers={"X-Profile": "s3cret"})
+        assert response.status_code == status.HTTP_200_OK
+        name = response.headers["x-profile-id"]
+
+        listed = client.get("/admin/profiles", headers={"X-Admin-Token": "s3cret"}).json()
+        assert [p["name"] for p in listed] == [name]
+        download = client.get(f"/admin/profiles/{name}", headers={"X-Admin-Token": "s3cret"})
+        assert download.status_code == status.HTTP_200_OK
+        assert download.headers["content-type"].startswith("text/plain")
+
+    def test_wrong_token_is_not_profiled(self, client):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL}, headers={"X-Profile": "guess"})
+        assert response.status_code == status.HTTP_200_OK
+        assert "x-profile-id" not in response.headers
+
+    def test_sample_rate_profiles_unasked(self, client):
+        with patch("src.api.dependencies.settings.PROFILE_SAMPLE_RATE", 1.0):
+            response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        assert "x-profile-id" in response.headers
+
+    def test_profiles_need_the_admin_token(self, client):
+        assert client.get("/admin/profiles").status_code == status.HTTP_403_FORBIDDEN
+        assert client.get("/admin/profiles", headers={"X-Admin-Token": "guess"}).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_unknown_profile_is_404(self, client):
+        response = client.get("/admin/profiles/nope.collapsed", headers={"X-Admin-Token": "s3cret"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_admin_routes_hidden_without_a_token_configured(self, client):
+        with patch("src.api.dependencies.settings.ADMIN_TOKEN", ""):
+            response = client.get("/admin/profiles", headers={"X-Admin-Token": ""})
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+            response = client.post("/api/v1/analyze", json={"video_url": VALID_URL}, headers={"X-Profile": ""})
+            assert "x-profile-id" not in response.headers
+
+
 # ── /api/v1/analyze — Rate Limiting ──────────────────────────────────────────
 
 class TestRateLimiting:
 
-    def test_rate_limit_exceeded_returns_429(self, client):
+    @pytest.fixture(autouse=True)
+    def limited(self):
+        from src.api.dependencies import limiter
         mock = MagicMock()
-        mock.incr = AsyncMock(return_value=11)  # limit is 10
-        mock.expire = AsyncMock(return_value=True)
-        with patch("src.api.dependencies.cache_service.redis_server", mock):
-            response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
-            assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        mock.evalsha = AsyncMock(return_value=[0, 0, 30000])  # refused, retry in 30s
+        limiter.blocked.clear()
+        with patch("src.api.dependencies.limiter.redis_server", mock):
+            self.redis = mock
+            yield
+        limiter.blocked.clear()
+
+    def test_rate_limit_exceeded_returns_429(self, client):
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
 
     def test_rate_limit_response_has_retry_after_header(self, client):
-        mock = MagicMock()
-        mock.incr = AsyncMock(return_value=11)
-        mock.expire = AsyncMock(return_value=True)
-        with patch("src.api.dependencies.cache_service.redis_server", mock):
-            response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
-            assert "retry-after" in response.headers
\ No newline at end of file
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        assert response.headers["retry-after"] == "30"
+
+    def test_refused_client_is_rejected_without_redis(self, client):
+        client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        response = client.post("/api/v1/analyze", json={"video_url": VALID_URL})
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert self.redis.evalsha.await_count == 1
@@ -0,0 +1,145 @@
+import asyncio
+import pytest
+from src.services.admission import AdmissionController, Overloaded
+
+
+async def hold(controller: AdmissionController, cost: int, order: list, release: asyncio.Event):
+    async with controller.slot(cost):
+        order.append(cost)
+        await release.wait()
+
+
+class TestAdmissionController:
+
+    def test_admits_within_capacity(self):
+        controller = AdmissionController(max_active=100, max_queued=100)
+
+        async def scenario():
+            async with controller.slot(60):
+                async with controller.slot(40):
+                    assert controller.active == 100
+            assert controller.active == 0
+
+        asyncio.run(scenario())
+        assert controller.stats()["admitted"] == 2
+
+    def test_waits_then_rejects_past_the_queue_limit(self):
+        controller = AdmissionController(max_active=100, max_queued=150)
+
+        async def scenario():
+            release = asyncio.Event()
+            order = []
+            running = asyncio.create_task(hold(controller, 100, order, release))
+            await asyncio.sleep(0)
+            waiting = asyncio.create_task(hold(controller, 100, order, release))
+            await asyncio.sleep(0)
+            assert controller.queued == 100
+            with pytest.raises(Overloaded) as rejected:
+                async with controller.slot(60):
+                    pass
+            assert rejected.value.retry_after == AdmissionController.DEFAULT_RETRY_AFTER
+            release.set()
+            await asyncio.gather(running, waiting)
+            return order
+
+        assert asyncio.run(scenario()) == [100, 100]
+        assert controller.stats()["rejected"] == 1
+        assert controller.queued == controller.active == 0
+
+    def test_small_requests_go_first(self):
+        controller = AdmissionController(max_active=100, max_queued=1000)
+
+        async def scenario():
+            gate, release = asyncio.Event(), asyncio.Event()
+            order = []
+            first = asyncio.create_task(hold(controller, 100, order, gate))
+            await asyncio.sleep(0)
+            waiters = []
+            for cost in (90, 10, 50):
+                waiters.append(asyncio.create_task(hold(controller, cost, order, release)))
+                await asyncio.sleep(0)
+            gate.set()
+            await first
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(*waiters)
+            return order
+
+        assert asyncio.run(scenario()) == [100, 10, 50, 90]
+
+    def test_old_waiters_are_not_starved(self):
+        controller = AdmissionController(max_active=100, max_queued=1000, aging_seconds=0)
+
+        async def scenario():
+            gate, release = asyncio.Event(), asyncio.Event()
+            order = []
+            first = asyncio.create_task(hold(controller, 100, order, gate))
+            await asyncio.sleep(0)
+            waiters = []
+            for cost in (90, 10):
+                waiters.append(asyncio.create_task(hold(controller, cost, order, release)))
+                await asyncio.sleep(0)
+            gate.set()
+            await first
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(*waiters)
+            return order
+
+        assert asyncio.run(scenario()) == [100, 90, 10]
+
+    def test_oversized_requests_run_alone(self):
+        controller = AdmissionController(max_active=100, max_queued=0)
+
+        async def scenario():
+            async with controller.slot(50000):
+                assert controller.active == 100
+
+        asyncio.run(scenario())
+
+    def test_resize_frees_room_for_waiters(self):
+        controller = AdmissionController(max_active=100, max_queued=100)
+
+        async def scenario():
+            async with controller.slot(100) as slot:
+                waiter = asyncio.create_task(controller.slot(30).__aenter__())
+                await asyncio.sleep(0)
+                assert not waiter.done()
+                slot.resize(70)
+                await asyncio.sleep(0)
+                assert waiter.done()
+                assert controller.active == 100
+
+        asyncio.run(scenario())
+
+    def test_cancelled_waiter_leaves_the_queue(self):
+        controller = AdmissionController(max_active=100, max_queued=100)
+
+        async def scenario():
+            async with controller.slot(100):
+                waiter = asyncio.create_task(controller.slot(50).__aenter__())
+                await asyncio.sleep(0)
+                waiter.cancel()
+                await asyncio.gather(waiter, return_exceptions=True)
+                assert controller.queued == 0
+
+        asyncio.run(scenario())
+        assert controller.active == 0
+
+    def test_retry_after_follows_the_drain_rate(self):
+        controller = AdmissionController(max_active=100, max_queued=0)
+        controller.drain_rate = lambda: 50.0     # comments per second
+        controller.active = 100
+        assert controller.retry_after(100) == 2
+        controller.drain_rate = lambda: 0.1
+        assert controller.retry_after(100) == AdmissionController.MAX_RETRY_AFTER
+
+    def test_disabled(self):
+        controller = AdmissionController(max_active=0, max_queued=0)
+
+        async def scenario():
+            async with controller.slot(10 ** 6):
+                pass
+
+        asyncio.run(scenario())
+        assert controller.active == 0
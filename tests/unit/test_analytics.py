@@ -0,0 +1,90 @@
+import pytest
+from src.services.analytics import compute_analytics, empty_analytics
+
+
+def comment(i, sentiment, likes, published_at="2024-01-01T10:00:00Z", confidence=0.9):
+    return {
+        "comment_id": f"c{i}",
+        "author": f"User{i}",
+        "text": f"comment {i}",
+        "like_count": likes,
+        "published_at": published_at,
+        "sentiment": sentiment,
+        "confidence": confidence,
+    }
+
+
+COMMENTS = [
+    comment(0, "positive", 9, "2024-01-01T10:00:00Z"),
+    comment(1, "negative", 0, "2024-01-01T23:59:59Z"),
+    comment(2, "positive", 50, "2024-01-02T08:00:00Z", confidence=0.55),
+    comment(3, "neutral", 0, "2024-01-03T00:00:00Z", confidence=0.0),
+    comment(4, "negative", 39, "", confidence=0.35),
+]
+
+
+class TestComputeAnalytics:
+
+    def test_weighted_distribution_counts_likes(self):
+        # weights: positive 10 + 51, negative 1 + 40, neutral 1
+        weighted = compute_analytics(COMMENTS)["weighted_distribution"]
+        assert weighted == {"positive": 59.22, "negative": 39.81, "neutral": 0.97}
+
+    def test_sentiment_over_time_by_day(self):
+        over_time = compute_analytics(COMMENTS)["sentiment_over_time"]
+        assert over_time["bucket"] == "day"
+        assert over_time["buckets"] == [
+            {"start": "2024-01-01T00:00:00", "positive": 1, "negative": 1, "neutral": 0},
+            {"start": "2024-01-02T00:00:00", "positive": 1, "negative": 0, "neutral": 0},
+            {"start": "2024-01-03T00:00:00", "positive": 0, "negative": 0, "neutral": 1},
+        ]
+
+    def test_sentiment_over_time_by_hour(self):
+        buckets = compute_analytics(COMMENTS, time_bucket="hour")["sentiment_over_time"]["buckets"]
+        assert [b["start"] for b in buckets] == [
+            "2024-01-01T10:00:00", "2024-01-01T23:00:00", "2024-01-02T08:00:00", "2024-01-03T00:00:00",
+        ]
+
+    def test_weeks_start_on_monday(self):
+        comments = [
+            comment(0, "positive", 1, "2024-06-03T00:00:00Z"),    # Monday
+            comment(1, "negative", 1, "2024-06-05T12:00:00Z"),    # Wednesday
+            comment(2, "neutral", 1, "2024-06-09T23:59:59Z"),     # Sunday
+            comment(3, "positive", 1, "2024-06-10T00:00:00Z"),    # next Monday
+        ]
+        buckets = compute_analytics(comments, time_bucket="week")["sentiment_over_time"]["buckets"]
+        assert buckets == [
+            {"start": "2024-06-03T00:00:00", "positive": 1, "negative": 1, "neutral": 1},
+            {"start": "2024-06-10T00:00:00", "positive": 1, "negative": 0, "neutral": 0},
+        ]
+
+    def test_unparseable_timestamps_are_skipped(self):
+        comments = [comment(0, "positive", 1, "yesterday"), comment(1, "negative", 1)]
+        buckets = compute_analytics(comments)["sentiment_over_time"]["buckets"]
+        assert buckets == [{"start": "2024-01-01T00:00:00", "positive": 0, "negative": 1, "neutral": 0}]
+
+    def test_confidence_histogram_skips_unscored(self):
+        histogram = compute_analytics(COMMENTS)["confidence_histogram"]
+        assert histogram["edges"][0] == 0.0 and histogram["edges"][-1] == 1.0
+        assert sum(histogram["counts"]) == 4
+        assert histogram["counts"][3] == 1   # 0.35
+        assert histogram["counts"][5] == 1   # 0.55
+        assert histogram["counts"][9] == 2   # 0.9
+
+    def test_top_k_most_liked_per_sentiment(self):
+        analytics = compute_analytics(COMMENTS, top_k=1)
+        assert [c["comment_id"] for c in analytics["top_positive"]] == ["c2"]
+        assert [c["comment_id"] for c in analytics["top_negative"]] == ["c4"]
+        assert analytics["top_positive"][0]["like_count"] == 50
+
+    def test_top_k_keeps_order_and_caps_length(self):
+        comments = [comment(i, "positive", likes) for i, likes in enumerate([3, 7, 1, 7, 5])]
+        top = compute_analytics(comments, top_k=3)["top_positive"]
+        assert [c["comment_id"] for c in top] == ["c1", "c3", "c4"]
+
+    def test_empty_comments(self):
+        assert compute_analytics([]) == empty_analytics()
+
+    def test_unknown_time_bucket_raises(self):
+        with pytest.raises(ValueError):
+            compute_analytics(COMMENTS, time_bucket="fortnight")
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from src.services.anytime import AnytimeAnalyzer, CostModel, new_state
+
+
+class FakeYouTube:
+    """`total` comments in pages; each page takes `latency` seconds."""
+    def __init__(self, total: int, latency: float = 0.0):
+        self.total = total
+        self.latency = latency
+        self.requests = []
+
+    async def get_comment_page(self, video_id, page_size, page_token=None):
+        self.requests.append(page_token)
+        await asyncio.sleep(self.latency)
+        start = int(page_token or 0)
+        end = min(start + page_size, self.total)
+        return {
+            "comments": [{"text": f"comment {i}"} for i in range(start, end)],
+            "next_page_token": str(end) if end < self.total else None,
+        }
+
+
+class FakeAnalyzer:
+    async def enrich(self, comments):
+        return [{**c, "sentiment": "positive", "confidence": 0.9} for c in comments], len(comments)
+
+
+def extend(youtube, max_comments, budget, state=None, costs=None):
+    analyzer = AnytimeAnalyzer(youtube, FakeAnalyzer(), costs or CostModel())
+    return asyncio.run(analyzer.extend("vid", max_comments, state or new_state(), time.monotonic() + budget))
+
+
+class TestCostModel:
+
+    def test_first_measurement_replaces_the_guess(self):
+        costs = CostModel(page_seconds=1.0, alpha=0.5)
+        costs.observe_page(0.1)
+        assert costs.page_seconds == 0.1
+        costs.observe_page(0.3)
+        assert round(costs.page_seconds, 3) == 0.2
+
+    def test_next_page_estimate(self):
+        costs = CostModel(page_seconds=0.1, enrich_seconds=0.001, finish_seconds=0.0001)
+        assert round(costs.next_page(100, 1000), 4) == round(CostModel.HEADROOM * 0.3, 4)
+
+
+class TestAnytimeAnalyzer:
+
+    def test_completes_within_a_generous_budget(self):
+        state = extend(FakeYouTube(250), max_comments=1000, budget=10)
+        assert state["complete"] is True
+        assert len(state["comments"]) == 250
+        assert state["pages"] == 3 and state["valid"] == 250
+
+    def test_stops_at_max_comments(self):
+        state = extend(FakeYouTube(1000), max_comments=150, budget=10)
+        assert state["complete"] is True
+        assert len(state["comments"]) == 150
+
+    def test_stops_when_the_next_page_would_not_fit(self):
+        youtube = FakeYouTube(1000, latency=0.05)
+        state = extend(youtube, max_comments=1000, budget=0.12)
+        assert state["complete"] is False
+        assert 1 <= state["pages"] < 10
+        assert state["next_page_token"] == str(len(state["comments"]))
+
+    def test_first_page_is_always_fetched(self):
+        state = extend(FakeYouTube(1000, latency=0.02), max_comments=1000, budget=0)
+        assert state["pages"] == 1 and len(state["comments"]) == 100
+
+    def test_resumes_from_earlier_progress(self):
+        youtube = FakeYouTube(300)
+        first = extend(youtube, max_comments=300, budget=0)
+        assert first["complete"] is False
+        second = extend(youtube, max_comments=300, budget=10, state=first)
+        assert second["complete"] is True
+        assert [c["text"] for c in second["comments"]] == [f"comment {i}" for i in range(300)]
+        assert youtube.requests == [None, "100", "200"]
+        assert len(first["comments"]) == 100    # earlier state left untouched
+
+    def test_abandons_a_page_that_overruns(self):
+        costs = CostModel(page_seconds=0.001, enrich_seconds=0, finish_seconds=0)
+        costs._measured = {"page_seconds", "enrich_seconds", "finish_seconds"}
+        youtube = FakeYouTube(1000, latency=0.2)
+        started = time.monotonic()
+        state = extend(youtube, max_comments=1000, budget=0.3, costs=costs)
+        assert time.monotonic() - started < 0.5
+        assert state["pages"] == 1 and state["complete"] is False
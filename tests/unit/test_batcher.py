@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from src.services.batcher import MicroBatcher
+
+
+def make_fn():
+    calls = []
+
+    def fn(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    return fn, calls
+
+
+class TestMicroBatcher:
+
+    def test_results_come_back_in_order(self):
+        fn, _ = make_fn()
+        batcher = MicroBatcher(fn, max_batch_size=64, max_wait_ms=1)
+        assert asyncio.run(batcher.submit([3, 1, 2])) == [30, 10, 20]
+
+    def test_concurrent_callers_share_a_batch(self):
+        fn, calls = make_fn()
+        batcher = MicroBatcher(fn, max_batch_size=64, max_wait_ms=20)
+
+        async def scenario():
+            return await asyncio.gather(*(batcher.submit([i, i + 100]) for i in range(5)))
+
+        results = asyncio.run(scenario())
+        assert results == [[i * 10, (i + 100) * 10] for i in range(5)]
+        assert len(calls) == 1
+        assert batcher.stats()["avg_batch_size"] == 10
+
+    def test_batches_are_capped(self):
+        fn, calls = make_fn()
+        batcher = MicroBatcher(fn, max_batch_size=4, max_wait_ms=1)
+        assert asyncio.run(batcher.submit(list(range(10)))) == [i * 10 for i in range(10)]
+        assert [len(c) for c in calls] == [4, 4, 2]
+
+    def test_errors_reach_every_caller_in_the_batch(self):
+        def fn(items):
+            raise RuntimeError("model crashed")
+
+        batcher = MicroBatcher(fn, max_batch_size=64, max_wait_ms=5)
+
+        async def scenario():
+            return await asyncio.gather(batcher.submit([1]), batcher.submit([2]), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_recovers_after_a_failed_batch(self):
+        fail = [True]
+
+        def fn(items):
+            if fail.pop() if fail else False:
+                raise RuntimeError("once")
+            return items
+
+        batcher = MicroBatcher(fn, max_batch_size=64, max_wait_ms=1)
+
+        async def scenario():
+            with pytest.raises(RuntimeError):
+                await batcher.submit([1])
+            return await batcher.submit([2])
+
+        assert asyncio.run(scenario()) == [2]
+
+    def test_empty_submit(self):
+        fn, calls = make_fn()
+        assert asyncio.run(MicroBatcher(fn, 64, 1).submit([])) == []
+        assert calls == []
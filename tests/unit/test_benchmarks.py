@@ -0,0 +1,51 @@
+import asyncio
+from benchmarks import harness
+
+
+def results(**medians):
+    return {"benchmarks": {
+        name: {"median": median, "min": median * 0.95, "threshold": 0.10}
+        for name, median in medians.items()
+    }}
+
+
+class TestCompare:
+
+    def test_flags_slowdowns_beyond_the_threshold(self):
+        comparisons = harness.compare(results(a=1.0, b=1.0), results(a=1.2, b=1.05))
+        assert [(c.name, c.regressed) for c in comparisons] == [("a", True), ("b", False)]
+        assert round(comparisons[0].change, 2) == 0.2
+
+    def test_one_noisy_run_is_not_a_regression(self):
+        current = results(a=1.2)
+        current["benchmarks"]["a"]["min"] = 0.96    # best run still as fast as before
+        assert not harness.compare(results(a=1.0), current)[0].regressed
+
+    def test_threshold_override(self):
+        assert not harness.compare(results(a=1.0), results(a=1.2), threshold=0.25)[0].regressed
+
+    def test_improvements_and_new_benchmarks(self):
+        comparisons = harness.compare(results(a=1.0), results(a=0.5, new=1.0))
+        assert [(c.name, c.improved) for c in comparisons] == [("a", True)]
+
+    def test_environment_mismatch(self):
+        assert harness.environment_mismatch({"python": "3.13.1"}, {"python": "3.14.0"}) == ["python: 3.13.1 -> 3.14.0"]
+
+
+class TestMeasure:
+
+    def test_reports_seconds_per_op(self):
+        calls = []
+        result = harness.measure(lambda: calls.append(1), ops=10, repeat=3, min_time=0.001)
+        assert result["repeat"] == 3 and result["ops"] == 10
+        assert len(calls) >= 1 + 3 * result["loops"]
+        assert 0 < result["min"] <= result["median"]
+
+    def test_async_benchmarks_share_one_loop(self):
+        loops = set()
+
+        async def fn():
+            loops.add(asyncio.get_running_loop())
+        harness.measure(fn, repeat=2, min_time=0.001)
+        harness.measure(fn, repeat=2, min_time=0.001)
+        assert loops == {harness.event_loop()}
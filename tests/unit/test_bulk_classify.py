@@ -0,0 +1,118 @@
+import csv
+import json
+from unittest.mock import patch
+import pytest
+from src.models.preprocessing import TextProcessor
+from src.utils import bulk_classify
+
+
+class FakeAnalyzer:
+    def analyze_batch(self, texts):
+        return [
+            {"label": "negative" if "bad" in t else "positive", "confidence": 0.9}
+            for t in texts
+        ]
+
+
+def fake_init_worker(threads=None):
+    bulk_classify._processor = TextProcessor()
+    bulk_classify._analyzer = FakeAnalyzer()
+
+
+@pytest.fixture(autouse=True)
+def fake_models():
+    with patch.object(bulk_classify, "_init_worker", fake_init_worker):
+        yield
+
+
+def write_jsonl(path, n):
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": i, "text": "bad take" if i % 3 == 0 else "Great video!"}) + "\n")
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestBulkClassify:
+
+    def test_classifies_jsonl_in_order(self, tmp_path):
+        src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(src, 25)
+
+        stats = bulk_classify.run(src, out, chunk_size=10, workers=0)
+
+        rows = read_jsonl(out)
+        assert [r["id"] for r in rows] == list(range(25))
+        assert rows[0]["sentiment"] == "negative"
+        assert rows[1]["sentiment"] == "positive"
+        assert rows[1]["cleaned_text"] == "great video!"
+        assert stats["records"] == 25
+        assert stats["comments_per_sec"] > 0
+
+    def test_invalid_text_is_neutral(self, tmp_path):
+        src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        src.write_text('{"text": "!"}\n{"text": null}\n')
+        bulk_classify.run(src, out, workers=0)
+        assert [(r["sentiment"], r["confidence"]) for r in read_jsonl(out)] == [("neutral", 0.0)] * 2
+
+    def test_reads_csv_with_custom_text_field(self, tmp_path):
+        src, out = tmp_path / "in.csv", tmp_path / "out.jsonl"
+        with open(src, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["comment_id", "body"])
+            writer.writerow(["a", "bad video"])
+            writer.writerow(["b", "love it"])
+
+        bulk_classify.run(src, out, text_field="body", workers=0)
+
+        rows = read_jsonl(out)
+        assert [(r["comment_id"], r["sentiment"]) for r in rows] == [("a", "negative"), ("b", "positive")]
+
+    def test_resumes_from_checkpoint(self, tmp_path):
+        src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(src, 25)
+        bulk_classify.run(src, out, chunk_size=10, workers=0)
+
+        # pretend the run died mid-way through the second chunk
+        checkpoint = bulk_classify.Checkpoint(tmp_path / "out.jsonl.checkpoint", src, 10)
+        checkpoint.load()
+        first_chunk = b"".join(open(out, "rb").readlines()[:10])
+        checkpoint.chunks, checkpoint.records, checkpoint.output_bytes = 1, 10, len(first_chunk)
+        checkpoint.save()
+        with open(out, "r+b") as f:
+            f.truncate(len(first_chunk))
+            f.seek(len(first_chunk))
+            f.write(b'{"id": 10, "partial')
+
+        stats = bulk_classify.run(src, out, chunk_size=10, workers=0)
+
+        assert stats["classified"] == 15
+        assert [r["id"] for r in read_jsonl(out)] == list(range(25))
+
+    def test_checkpoint_from_other_input_is_rejected(self, tmp_path):
+        src, other, out = tmp_path / "in.jsonl", tmp_path / "other.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(src, 5)
+        write_jsonl(other, 5)
+        bulk_classify.run(src, out, workers=0)
+
+        with pytest.raises(SystemExit):
+            bulk_classify.run(other, out, workers=0)
+        bulk_classify.run(other, out, workers=0, restart=True)
+        assert len(read_jsonl(out)) == 5
+
+    def test_unsupported_format(self, tmp_path):
+        src = tmp_path / "in.txt"
+        src.write_text("hello")
+        with pytest.raises(SystemExit):
+            bulk_classify.run(src, tmp_path / "out.jsonl", workers=0)
+
+    def test_default_workers_is_a_quarter_of_the_cores(self, tmp_path):
+        src = tmp_path / "in.jsonl"
+        write_jsonl(src, 1)
+        with patch.object(bulk_classify, "run") as run:
+            bulk_classify.main([str(src), str(tmp_path / "out.jsonl")])
+        assert run.call_args.args[4] == bulk_classify.DEFAULT_WORKERS
+        assert bulk_classify.DEFAULT_WORKERS == max(1, (bulk_classify.os.cpu_count() or 1) // 4)
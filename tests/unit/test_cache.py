@@ -0,0 +1,180 @@
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import json
+import pytest
+from src.services.cache import CacheService, LocalCache
+
+
+class TestLocalCache:
+
+    def test_evicts_least_recently_used_when_over_budget(self):
+        cache = LocalCache(max_bytes=10, ttl=60)
+        cache.set("a", 1, size=4)
+        cache.set("b", 2, size=4)
+        cache.get("a")
+        cache.set("c", 3, size=4)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.current_bytes == 8
+
+    def test_skips_values_larger_than_budget(self):
+        cache = LocalCache(max_bytes=10, ttl=60)
+        cache.set("big", "x", size=11)
+        assert cache.get("big") is None
+        assert cache.current_bytes == 0
+
+    def test_expired_entries_are_dropped(self):
+        cache = LocalCache(max_bytes=10, ttl=60)
+        cache.set("a", 1, size=1, ttl=-1)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+@pytest.fixture
+def cache():
+    service = CacheService()
+    service.redis_server = MagicMock()
+    service.redis_server.get = AsyncMock(return_value=json.dumps({"video_id": "abc"}).encode())
+    service.redis_server.set = AsyncMock(return_value=True)
+    service.redis_server.delete = AsyncMock(return_value=1)
+    service.redis_server.publish = AsyncMock(return_value=1)
+    return service
+
+
+class TestTwoTierCache:
+
+    def test_second_get_is_served_from_l1(self, cache):
+        asyncio.run(cache.get("k"))
+        value = asyncio.run(cache.get("k"))
+
+        assert value == {"video_id": "abc"}
+        assert cache.redis_server.get.await_count == 1
+        stats = cache.stats()
+        assert stats["l1"]["hits"] == 1
+        assert stats["l2"]["hits"] == 1
+
+    def test_l1_hits_return_copies(self, cache):
+        first = asyncio.run(cache.get("k"))
+        first["cached"] = True
+        assert "cached" not in asyncio.run(cache.get("k"))
+
+    def test_set_publishes_invalidation(self, cache):
+        asyncio.run(cache.set("k", {"video_id": "abc"}))
+        cache.redis_server.publish.assert_awaited_once_with(
+            cache.channel, f"{cache.instance_id} k"
+        )
+
+    def test_peer_invalidation_evicts_l1(self, cache):
+        asyncio.run(cache.get("k"))
+        cache._handle_invalidation("other-worker k")
+        asyncio.run(cache.get("k"))
+        assert cache.redis_server.get.await_count == 2
+
+    def test_own_invalidation_is_ignored(self, cache):
+        asyncio.run(cache.set("k", {"video_id": "abc"}))
+        cache._handle_invalidation(f"{cache.instance_id} k")
+        asyncio.run(cache.get("k"))
+        cache.redis_server.get.assert_not_awaited()
+
+    def test_derived_caches_follow_invalidations(self, cache):
+        derived = LocalCache(max_bytes=1000, ttl=60)
+        cache.derived.append(derived)
+        for key in ("k", "j"):
+            derived.set(key, ["decoded"], 10)
+
+        asyncio.run(cache.set("k", {"video_id": "abc"}))
+        cache._handle_invalidation("other-worker j")
+        assert derived.get("k") is None and derived.get("j") is None
+
+    def test_entries_past_soft_expiry_are_stale(self, cache):
+        asyncio.run(cache.set("k", {"video_id": "abc"}, expire=-1))
+        value, stale = asyncio.run(cache.get_entry("k"))
+
+        assert value == {"video_id": "abc"}
+        assert stale is True
+        assert asyncio.run(cache.get("k")) is None
+        assert cache.stats()["stale_hits"] == 2
+
+    def test_redis_keeps_entries_through_stale_window(self, cache):
+        asyncio.run(cache.set("k", {"video_id": "abc"}, expire=60))
+        assert cache.redis_server.set.await_args.kwargs["ex"] == 60 + cache.stale_ttl
+
+    def test_bytes_bodies_are_kept_compressed_in_l1(self, cache):
+        body = b'{"text":"great video"}' * 500
+        asyncio.run(cache.set("k", body))
+        value, _ = asyncio.run(cache.get_entry("k"))
+
+        assert value.encoding == "gzip"
+        assert len(value.data) < len(body)
+        cache.redis_server.get.assert_not_awaited()
+
+    def test_miss_is_counted(self, cache):
+        cache.redis_server.get = AsyncMock(return_value=None)
+        assert asyncio.run(cache.get("k")) is None
+        assert cache.stats()["misses"] == 1
+
+
+class FakePipeline:
+    """Records queued commands; execute() answers each with the canned result."""
+    def __init__(self, results):
+        self.commands = []
+        self.results = results
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, *args, **kwargs):
+        self.commands.append(("set", args, kwargs))
+
+    def publish(self, *args):
+        self.commands.append(("publish", args, {}))
+
+    async def execute(self, raise_on_error=True):
+        return [self.results[name] for name, _, _ in self.commands]
+
+
+class TestBatchedCache:
+
+    def test_get_many_checks_l1_then_one_mget(self, cache):
+        asyncio.run(cache.set("a", {"video_id": "a"}))
+        cache.redis_server.mget = AsyncMock(return_value=[json.dumps({"video_id": "b"}).encode(), None])
+
+        entries = asyncio.run(cache.get_many(["a", "b", "c"]))
+
+        assert entries == {"a": ({"video_id": "a"}, False), "b": ({"video_id": "b"}, False)}
+        cache.redis_server.mget.assert_awaited_once_with(["b", "c"])
+        assert cache.stats()["misses"] == 1
+        # b is in L1 now
+        assert asyncio.run(cache.get_many(["b"])) == {"b": ({"video_id": "b"}, False)}
+        assert cache.redis_server.mget.await_count == 1
+
+    def test_set_many_is_one_pipeline(self, cache):
+        pipe = FakePipeline({"set": True, "publish": 1})
+        cache.redis_server.pipeline = MagicMock(return_value=pipe)
+
+        assert asyncio.run(cache.set_many({"a": {"n": 1}, "b": b"body"}, expire=60)) is True
+
+        assert [name for name, _, _ in pipe.commands] == ["set", "publish", "set", "publish"]
+        assert pipe.commands[0][2]["ex"] == 60 + cache.stale_ttl
+        cache.redis_server.set.assert_not_awaited()
+        assert asyncio.run(cache.get("a")) == {"n": 1}
+        cache.redis_server.get.assert_not_awaited()
+
+    def test_set_many_survives_failed_publish(self, cache):
+        cache.redis_server.pipeline = MagicMock(
+            return_value=FakePipeline({"set": True, "publish": ConnectionError("gone")})
+        )
+        assert asyncio.run(cache.set_many({"a": {"n": 1}})) is True
+
+    def test_set_many_raises_failed_set(self, cache):
+        cache.redis_server.pipeline = MagicMock(
+            return_value=FakePipeline({"set": ConnectionError("gone"), "publish": 1})
+        )
+        with pytest.raises(ConnectionError):
+            asyncio.run(cache.set_many({"a": {"n": 1}}))
+        assert cache.local.get("a") is None
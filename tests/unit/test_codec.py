@@ -0,0 +1,73 @@
+import gzip
+import json
+import pytest
+from src.services.codec import CacheCodec, EncodedBody, COMPRESSORS, SERIALIZERS, HEADER, HEADER_V1, MAGIC
+
+VALUE = {
+    "video_id": "dQw4w9WgXcQ",
+    "comments": [{"text": f"great video 😍 #{i}", "confidence": 0.9} for i in range(200)],
+}
+
+
+class TestCacheCodec:
+
+    @pytest.mark.parametrize("serializer", [s for s in SERIALIZERS if s != "raw"])
+    @pytest.mark.parametrize("compression", list(COMPRESSORS))
+    def test_roundtrip(self, serializer, compression):
+        codec = CacheCodec(serializer, compression)
+        value, size, soft_expires_at = codec.decode(codec.encode(VALUE, soft_expires_at=123))
+        assert value == VALUE
+        assert size > 0
+        assert soft_expires_at == 123
+
+    def test_bytes_are_stored_raw_and_left_compressed(self):
+        body = b'{"video_id":"abc"' * 100
+        data = CacheCodec("json", "zlib", raw_compression="gzip").encode(body)
+        assert HEADER.unpack_from(data)[2] == SERIALIZERS["raw"][0]
+
+        value, size, _ = CacheCodec().decode(data)
+        assert value.encoding == "gzip"
+        assert gzip.decompress(value.data) == body
+        assert size == len(body)     # the L1 budget counts bodies uncompressed, like other values
+
+    def test_small_bytes_come_back_plain(self):
+        value = CacheCodec().decode(CacheCodec().encode(b"{}"))[0]
+        assert value == EncodedBody(b"{}", None)
+
+    def test_reads_legacy_json_strings(self):
+        legacy = json.dumps(VALUE).encode()
+        value, size, soft_expires_at = CacheCodec().decode(legacy)
+        assert value == VALUE
+        assert size == len(legacy)
+        assert soft_expires_at == 0
+
+    def test_reads_v1_entries(self):
+        payload = json.dumps(VALUE).encode()
+        v1 = HEADER_V1.pack(MAGIC, 1, 1, 0, len(payload)) + payload
+        assert CacheCodec().decode(v1) == (VALUE, len(payload), 0)
+
+    def test_compressed_payload_is_smaller(self):
+        codec = CacheCodec("json", "zlib")
+        data = codec.encode(VALUE)
+        assert data.startswith(MAGIC)
+        assert len(data) < len(json.dumps(VALUE).encode())
+        assert CacheCodec.payload_size(data) > len(data)
+
+    def test_small_values_are_not_compressed(self):
+        data = CacheCodec("json", "zlib", min_compress_bytes=1024).encode({"a": 1})
+        assert HEADER.unpack_from(data)[3] == 0
+
+    def test_decodes_entries_written_with_other_settings(self):
+        data = CacheCodec("json", "zlib").encode(VALUE)
+        assert CacheCodec("json", "none").decode(data)[0] == VALUE
+
+    def test_unavailable_codec_falls_back(self):
+        codec = CacheCodec("does-not-exist", "does-not-exist")
+        assert codec.serializer == "json"
+        assert codec.compression == "zlib"
+
+    def test_rejects_newer_format_versions(self):
+        data = bytearray(CacheCodec().encode(VALUE))
+        data[2] = 99
+        with pytest.raises(ValueError):
+            CacheCodec().decode(bytes(data))
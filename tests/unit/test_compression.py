@@ -0,0 +1,40 @@
+import gzip
+import asyncio
+from src.api.compression import negotiate, accepts, parse_accept_encoding, encode_for, decompress, PREFERENCE
+
+
+class TestNegotiation:
+
+    def test_parses_q_values(self):
+        assert parse_accept_encoding("gzip;q=0.5, br, *;q=0") == {"gzip": 0.5, "br": 1.0, "*": 0.0}
+
+    def test_no_header_means_identity(self):
+        assert negotiate(None) is None
+        assert negotiate("") is None
+
+    def test_gzip_only_client(self):
+        assert negotiate("gzip") == "gzip"
+
+    def test_refused_codings_are_skipped(self):
+        assert negotiate("gzip;q=0, identity") is None
+
+    def test_wildcard_picks_server_preference(self):
+        assert negotiate("*") == PREFERENCE[0]
+
+    def test_accepts_respects_wildcard_and_q(self):
+        assert accepts("*", "gzip")
+        assert not accepts("gzip;q=0", "gzip")
+        assert not accepts(None, "gzip")
+
+
+class TestEncodeFor:
+
+    def test_small_bodies_stay_plain(self):
+        assert asyncio.run(encode_for(b"{}", "gzip")) == (b"{}", None)
+
+    def test_large_bodies_are_compressed(self):
+        body = b'{"text":"great video"}' * 500
+        content, coding = asyncio.run(encode_for(body, "gzip"))
+        assert coding == "gzip"
+        assert gzip.decompress(content) == body
+        assert decompress(content, coding) == body
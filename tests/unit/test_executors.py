@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import pytest
+from src.core import executors, timing
+from src.core.executors import StageExecutor
+
+
+@pytest.fixture
+def pool():
+    pool = StageExecutor("test", max_workers=2)
+    yield pool
+    pool.shutdown()
+
+
+class TestStageExecutor:
+
+    def test_runs_on_its_own_threads(self, pool):
+        name = asyncio.run(pool.run(lambda: threading.current_thread().name))
+        assert name.startswith("test-pool")
+        assert pool.stats()["completed"] == 1
+
+    def test_passes_arguments_and_errors(self, pool):
+        assert asyncio.run(pool.run(divmod, 7, 2)) == (3, 1)
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(pool.run(divmod, 1, 0))
+
+    def test_submit_from_another_thread(self, pool):
+        future = pool.submit(divmod, 7, 2)
+        assert future.result(timeout=1) == (3, 1)
+        assert pool.stats()["queued"] == 0
+
+    def test_carries_request_timings(self, pool):
+        stage = timing.Stage("test_pool_stage")
+
+        def work():
+            with stage.time():
+                pass
+
+        async def scenario():
+            timings = timing.start_request()
+            await pool.run(work)
+            return timings
+
+        assert "test_pool_stage" in asyncio.run(scenario()).as_dict()["stages"]
+
+    def test_bounded_and_queued(self, pool):
+        release = threading.Event()
+
+        async def scenario():
+            tasks = [asyncio.create_task(pool.run(release.wait)) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            stats = pool.stats()
+            release.set()
+            await asyncio.gather(*tasks)
+            return stats
+
+        stats = asyncio.run(scenario())
+        assert stats["active"] == 2
+        assert stats["queued"] == 3
+        assert pool.stats()["queued"] == pool.stats()["active"] == 0
+
+    def test_cancelled_work_leaves_the_queue(self, pool):
+        release = threading.Event()
+
+        async def scenario():
+            busy = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            waiting = asyncio.create_task(pool.run(release.wait))
+            await asyncio.sleep(0)
+            waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+            queued = pool.stats()["queued"]
+            release.set()
+            await asyncio.gather(*busy)
+            return queued
+
+        assert asyncio.run(scenario()) == 0
+
+    def test_stalled_pool_does_not_block_another(self, pool):
+        other = StageExecutor("other", max_workers=1)
+        release = threading.Event()
+
+        async def scenario():
+            stalled = [asyncio.create_task(pool.run(release.wait)) for _ in range(4)]
+            await asyncio.sleep(0.05)
+            result = await asyncio.wait_for(other.run(lambda: "done"), timeout=1)
+            release.set()
+            await asyncio.gather(*stalled)
+            return result
+
+        try:
+            assert asyncio.run(scenario()) == "done"
+        finally:
+            other.shutdown()
+
+
+class TestPools:
+
+    def test_sizes_default_to_the_core_count(self):
+        assert executors._size(0, 0) == 1
+        assert executors._size(0, 8) == 8
+        assert executors._size(3, 8) == 3
+
+    def test_stats_cover_every_pool(self):
+        assert set(executors.stats()) == {"network", "cpu", "inference", "replies"}
+        assert all(s["workers"] >= 1 for s in executors.stats().values())
@@ -0,0 +1,155 @@
+import asyncio
+import pytest
+from src.services.jobs import JobQueue, JobWorker, PermanentJobError
+from tests.fakes import FakeRedis
+
+PARAMS = {"video_id": "abc", "max_comments": 100, "include_replies": False}
+
+
+@pytest.fixture
+def queue():
+    return JobQueue(FakeRedis())
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestJobQueue:
+
+    def test_enqueue_records_and_queues_job(self, queue):
+        job = run(queue.enqueue(PARAMS))
+        assert job["status"] == "queued"
+        assert job["params"] == PARAMS
+        assert job["progress"] == 0.0
+        assert run(queue.redis_server.lrange(queue.queue_key, 0, -1)) == [job["id"]]
+
+    def test_enqueue_with_result_is_done_and_not_queued(self, queue):
+        job = run(queue.enqueue(PARAMS, result_key="analysis:abc:100"))
+        assert job["status"] == "done"
+        assert job["result_key"] == "analysis:abc:100"
+        assert run(queue.redis_server.llen(queue.queue_key)) == 0
+
+    def test_claim_is_fifo_and_tracks_processing(self, queue):
+        first = run(queue.enqueue(PARAMS))
+        run(queue.enqueue(PARAMS))
+
+        claimed = run(queue.claim("w1", timeout=0.01))
+        assert claimed["id"] == first["id"]
+        assert claimed["status"] == "running"
+        assert claimed["attempts"] == 1
+        assert run(queue.redis_server.lrange(queue.processing_key("w1"), 0, -1)) == [first["id"]]
+
+    def test_claim_times_out_on_empty_queue(self, queue):
+        assert run(queue.claim("w1", timeout=0.01)) is None
+
+    def test_progress_and_complete(self, queue):
+        job = run(queue.enqueue(PARAMS))
+        run(queue.claim("w1", timeout=0.01))
+        run(queue.progress(job["id"], 0.4, "analyzing"))
+        assert run(queue.get(job["id"]))["stage"] == "analyzing"
+
+        run(queue.complete(job["id"], "w1", "analysis:abc:100"))
+        done = run(queue.get(job["id"]))
+        assert done["status"] == "done"
+        assert done["progress"] == 1.0
+        assert done["result_key"] == "analysis:abc:100"
+        assert run(queue.redis_server.llen(queue.processing_key("w1"))) == 0
+
+    def test_failed_job_is_retried_until_max_attempts(self, queue):
+        queue.max_attempts = 2
+        job = run(queue.enqueue(PARAMS))
+
+        run(queue.claim("w1", timeout=0.01))
+        assert run(queue.fail(job["id"], "w1", "boom")) is True
+        assert run(queue.get(job["id"]))["status"] == "queued"
+
+        run(queue.claim("w1", timeout=0.01))
+        assert run(queue.fail(job["id"], "w1", "boom again")) is False
+        failed = run(queue.get(job["id"]))
+        assert failed["status"] == "failed"
+        assert failed["error"] == "boom again"
+        assert run(queue.redis_server.llen(queue.queue_key)) == 0
+
+    def test_recover_requeues_jobs_of_dead_workers(self, queue):
+        job = run(queue.enqueue(PARAMS))
+        run(queue.heartbeat("dead"))
+        run(queue.claim("dead", timeout=0.01))
+        run(queue.heartbeat("alive"))
+        run(queue.redis_server.delete(queue.heartbeat_key("dead")))
+
+        assert run(queue.recover()) == 1
+        assert run(queue.get(job["id"]))["status"] == "queued"
+        assert run(queue.redis_server.lrange(queue.queue_key, 0, -1)) == [job["id"]]
+        assert run(queue.redis_server.smembers(queue.workers_key())) == {"alive"}
+
+    def test_recover_leaves_live_workers_alone(self, queue):
+        run(queue.enqueue(PARAMS))
+        run(queue.heartbeat("w1"))
+        run(queue.claim("w1", timeout=0.01))
+        assert run(queue.recover()) == 0
+        assert run(queue.redis_server.llen(queue.processing_key("w1"))) == 1
+
+
+class TestJobWorker:
+
+    def test_runs_handler_and_completes_job(self, queue):
+        stages = []
+
+        async def handler(job, report):
+            await report(0.5, "analyzing")
+            stages.append((await queue.get(job["id"]))["stage"])
+            return "analysis:abc:100"
+
+        job = run(queue.enqueue(PARAMS))
+        worker = JobWorker(queue, handler, worker_id="w1")
+        worker.poll_timeout = 0.01
+        run(worker.run_once())
+
+        assert stages == ["analyzing"]
+        assert run(queue.get(job["id"]))["status"] == "done"
+
+    def test_permanent_errors_are_not_retried(self, queue):
+        async def handler(job, report):
+            raise PermanentJobError("Video not found")
+
+        job = run(queue.enqueue(PARAMS))
+        worker = JobWorker(queue, handler, worker_id="w1")
+        worker.poll_timeout = 0.01
+        run(worker.run_once())
+
+        failed = run(queue.get(job["id"]))
+        assert failed["status"] == "failed"
+        assert failed["attempts"] == 1
+        assert failed["error"] == "Video not found"
+
+    def test_transient_errors_are_retried(self, queue):
+        calls = []
+
+        async def handler(job, report):
+            calls.append(job["attempts"])
+            if len(calls) == 1:
+                raise RuntimeError("quota")
+            return "analysis:abc:100"
+
+        job = run(queue.enqueue(PARAMS))
+        worker = JobWorker(queue, handler, worker_id="w1")
+        worker.poll_timeout = 0.01
+        run(worker.run_once())
+        run(worker.run_once())
+
+        assert calls == [1, 2]
+        assert run(queue.get(job["id"]))["status"] == "done"
+
+    def test_run_stops_and_unregisters(self, queue):
+        async def handler(job, report):
+            worker.stop()
+            return "analysis:abc:100"
+
+        run(queue.enqueue(PARAMS))
+        worker = JobWorker(queue, handler, worker_id="w1")
+        worker.poll_timeout = 0.01
+        run(worker.run())
+
+        assert run(queue.redis_server.smembers(queue.workers_key())) == set()
+        assert run(queue.redis_server.exists(queue.heartbeat_key("w1"))) == 0
@@ -0,0 +1,101 @@
+from fastapi.testclient import TestClient
+from benchmarks import loadtest, mock_youtube
+from benchmarks.loadtest import Outcome
+
+
+def mock():
+    return TestClient(mock_youtube.create_app(latency_ms=0))
+
+
+def all_threads(client, video_id: str):
+    items, token = [], None
+    while True:
+        params = {"part": "snippet,replies", "videoId": video_id, "maxResults": 100}
+        if token:
+            params["pageToken"] = token
+        page = client.get("/youtube/v3/commentThreads", params=params).json()
+        items += page["items"]
+        token = page.get("nextPageToken")
+        if not token:
+            return items
+
+
+class TestMockYouTube:
+
+    def test_pages_through_the_sized_video(self):
+        client = mock()
+        items = all_threads(client, "00250abcdef")
+        assert len(items) == 250
+        assert len({item["id"] for item in items}) == 250
+        assert client.get("/stats").json()["thread_pages"] == 3
+
+    def test_unsized_ids_get_the_default(self):
+        assert len(all_threads(mock(), "dQw4w9WgXcQ")) == mock_youtube.DEFAULT_THREADS
+
+    def test_comments_are_deterministic(self):
+        assert all_threads(mock(), "00050abcdef") == all_threads(mock(), "00050abcdef")
+
+    def test_unknown_video_is_404(self):
+        response = mock().get("/youtube/v3/commentThreads", params={"videoId": "NOTFOUNDxyz"})
+        assert response.status_code == 404
+        assert response.json()["error"]["errors"][0]["reason"] == "videoNotFound"
+
+    def test_replies_match_the_thread_count(self):
+        client = mock()
+        thread = next(t for t in all_threads(client, "00200abcdef") if t["snippet"]["totalReplyCount"] > 5)
+        replies = client.get(
+            "/youtube/v3/comments", params={"parentId": thread["id"], "maxResults": 100}
+        ).json()["items"]
+        assert len(replies) == min(thread["snippet"]["totalReplyCount"], 100)
+        assert replies[:5] == thread["replies"]["comments"]
+
+    def test_injected_errors(self):
+        client = TestClient(mock_youtube.create_app(latency_ms=0, error_rate=1.0))
+        assert client.get("/youtube/v3/commentThreads", params={"videoId": "00010abcdef"}).status_code == 503
+
+
+class TestTrafficMix:
+
+    def test_parse_sizes(self):
+        assert loadtest.parse_sizes("100:5,1000:4,5000") == [(100, 5), (1000, 4), (5000, 1)]
+
+    def test_ratios(self):
+        mix = loadtest.TrafficMix([(100, 1)], hit_ratio=0.6, hot_videos=5, not_found=0.1, seed=1)
+        kinds = [mix.next().kind for _ in range(10000)]
+        assert abs(kinds.count("hit") / 10000 - 0.6) < 0.02
+        assert abs(kinds.count("not_found") / 10000 - 0.1) < 0.02
+
+    def test_video_ids_are_valid_and_sized(self):
+        from src.utils.validators import VIDEO_ID_RE
+        mix = loadtest.TrafficMix([(1000, 1)], hit_ratio=0, hot_videos=0, not_found=0.5, seed=2)
+        for planned in (mix.next() for _ in range(100)):
+            assert VIDEO_ID_RE.match(planned.video_id)
+            if planned.kind == "miss":
+                assert mock_youtube.thread_count(planned.video_id) == planned.max_comments == 1000
+            else:
+                assert planned.video_id.startswith(mock_youtube.MISSING_PREFIX)
+
+
+class TestReport:
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        assert loadtest.percentile(values, 50) == 50
+        assert loadtest.percentile(values, 99) == 99
+        assert loadtest.percentile(values, 100) == 100
+        assert loadtest.percentile([], 50) == 0
+
+    def test_expected_404s_are_not_errors(self):
+        outcomes = [
+            Outcome("hit", 200, 0.01, "HIT"),
+            Outcome("miss", 500, 0.5),
+            Outcome("not_found", 404, 0.02),
+            Outcome("miss", 0, 1.0),
+        ]
+        results = loadtest.report(outcomes, elapsed=2.0)
+        assert results["overall"]["requests"] == 4
+        assert results["overall"]["throughput"] == 2.0
+        assert results["overall"]["error_rate"] == 0.5
+        assert results["not_found"]["error_rate"] == 0
+        assert results["hit"]["cache"] == {"HIT": 1}
+        assert results["miss"]["latency_ms"]["max"] == 1000
@@ -0,0 +1,90 @@
+import threading
+import pytest
+from src.core.metrics import Counter, Gauge, Histogram, Registry
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+class TestCounterAndGauge:
+
+    def test_counter_renders_per_label(self, registry):
+        hits = Counter("hits_total", "Cache hits.", ["tier"], registry=registry)
+        hits.labels("l1").inc()
+        hits.labels(tier="l1").inc(2)
+        hits.labels("l2").inc()
+        assert registry.render() == (
+            "# HELP hits_total Cache hits.\n"
+            "# TYPE hits_total counter\n"
+            'hits_total{tier="l1"} 3\n'
+            'hits_total{tier="l2"} 1\n'
+        )
+
+    def test_wrong_labels_are_rejected(self, registry):
+        hits = Counter("hits_total", "Cache hits.", ["tier"], registry=registry)
+        with pytest.raises(ValueError):
+            hits.labels("l1", "extra")
+
+    def test_names_are_unique(self, registry):
+        Counter("hits_total", "Cache hits.", registry=registry)
+        with pytest.raises(ValueError):
+            Counter("hits_total", "Again.", registry=registry)
+
+    def test_gauge_goes_both_ways(self, registry):
+        in_flight = Gauge("in_flight", "Requests in flight.", registry=registry)
+        in_flight.inc(3)
+        in_flight.dec()
+        assert "in_flight 2\n" in registry.render()
+
+    def test_gauge_can_read_at_scrape_time(self, registry):
+        depth = Gauge("depth", "Queue depth.", registry=registry)
+        queue = [1, 2, 3]
+        depth.set_function(lambda: len(queue))
+        queue.pop()
+        assert "depth 2\n" in registry.render()
+
+    def test_increments_from_threads_are_not_lost(self, registry):
+        total = Counter("total", "Total.", registry=registry)
+
+        def work():
+            for _ in range(10_000):
+                total.inc()
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert "total 40000\n" in registry.render()
+
+
+class TestHistogram:
+
+    def test_buckets_are_cumulative(self, registry):
+        latency = Histogram("latency_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0), registry=registry)
+        child = latency.labels("clean")
+        for value in (0.05, 0.1, 0.5, 3.0):
+            child.observe(value)
+        assert registry.render().splitlines()[2:] == [
+            'latency_seconds_bucket{stage="clean",le="0.1"} 2',
+            'latency_seconds_bucket{stage="clean",le="1"} 3',
+            'latency_seconds_bucket{stage="clean",le="+Inf"} 4',
+            'latency_seconds_sum{stage="clean"} 3.65',
+            'latency_seconds_count{stage="clean"} 4',
+        ]
+
+    def test_timer_observes_elapsed_time(self, registry):
+        latency = Histogram("latency_seconds", "Latency.", registry=registry)
+        with latency.time():
+            pass
+        with pytest.raises(RuntimeError):
+            with latency.time():
+                raise RuntimeError
+        assert latency.labels().count == 2
+        assert 0 <= latency.labels().sum < 0.1
+
+    def test_label_values_are_escaped(self, registry):
+        hits = Counter("hits_total", "Hits.", ["route"], registry=registry)
+        hits.labels('a"b\\c').inc()
+        assert 'hits_total{route="a\\"b\\\\c"} 1' in registry.render()
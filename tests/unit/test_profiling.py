@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.core import profiling
+from src.core.profiling import ProfileStore, SamplingProfiler
+
+
+def spin(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestSamplingProfiler:
+
+    def test_samples_busy_threads_by_name(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        worker = threading.Thread(target=spin, args=(0.1,), name="busy")
+        worker.start()
+        worker.join()
+        samples = profiler.stop()
+
+        busy = [stack for stack in samples if stack.startswith("busy;")]
+        assert busy
+        assert all("spin (test_profiling.py:" in stack.split(";")[-1] for stack in busy)
+        assert profiler.duration >= 0.1
+
+    def test_skips_idle_pool_workers(self):
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="idle-pool") as pool:
+            pool.submit(lambda: None).result()
+            profiler = SamplingProfiler(interval=0.001)
+            profiler.start()
+            time.sleep(0.05)
+            samples = profiler.stop()
+        assert not any(stack.startswith("idle-pool") for stack in samples)
+
+    def test_collapsed_format(self):
+        profiler = SamplingProfiler()
+        profiler.samples.update({"MainThread;a;b": 3, "MainThread;a": 1})
+        assert profiler.collapsed() == "MainThread;a;b 3\nMainThread;a 1\n"
+
+    def test_one_profile_at_a_time(self):
+        first = profiling.try_start(0.01)
+        try:
+            assert first is not None
+            assert profiling.try_start(0.01) is None
+        finally:
+            profiling.finish(first)
+        second = profiling.try_start(0.01)
+        assert second is not None
+        profiling.finish(second)
+
+
+class TestProfileStore:
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        return ProfileStore(str(tmp_path / "profiles"), max_files=3)
+
+    @staticmethod
+    def profiler(stack: str) -> SamplingProfiler:
+        profiler = SamplingProfiler()
+        profiler.samples[stack] = 1
+        return profiler
+
+    def test_save_and_read_back(self, store):
+        name = store.save("analyze", self.profiler("MainThread;clean"))
+        assert name.endswith("-analyze.collapsed")
+        assert [p["name"] for p in store.list()] == [name]
+        assert store.path(name).read_text() == "MainThread;clean 1\n"
+
+    def test_keeps_only_the_newest(self, store):
+        names = [store.save("analyze", self.profiler(f"MainThread;{i}")) for i in range(5)]
+        assert [p["name"] for p in store.list()] == names[:1:-1]
+
+    def test_empty_before_the_first_profile(self, store):
+        assert store.list() == []
+
+    def test_only_profiles_can_be_fetched(self, store, tmp_path):
+        store.save("analyze", self.profiler("MainThread"))
+        (tmp_path / "secret.collapsed").write_text("x")
+        assert store.path("../secret.collapsed") is None
+        assert store.path("missing.collapsed") is None
+        assert store.path("config.py") is None
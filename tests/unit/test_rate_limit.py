@@ -0,0 +1,75 @@
+from unittest.mock import AsyncMock, MagicMock
+from redis.exceptions import ConnectionError, NoScriptError
+import asyncio
+import pytest
+from src.services import rate_limit
+from src.services.rate_limit import RateLimiter, WINDOW_SCRIPT, WINDOW_SHA
+
+
+@pytest.fixture
+def limiter():
+    limiter = RateLimiter(limit=5, period=60)
+    limiter.redis_server = MagicMock()
+    limiter.redis_server.evalsha = AsyncMock(return_value=[1, 4, 0])
+    limiter.redis_server.eval = AsyncMock(return_value=[1, 4, 0])
+    return limiter
+
+
+class TestRateLimiter:
+
+    def test_allowed_in_one_script_call(self, limiter):
+        assert asyncio.run(limiter.check("1.2.3.4")) == (True, 4, 0.0)
+        sha, _, key, period, limit, member = limiter.redis_server.evalsha.await_args.args
+        assert (sha, key, period, limit) == (WINDOW_SHA, "rate_limit:1.2.3.4", 60000, 5)
+        asyncio.run(limiter.check("1.2.3.4"))
+        assert limiter.redis_server.evalsha.await_args.args[-1] != member    # unique per request
+
+    def test_loads_script_when_redis_does_not_have_it(self, limiter):
+        limiter.redis_server.evalsha = AsyncMock(side_effect=NoScriptError("NOSCRIPT"))
+        assert asyncio.run(limiter.check("1.2.3.4"))[0] is True
+        assert limiter.redis_server.eval.await_args.args[0] == WINDOW_SCRIPT
+
+    def test_refused_clients_are_rejected_locally(self, limiter):
+        limiter.redis_server.evalsha = AsyncMock(return_value=[0, 0, 2500])
+
+        allowed, remaining, retry_after = asyncio.run(limiter.check("1.2.3.4"))
+        assert (allowed, remaining, retry_after) == (False, 0, 2.5)
+
+        allowed, _, retry_after = asyncio.run(limiter.check("1.2.3.4"))
+        assert allowed is False
+        assert 0 < retry_after <= 2.5
+        assert limiter.redis_server.evalsha.await_count == 1
+        # other clients still go to Redis
+        asyncio.run(limiter.check("5.6.7.8"))
+        assert limiter.redis_server.evalsha.await_count == 2
+
+    def test_falls_back_to_local_limits_when_redis_is_down(self, limiter):
+        limiter.redis_server.evalsha = AsyncMock(side_effect=ConnectionError("down"))
+
+        results = [asyncio.run(limiter.check("1.2.3.4")) for _ in range(6)]
+        assert [allowed for allowed, _, _ in results] == [True] * 5 + [False]
+        assert [remaining for _, remaining, _ in results[:5]] == [4, 3, 2, 1, 0]
+        # until the first of the five leaves the window
+        assert 59.9 < results[5][2] <= 60.0
+
+    def test_local_limits_are_per_client(self, limiter):
+        limiter.redis_server.evalsha = AsyncMock(side_effect=ConnectionError("down"))
+        for _ in range(5):
+            asyncio.run(limiter.check("1.2.3.4"))
+        assert asyncio.run(limiter.check("5.6.7.8"))[0] is True
+
+    def test_no_rolling_period_admits_more_than_the_limit(self, limiter, monkeypatch):
+        limiter.redis_server.evalsha = AsyncMock(side_effect=ConnectionError("down"))
+        clock = [1000.0]
+        monkeypatch.setattr(rate_limit.time, "monotonic", lambda: clock[0])
+
+        admitted = []
+        # a burst, then a request every 3 s for five minutes
+        for step in range(100):
+            clock[0] = 1000.0 + (0 if step < 10 else (step - 10) * 3)
+            if asyncio.run(limiter.check("1.2.3.4"))[0]:
+                admitted.append(clock[0])
+
+        for start in admitted:
+            assert len([at for at in admitted if start <= at < start + 60]) <= limiter.limit
+        assert len(admitted) >= 5 * limiter.limit - 1     # but the limit is used in full
@@ -0,0 +1,48 @@
+from unittest.mock import patch
+import pytest
+from redis.crc import key_slot
+from src.core import redis as redis_module
+from src.services.cache import CacheService
+from src.services.jobs import JobQueue
+from tests.fakes import FakeRedis
+
+
+@pytest.fixture
+def cluster_mode(monkeypatch):
+    monkeypatch.setattr(redis_module.settings, "REDIS_MODE", "cluster")
+    monkeypatch.setattr(redis_module, "_clients", {})
+
+
+def slot(key: str) -> int:
+    return key_slot(key.encode())
+
+
+class TestClusterMode:
+
+    def test_builds_one_cluster_client_per_response_mode(self, cluster_mode):
+        with patch.object(redis_module.RedisCluster, "from_url", side_effect=lambda *a, **kw: object()) as from_url:
+            client = redis_module.get_redis(decode_responses=True)
+            assert redis_module.get_redis(decode_responses=True) is client
+            assert redis_module.get_redis() is not client
+
+        assert from_url.call_count == 2
+        args, kwargs = from_url.call_args_list[0]
+        assert args == (redis_module.settings.REDIS_URL,)
+        assert kwargs["decode_responses"] is True
+        assert kwargs["max_connections"] == redis_module.settings.REDIS_MAX_CONNECTIONS
+
+    def test_related_keys_share_a_slot(self):
+        # multi-key commands and scripts fail with CROSSSLOT unless their keys hash together
+        key = CacheService.generate_analysis_key("abc", 1000, include_replies=True)
+        related = [CacheService.summary_key(key), CacheService.partial_key(key), f"lock:{key}", f"failed:{key}"]
+        assert {slot(k) for k in related} == {slot(key)}
+        assert slot(key) != slot(CacheService.generate_analysis_key("xyz", 1000))
+
+        queue = JobQueue(FakeRedis())
+        assert slot(queue.processing_key("w1")) == slot(queue.queue_key) == slot(queue.workers_key())
+
+    def test_unknown_mode(self, monkeypatch):
+        monkeypatch.setattr(redis_module.settings, "REDIS_MODE", "sentinel")
+        monkeypatch.setattr(redis_module, "_clients", {})
+        with pytest.raises(ValueError):
+            redis_module.get_redis()
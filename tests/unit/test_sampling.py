@@ -0,0 +1,115 @@
+import asyncio
+import random
+import pytest
+from src.models.preprocessing import TextProcessor
+from src.services import analyzer as analyzer_module
+from src.services.analyzer import AnalyzerService
+from src.services.sampling import SentimentEstimate, sample_order
+
+
+def outputs(positive: int, negative: int, neutral: int, confidence: float = 0.9):
+    labels = ["positive"] * positive + ["negative"] * negative + ["neutral"] * neutral
+    return [{"label": label, "confidence": confidence} for label in labels]
+
+
+class FakeModel:
+    """Labels by keyword, and remembers how many texts it scored."""
+    def __init__(self):
+        self.scored = 0
+
+    def analyze_batch(self, texts):
+        self.scored += len(texts)
+        return [
+            {"label": "positive" if "love" in t else "negative", "confidence": 0.8}
+            for t in texts
+        ]
+
+
+@pytest.fixture
+def service():
+    service = AnalyzerService.__new__(AnalyzerService)
+    service.preprocessor = TextProcessor()
+    service.analyzer = FakeModel()
+    return service
+
+
+def video_comments(total: int, positive_share: float, invalid: int = 0):
+    rng = random.Random(1)
+    comments = [
+        {"author": "a", "text": "i love this video" if rng.random() < positive_share else "this video is bad",
+         "like_count": 0, "published_at": "2024-01-01T00:00:00Z", "updated_at": "2024-01-01T00:00:00Z"}
+        for _ in range(total)
+    ]
+    return comments + [{"author": "a", "text": "", "like_count": 0, "published_at": "", "updated_at": ""}] * invalid
+
+
+class TestSentimentEstimate:
+
+    def test_sample_order_is_a_seeded_permutation(self):
+        assert sorted(sample_order(50, "vid")) == list(range(50))
+        assert sample_order(50, "vid") == sample_order(50, "vid")
+        assert sample_order(50, "vid") != sample_order(50, "other")
+
+    def test_intervals_narrow_with_the_sample(self):
+        estimate = SentimentEstimate(total=100000, valid=100000)
+        estimate.add(outputs(60, 30, 10))
+        wide = estimate.half_widths()["positive"]
+        estimate.add(outputs(600, 300, 100))
+        assert estimate.half_widths()["positive"] < wide
+        assert estimate.distribution() == {"positive": 60.0, "negative": 30.0, "neutral": 10.0}
+        interval = estimate.intervals()["positive"]
+        assert interval["low"] < 60.0 < interval["high"]
+
+    def test_exact_once_every_valid_comment_is_scored(self):
+        estimate = SentimentEstimate(total=10, valid=10)
+        estimate.add(outputs(5, 5, 0))
+        assert estimate.exact and estimate.converged(0.5)
+        assert estimate.intervals()["positive"] == {"low": 50.0, "high": 50.0}
+
+    def test_invalid_comments_count_as_neutral(self):
+        estimate = SentimentEstimate(total=200, valid=100)
+        estimate.add(outputs(50, 50, 0))
+        assert estimate.distribution() == {"positive": 25.0, "negative": 25.0, "neutral": 50.0}
+
+    def test_higher_confidence_level_is_wider(self):
+        lower, higher = SentimentEstimate(10000, 10000, 0.9), SentimentEstimate(10000, 10000, 0.99)
+        for estimate in (lower, higher):
+            estimate.add(outputs(50, 50, 0))
+        assert higher.half_widths()["positive"] > lower.half_widths()["positive"]
+
+    def test_average_confidence_interval(self):
+        estimate = SentimentEstimate(total=10000, valid=10000)
+        estimate.add(outputs(50, 0, 0, confidence=0.6) + outputs(50, 0, 0, confidence=0.8))
+        mean, interval = estimate.average_confidence()
+        assert mean == 0.7
+        assert interval["low"] < 0.7 < interval["high"]
+
+
+class TestEstimateComments:
+
+    def test_stops_once_the_margin_is_reached(self, service, monkeypatch):
+        monkeypatch.setattr(analyzer_module.settings, "SAMPLE_BATCH_SIZE", 200)
+        comments = video_comments(20000, positive_share=0.7)
+        result = asyncio.run(service.estimate_comments("vid", comments, margin=3.0))
+
+        sample = result["sample"]
+        assert service.analyzer.scored == sample["sampled"] < 2000
+        assert sample["sampled"] % 200 == 0
+        assert result["total_comments"] == sample["population"] == 20000
+        assert len(result["comments"]) == sample["sampled"]
+        interval = sample["sentiment_intervals"]["positive"]
+        assert interval["high"] - interval["low"] <= 6.0
+        assert interval["low"] <= 70.0 <= interval["high"]
+        assert result["overall_sentiment"] == "positive"
+
+    def test_small_videos_are_scored_exactly(self, service):
+        comments = video_comments(50, positive_share=0.5, invalid=10)
+        result = asyncio.run(service.estimate_comments("vid", comments, margin=0.5))
+        assert result["sample"]["exact"] is True
+        assert service.analyzer.scored == 50
+        assert result["total_comments"] == 60 and result["valid_comments"] == 50
+
+    def test_no_comments(self, service):
+        result = asyncio.run(service.estimate_comments("vid", [], margin=2.0))
+        assert result["total_comments"] == 0
+        assert "sample" not in result
@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock, patch
+from src.models import sentiment
+from src.models.sentiment import SentimentAnalyzer
+
+
+class FakePipeline:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(len(texts))
+        return [{"label": "positive", "score": 0.9} for _ in texts]
+
+
+class TestAnalyzeBatch:
+
+    def test_model_is_called_per_batch(self):
+        analyzer = SentimentAnalyzer.__new__(SentimentAnalyzer)
+        analyzer.model = FakePipeline()
+        batch_size = MagicMock()
+        with (
+            patch.object(sentiment.settings, "BATCH_SIZE", 32),
+            patch.object(sentiment, "MODEL_BATCH_SIZE", batch_size),
+        ):
+            results = analyzer.analyze_batch(["great"] * 70 + [""])
+
+        assert analyzer.model.calls == [32, 32, 6]
+        assert [c.args[0] for c in batch_size.observe.call_args_list] == [32, 32, 6]
+        assert len(results) == 71
+        assert results[-1] == {"label": "neutral", "confidence": 0.0}
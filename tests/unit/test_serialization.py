@@ -0,0 +1,50 @@
+import json
+from src.api.serialization import encode_body, retag, add_timings, project
+
+RESULT = {
+    "video_id": "abc",
+    "comments": [{"text": "Great! \"quoted\" ,\"cached\": 😍", "confidence": 0.9}],
+    "cached": False,
+    "source": "api",
+    "stale": False,
+}
+
+
+def test_encoded_body_is_tagged_as_fresh_hit():
+    data = json.loads(encode_body(RESULT))
+    assert data["comments"] == RESULT["comments"]
+    assert data["cached"] is True
+    assert data["source"] == "cache"
+    assert data["stale"] is False
+
+
+def test_flags_come_last():
+    body = encode_body(RESULT)
+    assert body.endswith(b',"cached":true,"source":"cache","stale":false}')
+
+
+def test_retag_swaps_only_the_flags():
+    body = encode_body(RESULT)
+    data = json.loads(retag(body, cached=False, source="api", stale=True))
+    assert data["cached"] is False
+    assert data["source"] == "api"
+    assert data["stale"] is True
+    assert data["comments"] == RESULT["comments"]
+
+
+def test_retag_is_reversible():
+    body = encode_body(RESULT)
+    assert retag(retag(body, cached=False, source="api"), cached=True, source="cache") == body
+
+
+def test_timings_go_before_the_flags():
+    body = add_timings(encode_body(RESULT), {"total_ms": 1.5, "stages": {}})
+    assert json.loads(body)["timings"] == {"total_ms": 1.5, "stages": {}}
+    assert json.loads(retag(body, cached=False, source="api"))["timings"]["total_ms"] == 1.5
+
+
+def test_empty_projection_is_valid_json():
+    body = project(encode_body({"video_id": "x", "total_comments": 1}), ["coverage"])
+    assert json.loads(body) == {"cached": True, "source": "cache", "stale": False}
+    assert json.loads(retag(body, cached=False, source="api")) == {"cached": False, "source": "api", "stale": False}
+    assert json.loads(add_timings(body, {"total_ms": 1.0}))["timings"] == {"total_ms": 1.0}
@@ -0,0 +1,174 @@
+import asyncio
+import pytest
+from redis.exceptions import ConnectionError
+from src.core.sharding import HashRing, ShardedRedis, hash_tag
+from src.services.jobs import JobQueue
+from tests.fakes import FakePipeline, FakeRedis
+
+NODES = ["redis://a:6379", "redis://b:6379", "redis://c:6379"]
+
+
+async def refuse(*args, **kwargs):
+    raise ConnectionError("Connection refused")
+
+
+class DownPipeline(FakePipeline):
+    execute = refuse
+
+
+class DownRedis(FakeRedis):
+    """A shard that has gone away: every command fails to connect."""
+    def __getattribute__(self, name):
+        if name.startswith("_") or name in ("data", "expires_at", "published"):
+            return super().__getattribute__(name)
+        if name == "pipeline":
+            return lambda transaction=False: DownPipeline(self)
+        return refuse
+
+
+@pytest.fixture
+def shards():
+    return {node: FakeRedis() for node in NODES}
+
+
+@pytest.fixture
+def redis(shards):
+    return ShardedRedis(shards)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def holder(shards, key):
+    return [node for node, shard in shards.items() if key in shard.data]
+
+
+class TestHashTag:
+
+    def test_uses_first_non_empty_braces(self):
+        assert hash_tag("analysis:{abc}:1000") == "abc"
+        assert hash_tag("lock:analysis:{abc}:1000") == "abc"
+        assert hash_tag("{a}{b}") == "a"
+
+    def test_falls_back_to_whole_key(self):
+        assert hash_tag("plain") == "plain"
+        assert hash_tag("empty:{}:tag") == "empty:{}:tag"
+        assert hash_tag("open:{abc") == "open:{abc"
+
+
+class TestHashRing:
+
+    def test_spreads_keys_across_nodes(self):
+        ring = HashRing(NODES)
+        counts = {node: 0 for node in NODES}
+        for i in range(3000):
+            counts[ring.nodes_for(f"key:{i}")[0]] += 1
+        assert all(700 < count < 1300 for count in counts.values())
+
+    def test_fallback_order_covers_every_node_once(self):
+        order = HashRing(NODES).nodes_for("key")
+        assert sorted(order) == sorted(NODES)
+
+    def test_losing_a_node_only_moves_its_keys(self):
+        before, after = HashRing(NODES), HashRing(NODES[:2])
+        for i in range(1000):
+            owner = before.nodes_for(f"key:{i}")[0]
+            if owner != NODES[2]:
+                assert after.nodes_for(f"key:{i}")[0] == owner
+
+
+class TestShardedRedis:
+
+    def test_routes_keys_by_hash_tag(self, redis, shards):
+        run(redis.set("analysis:{abc}:100", "full"))
+        run(redis.set("analysis:{abc}:100:summary", "summary"))
+        assert holder(shards, "analysis:{abc}:100") == holder(shards, "analysis:{abc}:100:summary")
+        assert run(redis.get("analysis:{abc}:100")) == "full"
+
+    def test_mget_gathers_from_every_node(self, redis, shards):
+        keys = [f"key:{i}" for i in range(30)]
+        for key in keys:
+            run(redis.set(key, key.upper()))
+        assert len({holder(shards, key)[0] for key in keys}) == 3
+        assert run(redis.mget(keys + ["missing"])) == [key.upper() for key in keys] + [None]
+
+    def test_pipeline_returns_results_in_queued_order(self, redis):
+        async def scenario():
+            async with redis.pipeline(transaction=False) as pipe:
+                for i in range(20):
+                    pipe.set(f"key:{i}", i)
+                pipe.publish("channel", "message")
+                pipe.get("key:7")
+                return await pipe.execute()
+
+        results = run(scenario())
+        assert results[:20] == [True] * 20
+        assert results[21] == "7"
+
+    def test_publish_goes_to_one_control_node(self, redis, shards):
+        run(redis.publish("channel", "message"))
+        assert [len(shard.published) for shard in shards.values()] == [1, 0, 0]
+
+    def test_keys_fall_through_when_a_node_is_lost(self, shards):
+        key = "analysis:{abc}:100"
+        owner = ShardedRedis(shards).node_for(key)
+        shards[owner] = DownRedis()
+        redis = ShardedRedis(shards)
+
+        assert run(redis.set(key, "value")) is True
+        assert run(redis.get(key)) == "value"
+        assert owner not in holder(shards, key)
+        # the lost node is skipped from now on, not retried per command
+        assert redis.node_for(key) != owner
+
+    def test_a_recovered_node_is_flushed_before_it_serves(self, shards):
+        key = "analysis:{abc}:100"
+        redis = ShardedRedis(shards, retry_after=0)
+        run(redis.set(key, "old"))
+        owner = redis.node_for(key)
+        recovered = shards[owner]
+        redis.clients[owner] = DownRedis()
+        run(redis.set(key, "new"))          # lands on the fallback node
+
+        redis.clients[owner] = recovered   # back, still holding the old value
+        assert run(redis.get(key)) is None
+        assert recovered.data == {}
+        assert redis.node_for(key) == owner
+        run(redis.set(key, "newer"))
+        assert run(redis.mget([key])) == ["newer"]
+
+    def test_mget_treats_a_lost_node_as_misses(self, redis, shards):
+        keys = [f"key:{i}" for i in range(30)]
+        for key in keys:
+            run(redis.set(key, "value"))
+        lost = NODES[1]
+        expected = [holder(shards, key) == [lost] for key in keys]
+        redis.clients[lost] = DownRedis()
+
+        assert [v is None for v in run(redis.mget(keys))] == expected
+        assert any(expected) and not all(expected)
+
+    def test_pipeline_replays_a_lost_nodes_commands(self, redis):
+        redis.clients[NODES[0]] = DownRedis()
+
+        async def scenario():
+            async with redis.pipeline(transaction=False) as pipe:
+                for i in range(20):
+                    pipe.set(f"key:{i}", i)
+                return await pipe.execute()
+
+        assert run(scenario()) == [True] * 20
+        assert run(redis.mget([f"key:{i}" for i in range(20)])) == [str(i) for i in range(20)]
+
+    def test_list_moves_need_a_shared_hash_tag(self, redis):
+        with pytest.raises(ValueError):
+            run(redis.blmove("queue", "processing", 0.01))
+
+    def test_job_queue_runs_on_a_sharded_redis(self, redis, shards):
+        queue = JobQueue(redis)
+        job = run(queue.enqueue({"video_id": "abc"}))
+        claimed = run(queue.claim("w1", timeout=0.01))
+        assert claimed["id"] == job["id"]
+        # the queue and the processing lists share the {jobs} tag, so BLMOVE stays on one node
+        assert holder(shards, queue.processing_key("w1")) == [redis.node_for(queue.queue_key)]
@@ -0,0 +1,186 @@
+from unittest.mock import AsyncMock, MagicMock
+from redis.exceptions import ConnectionError
+import asyncio
+import json
+import time
+import pytest
+from src.services.singleflight import ComputeFailed, SingleFlight
+
+
+@pytest.fixture
+def cache():
+    cache = MagicMock()
+    cache.get = AsyncMock(return_value=None)
+    cache.redis_server = MagicMock()
+    cache.redis_server.set = AsyncMock(return_value=True)
+    cache.redis_server.eval = AsyncMock(return_value=1)
+    cache.redis_server.get = AsyncMock(return_value=None)
+    return cache
+
+
+def make_compute(result: dict):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return result
+
+    return compute, calls
+
+
+class TestSingleFlight:
+
+    def test_concurrent_callers_share_one_computation(self, cache):
+        flight = SingleFlight(cache)
+        compute, calls = make_compute({"video_id": "abc"})
+
+        async def scenario():
+            return await asyncio.gather(*(flight.run("k", compute) for _ in range(5)))
+
+        results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert all(result == ({"video_id": "abc"}, True) for result in results)
+        assert flight._inflight == {}
+        cache.redis_server.eval.assert_awaited()  # lock released
+
+    def test_waits_for_result_from_other_worker(self, cache):
+        cache.redis_server.set = AsyncMock(return_value=False)
+        cache.get = AsyncMock(side_effect=[None, {"video_id": "abc"}])
+        flight = SingleFlight(cache)
+        flight.poll_interval = 0
+        compute, calls = make_compute({"video_id": "other"})
+
+        value, fresh = asyncio.run(flight.run("k", compute))
+        assert value == {"video_id": "abc"}
+        assert fresh is False
+        assert calls == []
+
+    def test_takes_over_when_lock_frees_up(self, cache):
+        cache.redis_server.set = AsyncMock(side_effect=[False, True])
+        flight = SingleFlight(cache)
+        flight.poll_interval = 0
+        compute, calls = make_compute({"video_id": "abc"})
+
+        assert asyncio.run(flight.run("k", compute)) == ({"video_id": "abc"}, True)
+        assert len(calls) == 1
+
+    def test_computes_locally_when_redis_is_down(self, cache):
+        cache.redis_server.set = AsyncMock(side_effect=ConnectionError("down"))
+        flight = SingleFlight(cache)
+        compute, calls = make_compute({"video_id": "abc"})
+
+        assert asyncio.run(flight.run("k", compute)) == ({"video_id": "abc"}, True)
+        assert len(calls) == 1
+
+    def test_failure_is_marked_for_other_workers(self, cache):
+        flight = SingleFlight(cache)
+
+        async def compute():
+            raise ValueError("Video not found: abc")
+
+        with pytest.raises(ValueError):
+            asyncio.run(flight.run("k", compute))
+        key, failure = cache.redis_server.set.await_args.args
+        assert key == "failed:k"
+        assert json.loads(failure) == {"status_code": 500, "detail": "Video not found: abc"}
+
+    def test_waiters_raise_the_winners_failure(self, cache):
+        cache.redis_server.set = AsyncMock(return_value=False)
+        cache.redis_server.get = AsyncMock(return_value=json.dumps({"status_code": 404, "detail": "Video not found"}))
+        flight = SingleFlight(cache)
+        flight.poll_interval = 0
+        compute, calls = make_compute({"video_id": "abc"})
+
+        with pytest.raises(ComputeFailed) as failed:
+            asyncio.run(flight.run("k", compute))
+        assert (failed.value.status_code, failed.value.detail) == (404, "Video not found")
+        assert calls == []
+
+    def test_errors_reach_every_caller(self, cache):
+        flight = SingleFlight(cache)
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def scenario():
+            return await asyncio.gather(*(flight.run("k", compute) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(r, ValueError) for r in results)
+
+    def test_refresh_runs_once_per_key(self, cache):
+        flight = SingleFlight(cache)
+        compute, calls = make_compute({"video_id": "abc"})
+
+        async def scenario():
+            flight.refresh("k", compute)
+            flight.refresh("k", compute)
+            await asyncio.gather(*flight._inflight.values())
+
+        asyncio.run(scenario())
+        assert len(calls) == 1
+
+    def test_refresh_defers_to_lock_holder(self, cache):
+        cache.redis_server.set = AsyncMock(return_value=False)
+        flight = SingleFlight(cache)
+        compute, calls = make_compute({"video_id": "abc"})
+
+        async def scenario():
+            flight.refresh("k", compute)
+            await asyncio.gather(*flight._inflight.values())
+
+        asyncio.run(scenario())
+        assert calls == []
+        cache.get.assert_not_awaited()
+
+
+class TestLease:
+
+    def test_holds_and_releases(self, cache):
+        flight = SingleFlight(cache)
+
+        async def scenario():
+            async with flight.lease("k", until=time.monotonic() + 1) as held:
+                return held
+
+        assert asyncio.run(scenario()) is True
+        assert cache.redis_server.set.await_args.args[0] == "lock:k"
+        cache.redis_server.eval.assert_awaited_once()
+
+    def test_waits_for_the_holder(self, cache):
+        cache.redis_server.set = AsyncMock(side_effect=[False, False, True])
+        flight = SingleFlight(cache)
+        flight.poll_interval = 0
+
+        async def scenario():
+            async with flight.lease("k", until=time.monotonic() + 1) as held:
+                return held
+
+        assert asyncio.run(scenario()) is True
+        assert cache.redis_server.set.await_count == 3
+
+    def test_gives_up_at_the_deadline(self, cache):
+        cache.redis_server.set = AsyncMock(return_value=False)
+        flight = SingleFlight(cache)
+        flight.poll_interval = 0.01
+
+        async def scenario():
+            started = time.monotonic()
+            async with flight.lease("k", until=started + 0.05) as held:
+                return held, time.monotonic() - started
+
+        held, waited = asyncio.run(scenario())
+        assert held is False and waited < 0.5
+        cache.redis_server.eval.assert_not_awaited()
+
+    def test_proceeds_when_redis_is_down(self, cache):
+        cache.redis_server.set = AsyncMock(side_effect=ConnectionError("down"))
+        flight = SingleFlight(cache)
+
+        async def scenario():
+            async with flight.lease("k", until=time.monotonic()) as held:
+                return held
+
+        assert asyncio.run(scenario()) is True
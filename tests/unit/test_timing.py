@@ -0,0 +1,76 @@
+import asyncio
+from src.core.timing import RequestTimings, Stage, current, note, start_request
+
+FETCH = Stage("test_fetch")
+
+
+def fetch_page():
+    with FETCH.time():
+        pass
+
+
+class TestRequestTimings:
+
+    def test_stages_add_up_per_request(self):
+        async def request():
+            timings = start_request()
+            fetch_page()
+            fetch_page()
+            return timings
+
+        timings = asyncio.run(request())
+        seconds, count = timings.stages["test_fetch"]
+        assert count == 2
+        assert 0 <= seconds < 0.1
+
+    def test_no_request_no_recording(self):
+        async def background():
+            fetch_page()
+            return current()
+        assert asyncio.run(background()) is None
+
+    def test_requests_do_not_share_timings(self):
+        async def request(pages):
+            timings = start_request()
+            for _ in range(pages):
+                await asyncio.sleep(0)
+                fetch_page()
+            return timings.stages["test_fetch"][1]
+
+        async def both():
+            return await asyncio.gather(request(1), request(3))
+        assert asyncio.run(both()) == [1, 3]
+
+    def test_to_thread_records_into_the_request(self):
+        async def request():
+            timings = start_request()
+            await asyncio.to_thread(fetch_page)
+            return timings
+        assert asyncio.run(request()).stages["test_fetch"][1] == 1
+
+    def test_first_note_wins(self):
+        async def request():
+            timings = start_request()
+            note("cache", "miss")
+            note("cache", "l1")
+            return timings
+        assert asyncio.run(request()).notes == {"cache": "miss"}
+
+    def test_server_timing_header(self):
+        timings = RequestTimings()
+        timings.add("youtube_page", 0.25)
+        timings.add("youtube_page", 0.25)
+        timings.add("clean", 0.0015)
+        timings.note("cache", "miss")
+        parts = timings.server_timing().split(", ")
+        assert parts[:3] == ['youtube_page;dur=500.000;desc="2 calls"', "clean;dur=1.500", 'cache;desc="miss"']
+        assert parts[3].startswith("total;dur=")
+
+    def test_as_dict(self):
+        timings = RequestTimings()
+        timings.add("clean", 0.0015)
+        timings.note("cache", "l2")
+        data = timings.as_dict()
+        assert data["stages"] == {"clean": {"ms": 1.5, "count": 1}}
+        assert data["cache"] == "l2"
+        assert data["total_ms"] >= 0
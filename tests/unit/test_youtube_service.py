@@ -0,0 +1,142 @@
+from unittest.mock import MagicMock, patch
+import pytest
+from src.services.youtube import YouTubeService
+
+
+def make_snippet(text: str) -> dict:
+    return {
+        "authorDisplayName": "User",
+        "publishedAt": "2024-01-01",
+        "updatedAt": "2024-01-01",
+        "likeCount": 1,
+        "textDisplay": text,
+    }
+
+
+def make_thread(thread_id: str, total_replies: int = 0, inline: int = 0) -> dict:
+    item = {
+        "id": thread_id,
+        "snippet": {
+            "topLevelComment": {"snippet": make_snippet(f"top {thread_id}")},
+            "totalReplyCount": total_replies,
+        },
+    }
+    if inline:
+        item["replies"] = {"comments": [
+            {"id": f"{thread_id}.r{i}", "snippet": make_snippet(f"reply {thread_id} {i}")}
+            for i in range(inline)
+        ]}
+    return item
+
+
+def make_client(threads: list, replies: dict) -> MagicMock:
+    """Fake discovery client serving a single commentThreads page."""
+    client = MagicMock()
+    client.commentThreads.return_value.list.return_value.execute.return_value = {"items": threads}
+
+    def list_replies(part, parentId, maxResults, pageToken):
+        request = MagicMock()
+        request.execute.return_value = {"items": [
+            {"id": f"{parentId}.r{i}", "snippet": make_snippet(f"reply {parentId} {i}")}
+            for i in range(replies.get(parentId, 0))
+        ]}
+        return request
+
+    client.comments.return_value.list.side_effect = list_replies
+    return client
+
+
+@pytest.fixture
+def service():
+    with patch("src.services.youtube.discovery.build"):
+        return YouTubeService()
+
+
+class TestReplies:
+
+    def test_replies_not_requested_by_default(self, service):
+        service.youtube_client = make_client([make_thread("t1", total_replies=3, inline=3)], {})
+        result = service._fetch_comments_async("vid", 100)
+
+        assert result["total"] == 1
+        assert "parent_id" not in result["comments"][0]
+        service.youtube_client.commentThreads.return_value.list.assert_called_once_with(
+            part="snippet", videoId="vid", maxResults=100, pageToken=None
+        )
+
+    def test_inline_replies_used_without_extra_calls(self, service):
+        service.youtube_client = make_client([make_thread("t1", total_replies=2, inline=2)], {})
+        result = service._fetch_comments_async("vid", 100, include_replies=True)
+
+        assert [c["comment_id"] for c in result["comments"]] == ["t1", "t1.r0", "t1.r1"]
+        assert result["comments"][0]["parent_id"] is None
+        assert result["comments"][1]["parent_id"] == "t1"
+        service.youtube_client.comments.return_value.list.assert_not_called()
+
+    def test_missing_replies_fetched_per_thread(self, service):
+        threads = [
+            make_thread("t1", total_replies=7, inline=5),
+            make_thread("t2"),
+            make_thread("t3", total_replies=10, inline=5),
+        ]
+        service.youtube_client = make_client(threads, {"t1": 7, "t3": 10})
+        result = service._fetch_comments_async("vid", 100, include_replies=True)
+
+        assert result["total"] == 20
+        ids = [c["comment_id"] for c in result["comments"]]
+        assert ids[:9] == ["t1"] + [f"t1.r{i}" for i in range(7)] + ["t2"]
+        assert all(c["parent_id"] == "t3" for c in result["comments"][10:])
+        fetched = {
+            call.kwargs["parentId"]
+            for call in service.youtube_client.comments.return_value.list.call_args_list
+        }
+        assert fetched == {"t1", "t3"}
+
+    def test_replies_respect_max_results(self, service):
+        threads = [make_thread("t1", total_replies=50, inline=5), make_thread("t2", total_replies=50, inline=5)]
+        service.youtube_client = make_client(threads, {"t1": 50, "t2": 50})
+        result = service._fetch_comments_async("vid", 10, include_replies=True)
+
+        assert result["total"] == 10
+        assert all(c["comment_id"].startswith("t1") for c in result["comments"])
+        # t2 lies outside the budget, so its replies are never requested
+        fetched = [
+            call.kwargs["parentId"]
+            for call in service.youtube_client.comments.return_value.list.call_args_list
+        ]
+        assert fetched == ["t1"]
+
+    def test_replies_fetched_only_up_to_the_budget(self, service):
+        client = make_client([make_thread("t1", total_replies=500, inline=5)], {})
+
+        def list_replies(part, parentId, maxResults, pageToken):
+            start = int(pageToken or 0)
+            request = MagicMock()
+            request.execute.return_value = {
+                "items": [
+                    {"id": f"{parentId}.r{i}", "snippet": make_snippet(f"reply {i}")}
+                    for i in range(start, start + maxResults)
+                ],
+                "nextPageToken": str(start + maxResults),
+            }
+            return request
+
+        client.comments.return_value.list.side_effect = list_replies
+        service.youtube_client = client
+        result = service._fetch_comments_async("vid", 150, include_replies=True)
+
+        assert result["total"] == 150
+        calls = client.comments.return_value.list.call_args_list
+        assert [call.kwargs["maxResults"] for call in calls] == [100, 49]
+
+
+class TestCommentPage:
+
+    def test_one_page_and_its_token(self, service):
+        service.youtube_client = make_client([make_thread("t1"), make_thread("t2")], {})
+        service.youtube_client.commentThreads.return_value.list.return_value.execute.return_value["nextPageToken"] = "p2"
+        page = service._fetch_page("vid", 500, None)
+        assert [c["text"] for c in page["comments"]] == ["top t1", "top t2"]
+        assert page["next_page_token"] == "p2"
+        _, kwargs = service.youtube_client.commentThreads.return_value.list.call_args
+        assert kwargs["maxResults"] == 100 and kwargs["part"] == "snippet"